@@ -1,53 +1,56 @@
 import streamlit as st
 import pandas as pd
+from database.cache import cached_select, invalidate
 from database.connection import get_connection
+from database.instrumentation import track_page
+from utils.table_view import show_paginated_table
 
+BOM_DISPLAY_COLUMNS = {
+    'finished_product.name': 'product_name',
+    'finished_product.sku': 'product_sku',
+    'raw_material.name': 'raw_material_name',
+    'raw_material.sku': 'raw_material_sku',
+}
+
+
+def flatten_bom_page(df):
+    """Flatten embedded product/raw material names for display"""
+    df = df.rename(columns=BOM_DISPLAY_COLUMNS)
+    for column in BOM_DISPLAY_COLUMNS.values():
+        df[column] = df[column].fillna('Unknown') if column in df.columns else 'Unknown'
+    return df[['id', 'product_name', 'product_sku', 'raw_material_name', 'raw_material_sku',
+               'quantity_required', 'product_volume']]
+
+
+@track_page
 def show_bom():
     """Display BOM page"""
     st.subheader("🔧 Bill of Materials")
     supabase = get_connection()
 
     try:
-        # Get BOM data with product information
-        bom_response = supabase.table('bill_of_materials').select(
+        # Get BOM data with product information, one keyset page at a time
+        bom_df = show_paginated_table(
+            supabase, 'bill_of_materials',
             'id, quantity_required, product_volume, '
             'finished_product:finished_product_id(name, sku), '
-            'raw_material:raw_material_id(name, sku)'
-        ).execute()
+            'raw_material:raw_material_id(name, sku)',
+            key='bom', depends_on=['products'], transform=flatten_bom_page
+        )
 
-        if bom_response.data:
-            # Process the data to flatten it
-            bom_data = []
-            for item in bom_response.data:
-                finished_product = item.get('finished_product', {})
-                raw_material = item.get('raw_material', {})
-                
-                bom_data.append({
-                    'id': item.get('id'),
-                    'product_name': finished_product.get('name', 'Unknown') if finished_product else 'Unknown',
-                    'product_sku': finished_product.get('sku', 'Unknown') if finished_product else 'Unknown',
-                    'raw_material_name': raw_material.get('name', 'Unknown') if raw_material else 'Unknown',
-                    'raw_material_sku': raw_material.get('sku', 'Unknown') if raw_material else 'Unknown',
-                    'quantity_required': item.get('quantity_required', 0),
-                    'product_volume': item.get('product_volume', 0)
-                })
-            
-            bom_df = pd.DataFrame(bom_data)
-            st.write(f"Found {len(bom_df)} BOM entries")
-            st.dataframe(bom_df)
-        else:
+        if bom_df.empty:
             st.info("No BOMs found. Add BOM entries below.")
 
         # Add new BOM entry
         st.markdown("### ➕ Add BOM Entry")
         
         # Get finished products
-        finished_response = supabase.table('products').select('id, name, sku').eq('product_type', 'finished').execute()
-        finished_products = pd.DataFrame(finished_response.data) if finished_response.data else pd.DataFrame()
+        finished_rows = cached_select(supabase, 'products', 'id, name, sku', filters=[('eq', 'product_type', 'finished')])
+        finished_products = pd.DataFrame(finished_rows) if finished_rows else pd.DataFrame()
         
         # Get raw materials
-        raw_response = supabase.table('products').select('id, name, sku').eq('product_type', 'raw').execute()
-        raw_materials = pd.DataFrame(raw_response.data) if raw_response.data else pd.DataFrame()
+        raw_rows = cached_select(supabase, 'products', 'id, name, sku', filters=[('eq', 'product_type', 'raw')])
+        raw_materials = pd.DataFrame(raw_rows) if raw_rows else pd.DataFrame()
 
         # Check if we have both finished products and raw materials
         if finished_products.empty or raw_materials.empty:
@@ -102,6 +105,7 @@ def show_bom():
                     }
                     
                     result = supabase.table('bill_of_materials').insert(data).execute()
+                    invalidate('bill_of_materials')
                     st.success("✅ BOM entry added successfully!")
                     st.rerun()
                 except Exception as e:
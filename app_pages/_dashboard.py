@@ -0,0 +1,188 @@
+import streamlit as st
+import pandas as pd
+from database.batch import QueryBatch
+from database.cache import cached_select
+from database.connection import get_connection
+from database.instrumentation import track_page
+from database.metrics import DASHBOARD_KEYS, format_metric, get_dashboard_metrics, unavailable_metrics
+from utils.bom_graph import BOMCycleError
+from utils.costing import calculate_product_costs
+
+
+@track_page
+def show_dashboard():
+    """Display dashboard page"""
+    st.subheader("📊 Dashboard")
+    supabase = get_connection()
+
+    try:
+        batch = load_dashboard(supabase)
+
+        # Get raw materials
+        raw_rows = batch.result('raw')
+        raw_df = pd.DataFrame(raw_rows) if raw_rows else pd.DataFrame()
+        
+        # Get finished products
+        fin_rows = batch.result('finished')
+        fin_df = pd.DataFrame(fin_rows) if fin_rows else pd.DataFrame()
+        
+        # Counts, totals and inventory value are aggregated in the database
+        metrics = batch.result('metrics', default=dict.fromkeys(DASHBOARD_KEYS))
+        if 'metrics' in batch.errors:
+            st.warning(f"Dashboard totals could not be loaded and are shown as n/a: {batch.errors['metrics']}")
+        elif unavailable_metrics(metrics):
+            st.warning("Some totals need the database functions in database/sql/03_metrics.sql and are shown as n/a")
+
+        # Calculate costs for finished products
+        if not fin_df.empty:
+            try:
+                product_costs = batch.result('costs')
+            except BOMCycleError as e:
+                st.error(f"Product costs unavailable: {e}. Fix the bill of materials to see costs.")
+                product_costs = None
+            fin_df["Cost"] = fin_df["id"].map(product_costs).fillna(0.0) if product_costs is not None else None
+
+        # Display inventory sections
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("### 🧺 Raw Materials Inventory")
+            if not raw_df.empty:
+                # Summary stats for raw materials
+                col1a, col1b = st.columns(2)
+                with col1a:
+                    st.metric("Raw Materials", format_metric(metrics['raw_count'], "{:,}"))
+                with col1b:
+                    st.metric("Low Stock", format_metric(metrics['raw_low_stock'], "{:,}"))
+                
+                # Display raw materials table
+                display_raw = raw_df[['name', 'sku', 'category', 'quantity_in_stock', 'price_paid']].copy()
+                st.dataframe(display_raw, use_container_width=True)
+            else:
+                st.info("No raw materials found")
+            
+        with col2:
+            st.markdown("### 🎯 Finished Products Inventory")
+            if not fin_df.empty:
+                # Summary stats for finished products
+                col2a, col2b = st.columns(2)
+                with col2a:
+                    st.metric("Finished Products", format_metric(metrics['finished_count'], "{:,}"))
+                with col2b:
+                    st.metric("Low Stock", format_metric(metrics['finished_low_stock'], "{:,}"))
+                
+                # Display finished products table
+                display_finished = fin_df[['name', 'sku', 'quantity_in_stock', 'price_selling', 'Cost']].copy()
+                st.dataframe(display_finished, use_container_width=True)
+            else:
+                st.info("No finished products found")
+
+        # Overall metrics
+        st.markdown("### 📈 Summary Metrics")
+        col3, col4, col5, col6 = st.columns(4)
+        
+        with col3:
+            st.metric("Raw Material Value", format_metric(metrics['raw_inventory_value'], "${:,.2f}"))
+                
+        with col4:
+            if not fin_df.empty and 'Cost' in fin_df.columns:
+                finished_cost = fin_df['Cost'].sum() if fin_df['Cost'].notna().any() else None
+                st.metric("Finished Goods Cost", format_metric(finished_cost, "${:,.2f}"))
+            else:
+                st.metric("Finished Goods Cost", "$0.00")
+        
+        with col5:
+            st.metric("Total Sales", format_metric(metrics['sales_total'], "${:,.2f}"))
+        
+        with col6:
+            st.metric("Suppliers", format_metric(metrics['supplier_count'], "{:,}"))
+
+        # Recent activity section
+        st.markdown("### 📋 Recent Activity")
+        
+        col7, col8 = st.columns(2)
+        
+        with col7:
+            # Show recent sales
+            try:
+                recent_sales = batch.result('recent_sales')
+                if recent_sales.data:
+                    st.markdown("**💰 Recent Sales:**")
+                    for sale in recent_sales.data:
+                        customer = sale.get('customer_name', 'Unknown')
+                        amount = sale.get('total_amount', 0)
+                        date = sale.get('sale_date', '')[:10]
+                        st.write(f"• {customer} - ${amount:.2f} ({date})")
+                else:
+                    st.info("No recent sales")
+            except:
+                st.info("No sales data available")
+        
+        with col8:
+            # Show recent production
+            try:
+                recent_production = batch.result('recent_production')
+                if recent_production.data:
+                    st.markdown("**🏭 Recent Production:**")
+                    for order in recent_production.data:
+                        product = order.get('product_name', 'Unknown')
+                        quantity = order.get('quantity_planned', 0)
+                        status = order.get('status', 'unknown')
+                        status_emoji = "✅" if status == "completed" else "🔄" if status == "in_progress" else "📋"
+                        st.write(f"• {status_emoji} {product} (Qty: {quantity})")
+                else:
+                    st.info("No recent production")
+            except:
+                st.info("No production data available")
+
+        # Alerts and warnings section
+        st.markdown("### ⚠️ Alerts & Warnings")
+        
+        alerts = []
+        
+        # Check for low stock items
+        if metrics['raw_low_stock']:
+            alerts.append(f"🔴 {metrics['raw_low_stock']} raw materials are low in stock")
+        
+        if metrics['finished_low_stock']:
+            alerts.append(f"🔴 {metrics['finished_low_stock']} finished products are low in stock")
+        
+        # Check for items with no stock
+        if metrics['raw_out_of_stock']:
+            alerts.append(f"❌ {metrics['raw_out_of_stock']} raw materials are out of stock")
+        
+        if metrics['finished_out_of_stock']:
+            alerts.append(f"❌ {metrics['finished_out_of_stock']} finished products are out of stock")
+        
+        # Display alerts
+        if alerts:
+            for alert in alerts:
+                st.warning(alert)
+        else:
+            st.success("✅ No critical alerts at this time")
+            
+    except Exception as e:
+        st.error(f"Dashboard error: {e}")
+
+
+def load_dashboard(supabase):
+    """Run every dashboard read; independent reads run concurrently, so latency is the slowest one"""
+    batch = QueryBatch()
+    batch.add('raw', cached_select, supabase, 'products', filters=[('eq', 'product_type', 'raw')])
+    batch.add('finished', cached_select, supabase, 'products', filters=[('eq', 'product_type', 'finished')])
+    batch.add('metrics', get_dashboard_metrics, supabase)
+    batch.add('costs', calculate_product_costs, supabase)
+    batch.add('recent_sales', fetch_recent_sales, supabase)
+    batch.add('recent_production', fetch_recent_production, supabase)
+    batch.run()
+    return batch
+
+
+def fetch_recent_sales(supabase, limit=5):
+    """Fetch the most recent sales"""
+    return supabase.table('sales').select('*').order('sale_date', desc=True).limit(limit).execute()
+
+
+def fetch_recent_production(supabase, limit=5):
+    """Fetch the most recently started production orders"""
+    return supabase.table('production_orders').select('*').order('start_date', desc=True).limit(limit).execute()
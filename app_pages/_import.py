@@ -0,0 +1,50 @@
+import streamlit as st
+from database.connection import get_connection
+from database.instrumentation import track_page
+from utils.helpers import download_template
+from utils.importer import TEMPLATE_COLUMNS, import_file, error_report_csv
+
+
+@track_page
+def show_import():
+    """Display bulk import page"""
+    st.subheader("📤 Bulk Import")
+    supabase = get_connection()
+
+    template_type = st.selectbox("Template", list(TEMPLATE_COLUMNS))
+
+    st.download_button(
+        label=f"⬇️ Download {template_type} Template",
+        data=download_template(template_type),
+        file_name=f"{template_type.lower()}_template.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+    uploaded_file = st.file_uploader("Upload filled template", type=["xlsx", "csv"])
+
+    if uploaded_file is not None and st.button("📥 Import", type="primary"):
+        try:
+            with st.spinner("Importing..."):
+                report = import_file(supabase, template_type, uploaded_file, uploaded_file.name)
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Rows Read", report["rows"])
+            with col2:
+                st.metric("Rows Written", report["written"])
+            with col3:
+                st.metric("Rows With Errors", report["errors"]["row"].nunique())
+
+            if report["errors"].empty:
+                st.success(f"✅ Imported {report['written']} rows")
+            else:
+                st.warning("⚠️ Some rows were not imported")
+                st.dataframe(report["errors"], use_container_width=True, hide_index=True)
+                st.download_button(
+                    label="⬇️ Download Error Report",
+                    data=error_report_csv(report),
+                    file_name=f"{template_type.lower()}_import_errors.csv",
+                    mime="text/csv"
+                )
+        except Exception as e:
+            st.error(f"Error importing file: {e}")
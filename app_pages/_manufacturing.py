@@ -1,8 +1,15 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from database.cache import cached_select
 from database.connection import get_connection
+from database.instrumentation import track_page
+from database.procedures import finish_production, start_production
+from utils.bom_graph import BOMGraph, BOMCycleError
+from utils.expiry import show_lot_assignments
+from utils.mrp import buildable_quantities, run_mrp
 
+@track_page
 def show_manufacturing():
     """Display manufacturing page"""
     st.subheader("🏭 Manufacturing")
@@ -14,16 +21,18 @@ def show_manufacturing():
 
     try:
         # Get products that have BOMs (can be manufactured)
-        bom_response = supabase.table('bill_of_materials').select(
-            'finished_product_id, finished_product:finished_product_id(id, name, sku)'
-        ).execute()
+        bom_rows = cached_select(
+            supabase, 'bill_of_materials',
+            'finished_product_id, finished_product:finished_product_id(id, name, sku)',
+            depends_on=['products']
+        )
 
-        if bom_response.data:
+        if bom_rows:
             # Get unique products that can be manufactured
             manufacturable_products = []
             product_ids = set()
             
-            for item in bom_response.data:
+            for item in bom_rows:
                 product = item.get('finished_product', {})
                 if product and product.get('id') not in product_ids:
                     manufacturable_products.append({
@@ -41,9 +50,14 @@ def show_manufacturing():
 
                 st.markdown("### 🎯 Start New Production")
                 
+                buildable = get_buildable(supabase)
+
                 with st.form("manufacturing_form"):
-                    # Product selection
-                    product_options = [f"{row['name']} ({row['sku']})" for _, row in manufactureable_products.iterrows()]
+                    # Product selection, with how many units current stock allows
+                    product_options = [
+                        f"{row['name']} ({row['sku']}){buildable_label(buildable.get(row['id']))}"
+                        for _, row in manufactureable_products.iterrows()
+                    ]
                     selected_product = st.selectbox("Select Product to Manufacture", product_options)
                     
                     quantity_to_produce = st.number_input("Quantity to Produce", min_value=1, value=1)
@@ -69,12 +83,43 @@ def show_manufacturing():
         # Show production summary and recent activity
         st.markdown("---")
         show_production_summary(supabase)
+        show_mrp(supabase)
         show_recent_manufacturing_activity(supabase)
 
     except Exception as e:
         st.error(f"Manufacturing error: {e}")
 
 
+def get_buildable(supabase):
+    """product_id -> max units buildable from current stock ({} if it cannot be computed)"""
+    try:
+        capacity = buildable_quantities(supabase)
+        return dict(zip(capacity['product_id'].tolist(), capacity['max_buildable'].tolist()))
+    except BOMCycleError as e:
+        st.error(f"Invalid BOM: {e}")
+    except Exception as e:
+        st.warning(f"Could not calculate buildable quantities: {e}")
+    return {}
+
+
+def buildable_label(units):
+    if units is None or units < 0:
+        return ""
+    return f" — can build {units:,}"
+
+
+def fetch_material_requirements(supabase, product_id):
+    """Per-unit leaf material requirements of a product (sub-assemblies exploded) and those materials' rows"""
+    bom_graph = BOMGraph.from_supabase(supabase)
+    unit_requirements = bom_graph.unit_requirements(product_id) if bom_graph.is_assembly(product_id) else {}
+    if not unit_requirements:
+        return {}, {}
+    materials_response = supabase.table('products').select(
+        'id, name, sku, quantity_in_stock'
+    ).in_('id', list(unit_requirements)).execute()
+    return unit_requirements, {row['id']: row for row in materials_response.data or []}
+
+
 def handle_check_materials(selected_product, quantity_to_produce, production_notes, 
                          manufactureable_products, product_options, supabase):
     """Handle material availability checking"""
@@ -87,24 +132,20 @@ def handle_check_materials(selected_product, quantity_to_produce, production_not
     st.markdown(f"### 📊 Material Requirements for {product_name} (Qty: {quantity_to_produce})")
 
     try:
-        # Get BOM requirements
-        bom_response = supabase.table('bill_of_materials').select(
-            'raw_material_id, quantity_required, '
-            'raw_material:raw_material_id(id, name, sku, quantity_in_stock)'
-        ).eq('finished_product_id', product_id).execute()
+        unit_requirements, materials = fetch_material_requirements(supabase, product_id)
 
-        if bom_response.data:
+        if unit_requirements:
             # Process BOM data
             bom_requirements = []
-            for item in bom_response.data:
-                raw_material = item.get('raw_material', {})
+            for raw_material_id, quantity_required in unit_requirements.items():
+                raw_material = materials.get(raw_material_id, {})
                 bom_requirements.append({
-                    'raw_material_id': item.get('raw_material_id'),
+                    'raw_material_id': raw_material_id,
                     'raw_material_name': raw_material.get('name', 'Unknown'),
                     'raw_material_sku': raw_material.get('sku', 'Unknown'),
                     'available_stock': raw_material.get('quantity_in_stock', 0),
-                    'quantity_required': item.get('quantity_required', 0),
-                    'total_needed': item.get('quantity_required', 0) * quantity_to_produce
+                    'quantity_required': quantity_required,
+                    'total_needed': quantity_required * quantity_to_produce
                 })
 
             # Display material requirements
@@ -161,6 +202,9 @@ def handle_check_materials(selected_product, quantity_to_produce, production_not
             st.error("No BOM found for this product!")
             st.session_state.production_status = 'ready'
 
+    except BOMCycleError as e:
+        st.error(f"Invalid BOM: {e}")
+        st.session_state.production_status = 'ready'
     except Exception as e:
         st.error(f"Error checking BOM: {e}")
         st.session_state.production_status = 'ready'
@@ -172,29 +216,23 @@ def handle_start_production(supabase):
         try:
             plan = st.session_state.production_plan
 
-            # Create production order
+            # Create production order and consume materials atomically;
+            # stock is re-checked server-side at commit time
             production_data = {
                 "product_id": plan['product_id'],
                 "product_name": plan['product_name'],
                 "quantity_planned": plan['quantity'],
                 "start_date": datetime.now().isoformat(),
-                "status": "in_progress",
                 "notes": plan['notes']
             }
-            
-            result = supabase.table('production_orders').insert(production_data).execute()
-            
-            if result.data:
-                production_order_id = result.data[0]['id']
-                
-                # Deduct raw materials from inventory
-                for req in plan['bom_requirements']:
-                    # Update raw material stock
-                    new_stock = req['available_stock'] - req['total_needed']
-                    supabase.table('products').update({
-                        'quantity_in_stock': new_stock
-                    }).eq('id', req['raw_material_id']).execute()
 
+            result = start_production(supabase, production_data, plan['bom_requirements'])
+
+            if result:
+                production_order_id = result['id']
+
+                # Material batches were drawn earliest expiry first in the same transaction
+                st.session_state.production_lots = result
                 st.session_state.production_status = 'in_progress'
                 st.session_state.current_production_order = production_order_id
                 st.success("✅ Production started! Materials deducted from inventory.")
@@ -207,6 +245,12 @@ def handle_start_production(supabase):
 def handle_finish_production(supabase):
     """Handle finishing production"""
     st.info("🔄 Production in progress...")
+
+    if st.session_state.get('production_lots'):
+        plan = st.session_state.production_plan
+        with st.expander("📦 Material batches consumed"):
+            show_lot_assignments(st.session_state.production_lots,
+                                 {req['raw_material_id']: req.get('raw_material_name') for req in plan['bom_requirements']})
     
     col1, col2 = st.columns(2)
     
@@ -216,23 +260,8 @@ def handle_finish_production(supabase):
                 plan = st.session_state.production_plan
                 production_order_id = st.session_state.current_production_order
 
-                # Update production order
-                supabase.table('production_orders').update({
-                    "status": "completed",
-                    "end_date": datetime.now().isoformat(),
-                    "quantity_produced": plan['quantity']
-                }).eq('id', production_order_id).execute()
-
-                # Add finished products to inventory
-                # First get current stock
-                product_response = supabase.table('products').select('quantity_in_stock').eq('id', plan['product_id']).execute()
-                current_stock = product_response.data[0]['quantity_in_stock'] if product_response.data else 0
-                
-                # Update stock
-                new_stock = current_stock + plan['quantity']
-                supabase.table('products').update({
-                    'quantity_in_stock': new_stock
-                }).eq('id', plan['product_id']).execute()
+                # Complete the order and book the output at the cost of its consumed materials
+                finish_production(supabase, production_order_id, plan['quantity'])
 
                 # Clear session state
                 st.session_state.production_status = 'ready'
@@ -240,6 +269,7 @@ def handle_finish_production(supabase):
                     del st.session_state.production_plan
                 if 'current_production_order' in st.session_state:
                     del st.session_state.current_production_order
+                st.session_state.pop('production_lots', None)
 
                 st.success(f"🎉 Production completed! {plan['quantity']} units of {plan['product_name']} added to inventory.")
                 st.rerun()
@@ -255,6 +285,7 @@ def handle_finish_production(supabase):
                 del st.session_state.production_plan
             if 'current_production_order' in st.session_state:
                 del st.session_state.current_production_order
+            st.session_state.pop('production_lots', None)
             st.rerun()
 
 
@@ -297,6 +328,54 @@ def show_production_summary(supabase):
         st.error(f"Error loading production summary: {e}")
 
 
+def show_mrp(supabase):
+    """Net material shortages and suggested purchases for all open production orders"""
+    st.markdown("### 📦 Material Requirements Planning")
+
+    if st.button("🧮 Run MRP for Open Orders"):
+        try:
+            st.session_state.mrp_result = run_mrp(supabase)
+        except BOMCycleError as e:
+            st.error(f"Invalid BOM: {e}")
+        except Exception as e:
+            st.error(f"Error running MRP: {e}")
+
+    result = st.session_state.get('mrp_result')
+    if not result:
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Open Orders", result['orders'])
+    with col2:
+        st.metric("Materials Short", result['shortages'])
+    with col3:
+        st.metric("Suggested Purchases", f"${result['purchase_cost']:,.2f}")
+
+    if result['missing_bom']:
+        st.warning(f"{len(result['missing_bom'])} open orders are for products without a BOM and were skipped")
+
+    materials = result['materials']
+    if materials.empty:
+        st.info("No open production orders need materials")
+        return
+
+    shortages_only = st.checkbox("Show shortages only", value=True, key="mrp_shortages_only")
+    if shortages_only:
+        materials = materials[materials['shortage'] > 0]
+    st.dataframe(materials, use_container_width=True, hide_index=True)
+
+    purchases = result['materials']
+    purchases = purchases[purchases['suggested_purchase'] > 0]
+    st.download_button(
+        "📥 Download Suggested Purchases (CSV)",
+        purchases[['material_id', 'name', 'sku', 'supplier', 'suggested_purchase', 'unit_cost', 'purchase_cost']]
+        .to_csv(index=False),
+        file_name="suggested_purchases.csv",
+        mime="text/csv",
+    )
+
+
 def show_recent_manufacturing_activity(supabase):
     """Show recent manufacturing activity"""
     st.markdown("### 📋 Recent Manufacturing Activity")
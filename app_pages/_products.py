@@ -1,25 +1,38 @@
 import streamlit as st
 import pandas as pd
+from database.cache import cached_select, invalidate
 from database.connection import get_connection
+from database.instrumentation import track_page
+from utils.table_view import show_paginated_table
+from utils.bom_graph import BOMCycleError
+from utils.costing import calculate_product_costs
 
+PRODUCT_COLUMNS = 'name, sku, category, category_code, quantity_in_stock, price_selling'
 
+
+@track_page
 def show_products():
     """Display products page"""
     st.subheader("🏭 Finished Products")
     supabase = get_connection()
 
     try:
-        # Get finished products
-        response = supabase.table('products').select('*').eq('product_type', 'finished').execute()
-        df = pd.DataFrame(response.data) if response.data else pd.DataFrame()
+        # Costs for all products come from one (cached) BOM read
+        try:
+            product_costs = calculate_product_costs(supabase)
+        except BOMCycleError as e:
+            st.error(f"Product costs unavailable: {e}. Fix the bill of materials to see costs.")
+            product_costs = None
 
-        # Calculate costs locally without importing utils
-        if not df.empty:
-            df["Cost"] = df["id"].apply(lambda pid: calculate_product_cost_local(pid, supabase))
+        # Show finished products one keyset page at a time
+        df = show_paginated_table(
+            supabase, 'products', PRODUCT_COLUMNS,
+            key='products', filters=[('eq', 'product_type', 'finished')],
+            transform=lambda page: page.assign(
+                Cost=page['id'].map(product_costs).fillna(0.0) if product_costs is not None else None)
+        )
 
-        if not df.empty:
-            st.dataframe(df)
-        else:
+        if df.empty:
             st.info("No finished products found. Add some products below.")
 
         st.markdown("### ➕ Add Finished Product")
@@ -32,8 +45,8 @@ def show_products():
 
             # Get suppliers
             try:
-                suppliers_response = supabase.table('suppliers').select('id, name').execute()
-                suppliers_df = pd.DataFrame(suppliers_response.data) if suppliers_response.data else pd.DataFrame()
+                suppliers_rows = cached_select(supabase, 'suppliers', 'id, name')
+                suppliers_df = pd.DataFrame(suppliers_rows) if suppliers_rows else pd.DataFrame()
                 supplier_options = ["None"] + suppliers_df["name"].tolist()
             except:
                 supplier_options = ["None"]
@@ -62,6 +75,7 @@ def show_products():
                         "price_paid": 0
                     }
                     result = supabase.table('products').insert(data).execute()
+                    invalidate('products')
                     st.success(f"✅ Product '{name}' added")
                     st.rerun()
                 except Exception as e:
@@ -70,25 +84,3 @@ def show_products():
     except Exception as e:
         st.error(f"Products error: {e}")
 
-
-def calculate_product_cost_local(product_id, supabase):
-    """Calculate cost of finished product based on BOM (local version)"""
-    try:
-        # Get BOM data with raw material prices
-        bom_response = supabase.table('bill_of_materials').select(
-            'quantity_required, raw_material:raw_material_id(price_paid)'
-        ).eq('finished_product_id', product_id).execute()
-        
-        if not bom_response.data:
-            return 0
-            
-        total_cost = 0
-        for item in bom_response.data:
-            quantity = item.get('quantity_required', 0)
-            raw_material = item.get('raw_material', {})
-            price = raw_material.get('price_paid', 0) if raw_material else 0
-            total_cost += quantity * price
-            
-        return float(total_cost)
-    except Exception as e:
-        return 0
\ No newline at end of file
@@ -0,0 +1,136 @@
+import streamlit as st
+import pandas as pd
+from database.cache import cached_select, invalidate
+from database.connection import get_connection
+from database.instrumentation import track_page
+from database.metrics import format_metric, get_inventory_summary
+from utils.expiry import EXPIRY_WINDOW_DAYS, get_expiring_batches
+from utils.table_view import show_paginated_table
+
+
+@track_page
+def show_raw_materials():
+    """Display raw materials page"""
+    st.subheader("📦 Raw Materials")
+    supabase = get_connection()
+
+    try:
+        # Summary stats are aggregated in the database
+        summary = get_inventory_summary(supabase)
+
+        if summary['raw_count']:
+            # Display summary stats
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total Items", summary['raw_count'])
+            with col2:
+                st.metric("Total Stock", format_metric(summary['raw_total_quantity'], "{:.0f}"))
+            with col3:
+                st.metric("Low Stock Items", summary['raw_low_stock'])
+
+            # Display data one keyset page at a time
+            show_paginated_table(
+                supabase, 'products',
+                'name, sku, category, category_code, quantity_in_stock, price_paid, notes',
+                key='raw_materials', filters=[('eq', 'product_type', 'raw')]
+            )
+        else:
+            st.info("No raw materials found. Add some raw materials below.")
+
+        # Add new raw material
+        st.markdown("### ➕ Add Raw Material")
+        with st.form("add_raw_material"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                name = st.text_input("Material Name")
+                sku = st.text_input("SKU")
+                category = st.text_input("Category")
+                
+            with col2:
+                category_code = st.text_input("Category Code")
+                price_paid = st.number_input("Cost per Unit", min_value=0.0, format="%.2f")
+                quantity = st.number_input("Initial Quantity", min_value=0, value=0)
+
+            # Get suppliers
+            try:
+                suppliers_rows = cached_select(supabase, 'suppliers', 'id, name')
+                suppliers_df = pd.DataFrame(suppliers_rows) if suppliers_rows else pd.DataFrame()
+                supplier_options = ["None"] + suppliers_df["name"].tolist()
+            except:
+                supplier_options = ["None"]
+
+            supplier = st.selectbox("Supplier", supplier_options)
+            notes = st.text_area("Notes")
+
+            submitted = st.form_submit_button("Add Raw Material")
+
+            if submitted and name and sku:
+                supplier_id = None
+                if supplier != "None" and not suppliers_df.empty:
+                    supplier_row = suppliers_df[suppliers_df["name"] == supplier]
+                    if not supplier_row.empty:
+                        supplier_id = supplier_row.iloc[0]["id"]
+
+                try:
+                    data = {
+                        "name": name,
+                        "sku": sku,
+                        "product_type": "raw",
+                        "category": category,
+                        "category_code": category_code,
+                        "price_paid": price_paid,
+                        "quantity_in_stock": quantity,
+                        "supplier_id": supplier_id,
+                        "price_selling": 0,  # Raw materials don't have selling price
+                        "notes": notes
+                    }
+                    result = supabase.table('products').insert(data).execute()
+                    invalidate('products')
+                    st.success(f"✅ Raw material '{name}' added")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Error adding raw material: {e}")
+
+        # Show expiring batches section
+        show_expiring_batches()
+
+    except Exception as e:
+        st.error(f"Raw materials error: {e}")
+
+
+def get_batch_details(product_id):
+    """Get batch details for a product"""
+    supabase = get_connection()
+    
+    try:
+        response = supabase.table('batches').select('*').eq('product_id', product_id).execute()
+        return pd.DataFrame(response.data) if response.data else pd.DataFrame()
+    except Exception as e:
+        st.error(f"Error getting batch details: {e}")
+        return pd.DataFrame()
+
+
+def show_expiring_batches():
+    """Show batches expiring soon"""
+    st.markdown("### ⏰ Expiring Batches")
+    
+    try:
+        expiring_batches = get_expiring_batches(get_connection(), EXPIRY_WINDOW_DAYS)
+        
+        if not expiring_batches.empty:
+            st.warning(f"⚠️ {len(expiring_batches)} batches expiring within {EXPIRY_WINDOW_DAYS} days!")
+            st.dataframe(
+                expiring_batches,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    'expiry_date': st.column_config.DateColumn("Expiry Date", format="YYYY-MM-DD"),
+                    'days_left': st.column_config.NumberColumn("Days Left"),
+                }
+            )
+        else:
+            st.success(f"✅ No batches expiring in the next {EXPIRY_WINDOW_DAYS} days")
+            
+    except Exception as e:
+        st.error(f"Error checking expiring batches: {e}")
@@ -0,0 +1,457 @@
+import io
+import streamlit as st
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+from database.batch import QueryBatch
+from database.cache import cached_select
+from database.connection import get_connection
+from database.instrumentation import track_page
+from database.ledger import get_balances, get_cost_of_goods_sold, get_product_movements, get_stock_as_of, \
+    get_stock_at, ledger_today, take_snapshots
+from database.metrics import LOW_STOCK_THRESHOLD, format_metric, get_inventory_summary, \
+    get_product_filter_options
+from database.procedures import post_receipt
+from utils.exporter import EXPORTS, iter_export_rows, write_export
+from utils.table_view import show_paginated_table
+
+@track_page
+def show_receiving():
+    """Display receiving/inventory page"""
+    st.subheader("📦 Receiving & Inventory Management")
+    supabase = get_connection()
+
+    batch = load_receiving(supabase)
+
+    # Navigation tabs
+    tab1, tab2, tab3, tab4 = st.tabs(["📥 Receive Inventory", "📊 Current Stock", "📋 Recent Receipts",
+                                      "📒 Stock Ledger"])
+
+    with tab1:
+        show_receive_inventory_form(supabase, batch)
+
+    with tab2:
+        show_current_stock(supabase, batch)
+
+    with tab3:
+        show_recent_receipts(supabase, batch)
+
+    with tab4:
+        show_stock_ledger(supabase, batch)
+
+
+# Stock levels are read per page in Current Stock, not with the pickers
+PICKER_COLUMNS = 'id, name, sku, product_type'
+
+
+def load_receiving(supabase):
+    """Fetch the data every tab needs concurrently (all tabs render on every run)"""
+    batch = QueryBatch()
+    batch.add('products', fetch_products, supabase)
+    batch.add('suppliers', cached_select, supabase, 'suppliers', 'id, name')
+    batch.add('receipts', fetch_recent_receipts, supabase)
+    batch.add('inventory_summary', get_inventory_summary, supabase)
+    batch.run()
+    return batch
+
+
+def fetch_products(supabase):
+    """Fetch the columns the Receive and Stock Ledger product pickers show"""
+    return cached_select(supabase, 'products', PICKER_COLUMNS)
+
+
+def fetch_recent_receipts(supabase, limit=20):
+    """Fetch the most recent inventory receipts"""
+    return supabase.table('inventory_receipts').select('*').order('receipt_date', desc=True).limit(limit).execute()
+
+
+def show_receive_inventory_form(supabase, batch=None):
+    """Show form for receiving inventory"""
+    st.markdown("### 📥 Receive New Inventory")
+
+    try:
+        # Get raw materials and products
+        products_rows = batch.result('products') if batch else fetch_products(supabase)
+        products_df = pd.DataFrame(products_rows) if products_rows else pd.DataFrame()
+
+        if products_df.empty:
+            st.warning("No products found. Please add products first.")
+            return
+
+        # Get suppliers
+        suppliers_rows = batch.result('suppliers') if batch else cached_select(supabase, 'suppliers', 'id, name')
+        suppliers_df = pd.DataFrame(suppliers_rows) if suppliers_rows else pd.DataFrame()
+
+        with st.form("receive_inventory"):
+            col1, col2 = st.columns(2)
+
+            with col1:
+                # Product selection
+                product_options = [f"{row['name']} ({row['sku']}) - {row['product_type']}" 
+                                 for _, row in products_df.iterrows()]
+                selected_product = st.selectbox("Select Product", product_options)
+
+                quantity_received = st.number_input("Quantity Received", min_value=0.0, format="%.2f")
+                unit_cost = st.number_input("Unit Cost", min_value=0.0, format="%.2f")
+
+            with col2:
+                # Supplier selection
+                if not suppliers_df.empty:
+                    supplier_options = ["None"] + suppliers_df["name"].tolist()
+                    selected_supplier = st.selectbox("Supplier", supplier_options)
+                else:
+                    selected_supplier = "None"
+
+                # Receipt details
+                receipt_date = st.date_input("Receipt Date", value=datetime.now().date())
+                reference_number = st.text_input("Reference/PO Number")
+
+            # Batch information (for raw materials)
+            st.markdown("#### 📦 Batch Information (Optional)")
+            col3, col4 = st.columns(2)
+            
+            with col3:
+                batch_number = st.text_input("Batch Number")
+                expiry_date = st.date_input("Expiry Date", value=None)
+                
+            with col4:
+                location = st.text_input("Storage Location")
+                notes = st.text_area("Notes")
+
+            submitted = st.form_submit_button("📥 Receive Inventory", type="primary")
+
+            if submitted and quantity_received > 0:
+                try:
+                    # Get selected product details
+                    product_idx = product_options.index(selected_product)
+                    product = products_df.iloc[product_idx]
+
+                    # Get supplier ID
+                    supplier_id = None
+                    if selected_supplier != "None" and not suppliers_df.empty:
+                        supplier_row = suppliers_df[suppliers_df["name"] == selected_supplier]
+                        if not supplier_row.empty:
+                            supplier_id = supplier_row.iloc[0]["id"]
+
+                    # Receipt, stock, moving-average cost and batch are posted in one transaction
+                    receipt_data = {
+                        "product_id": product["id"],
+                        "product_name": product["name"],
+                        "supplier_id": supplier_id,
+                        "quantity_received": quantity_received,
+                        "unit_cost": unit_cost,
+                        "receipt_date": receipt_date.isoformat(),
+                        "reference_number": reference_number,
+                        "notes": notes
+                    }
+                    batch_data = None
+                    if batch_number or expiry_date:
+                        batch_data = {
+                            "batch_number": batch_number,
+                            "expiry_date": expiry_date.isoformat() if expiry_date else None,
+                            "location": location,
+                            "notes": notes
+                        }
+
+                    result = post_receipt(supabase, receipt_data, batch_data)
+
+                    if result:
+                        new_stock = result['quantity_in_stock']
+
+                        st.success(f"✅ Successfully received {quantity_received} units of {product['name']}")
+                        st.success(f"📦 New stock level: {new_stock} units")
+                        if batch_number:
+                            st.success(f"🏷️ Batch {batch_number} created")
+
+                        st.rerun()
+
+                except Exception as e:
+                    st.error(f"Error processing receipt: {e}")
+
+    except Exception as e:
+        st.error(f"Error loading receiving form: {e}")
+
+
+STOCK_STATUS_FILTERS = {
+    "Out of Stock": [('eq', 'quantity_in_stock', 0)],
+    "Low Stock": [('gt', 'quantity_in_stock', 0), ('lte', 'quantity_in_stock', LOW_STOCK_THRESHOLD)],
+    "In Stock": [('gt', 'quantity_in_stock', LOW_STOCK_THRESHOLD)],
+}
+
+STOCK_COLUMNS = 'name, sku, product_type, category, quantity_in_stock, price_paid'
+STOCK_EXPORT_FIELDS = EXPORTS['products']['fields'] + [('stock_status', 'str')]
+
+
+def stock_status_labels(quantity):
+    """Vectorized stock status label for a quantity_in_stock Series"""
+    quantity = pd.to_numeric(quantity, errors='coerce').fillna(0)
+    return np.select(
+        [quantity == 0, quantity <= LOW_STOCK_THRESHOLD],
+        ['🔴 Out of Stock', '🟡 Low Stock'],
+        default='🟢 In Stock'
+    )
+
+
+def stock_export_pages(supabase, filters):
+    """Pages of the products export for the current filters, with stock status"""
+    for rows in iter_export_rows(supabase, 'products', filters=filters):
+        labels = stock_status_labels(pd.Series([row['quantity_in_stock'] for row in rows]))
+        for row, label in zip(rows, labels):
+            row['stock_status'] = label
+        yield rows
+
+
+def stock_filters(product_type_filter, stock_status_filter, category_filter):
+    """Translate the Current Stock dropdowns into server-side query filters"""
+    filters = []
+    if product_type_filter != "All":
+        filters.append(('eq', 'product_type', product_type_filter))
+    if stock_status_filter != "All":
+        filters.extend(STOCK_STATUS_FILTERS[stock_status_filter])
+    if category_filter != "All":
+        filters.append(('eq', 'category', category_filter))
+    return filters
+
+
+def show_current_stock(supabase, batch=None):
+    """Show current stock levels"""
+    st.markdown("### 📊 Current Stock Levels")
+
+    try:
+        # Summary metrics are aggregated in the database
+        summary = batch.result('inventory_summary') if batch else get_inventory_summary(supabase)
+        total_products = summary['raw_count'] + summary['finished_count']
+
+        if total_products:
+            # Summary metrics
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("Total Products", total_products)
+                
+            with col2:
+                out_of_stock = summary['raw_out_of_stock'] + summary['finished_out_of_stock']
+                st.metric("Out of Stock", out_of_stock)
+                
+            with col3:
+                low_stock = summary['raw_low_stock'] + summary['finished_low_stock'] - out_of_stock
+                st.metric("Low Stock", low_stock)
+                
+            with col4:
+                values = (summary['raw_inventory_value'], summary['finished_inventory_value'])
+                total_value = None if None in values else sum(values)
+                st.metric("Total Inventory Value", format_metric(total_value, "${:.2f}"))
+                if total_value is None:
+                    st.caption("Needs database/sql/03_metrics.sql")
+
+            # Filter options come from a cached distinct-values query
+            product_types, categories = get_product_filter_options(supabase)
+            col_filter1, col_filter2, col_filter3 = st.columns(3)
+            
+            with col_filter1:
+                product_type_filter = st.selectbox("Product Type", ["All"] + list(product_types))
+            
+            with col_filter2:
+                stock_status_filter = st.selectbox("Stock Status", 
+                                                 ["All", "In Stock", "Low Stock", "Out of Stock"])
+                                                 
+            with col_filter3:
+                category_filter = st.selectbox("Category", ["All"] + list(categories))
+
+            # Filters are applied by the database; only one page is fetched
+            filters = stock_filters(product_type_filter, stock_status_filter, category_filter)
+            display_df = show_paginated_table(
+                supabase, 'products', STOCK_COLUMNS, key='current_stock', filters=filters,
+                transform=lambda page: page.assign(stock_status=stock_status_labels(page['quantity_in_stock']))
+            )
+
+            if not display_df.empty:
+                # Export every matching row, streamed page by page into the file
+                if st.button("📥 Prepare CSV Export"):
+                    buffer = io.BytesIO()
+                    write_export(stock_export_pages(supabase, filters), STOCK_EXPORT_FIELDS, buffer)
+                    st.download_button(
+                        label="📥 Export to CSV",
+                        data=buffer.getvalue(),
+                        file_name=f"inventory_report_{datetime.now().strftime('%Y%m%d')}.csv",
+                        mime="text/csv"
+                    )
+            else:
+                st.info("No products match the selected filters.")
+        else:
+            st.info("No products found.")
+
+    except Exception as e:
+        st.error(f"Error loading stock information: {e}")
+
+
+def show_recent_receipts(supabase, batch=None):
+    """Show recent inventory receipts"""
+    st.markdown("### 📋 Recent Receipts")
+
+    try:
+        # Get recent receipts
+        response = batch.result('receipts') if batch else fetch_recent_receipts(supabase)
+        
+        if response.data:
+            df = pd.DataFrame(response.data)
+            
+            # Format dates and currency
+            df['receipt_date'] = pd.to_datetime(df['receipt_date']).dt.strftime('%Y-%m-%d')
+            df['total_cost'] = df['total_cost'].apply(lambda x: f"${x:.2f}")
+            df['unit_cost'] = df['unit_cost'].apply(lambda x: f"${x:.2f}")
+            
+            # Select and rename columns for display
+            display_columns = {
+                'receipt_date': 'Date',
+                'product_name': 'Product',
+                'quantity_received': 'Quantity',
+                'unit_cost': 'Unit Cost',
+                'total_cost': 'Total Cost',
+                'reference_number': 'Reference'
+            }
+            
+            display_df = df.rename(columns=display_columns)[list(display_columns.values())]
+            st.dataframe(display_df, use_container_width=True)
+            
+            # Summary for recent receipts
+            total_receipts = len(df)
+            total_value = df['quantity_received'].sum() if 'quantity_received' in df.columns else 0
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Recent Receipts", total_receipts)
+            with col2:
+                st.metric("Total Quantity Received", f"{total_value:.0f}")
+                
+        else:
+            st.info("No receipts recorded yet")
+
+    except Exception as e:
+        st.error(f"Error loading recent receipts: {e}")
+
+
+def show_stock_ledger(supabase, batch=None):
+    """Show a product's inventory movements, stock at a past date and COGS"""
+    st.markdown("### 📒 Stock Ledger")
+
+    try:
+        products_rows = batch.result('products') if batch else fetch_products(supabase)
+        if not products_rows:
+            st.info("No products found.")
+            return
+
+        products = {f"{row['name']} ({row['sku']})": row['id'] for row in products_rows}
+        col1, col2 = st.columns(2)
+        with col1:
+            selected = st.selectbox("Product", list(products), key="ledger_product")
+        with col2:
+            as_of = st.date_input("Stock as of", value=ledger_today(), key="ledger_as_of")
+
+        product_id = products[selected]
+        balance = get_balances(supabase, [product_id]).get(product_id)
+        historical = get_stock_at(supabase, product_id, as_of)
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Current Stock", f"{balance['quantity']:.2f}" if balance else "0.00")
+        with col2:
+            st.metric("Average Cost", f"${balance['average_cost']:.2f}" if balance else "$0.00")
+        with col3:
+            st.metric("Stock Value", f"${balance['value']:,.2f}" if balance else "$0.00")
+        with col4:
+            st.metric(f"Stock on {as_of:%Y-%m-%d}", f"{historical['quantity']:.2f}")
+
+        movements = get_product_movements(supabase, product_id)
+        if movements:
+            df = pd.DataFrame(movements)
+            df['moved_at'] = pd.to_datetime(df['moved_at'], errors='coerce').dt.strftime('%Y-%m-%d %H:%M')
+            display_columns = {
+                'moved_at': 'When',
+                'movement_type': 'Type',
+                'quantity': 'Quantity',
+                'unit_cost': 'Unit Cost',
+                'value': 'Value',
+                'balance_quantity': 'Balance',
+                'average_cost': 'Average Cost',
+                'source_type': 'Source',
+                'source_id': 'Source ID'
+            }
+            st.dataframe(df.rename(columns=display_columns)[list(display_columns.values())],
+                         use_container_width=True, hide_index=True)
+        else:
+            st.info("No movements recorded for this product yet")
+
+        show_stock_as_of(supabase, as_of, products_rows)
+        show_cost_of_goods_sold(supabase)
+
+    except Exception as e:
+        st.error(f"Error loading stock ledger: {e}")
+
+
+def show_stock_as_of(supabase, as_of, products_rows):
+    """Catalog-wide stock at a past date, read only when asked for (every tab renders on each rerun)"""
+    st.markdown(f"#### 🗓️ All Stock as of {as_of:%Y-%m-%d}")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🗓️ Load All Stock", key="load_stock_as_of"):
+            st.session_state.stock_as_of = {'as_of': as_of, 'snapshot': get_stock_as_of(supabase, as_of)}
+    with col2:
+        if st.button("📌 Update Daily Checkpoints", key="take_snapshots",
+                     help="Adds the missing end-of-day checkpoints up to yesterday (pg_cron does this nightly)"):
+            days = take_snapshots(supabase)
+            st.success(f"Added {days} daily checkpoints" if days else "Checkpoints are up to date")
+
+    loaded = st.session_state.get('stock_as_of')
+    if not loaded or loaded['as_of'] != as_of:
+        return
+    snapshot = loaded['snapshot']
+    if not snapshot['stock']:
+        st.info("No stock on the ledger at that date")
+        return
+
+    names = {row['id']: (row['name'], row['sku']) for row in products_rows}
+    df = pd.DataFrame([{'product_id': pid, **row} for pid, row in snapshot['stock'].items()])
+    df['name'] = df['product_id'].map(lambda pid: names.get(pid, ('Unknown', ''))[0])
+    df['sku'] = df['product_id'].map(lambda pid: names.get(pid, ('Unknown', ''))[1])
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Products in Stock", f"{len(df):,}")
+    with col2:
+        st.metric("Stock Value", f"${df['value'].sum():,.2f}")
+    st.caption(f"From the {snapshot['checkpoint'] or 'start of the ledger'} checkpoint "
+               f"plus {snapshot['movements']:,} later movements")
+    display_columns = {
+        'name': 'Product',
+        'sku': 'SKU',
+        'quantity': 'Quantity',
+        'average_cost': 'Average Cost',
+        'value': 'Value'
+    }
+    st.dataframe(df.sort_values('value', ascending=False).rename(columns=display_columns)[
+        list(display_columns.values())], use_container_width=True, hide_index=True)
+
+
+def show_cost_of_goods_sold(supabase):
+    """COGS over a date range, computed when asked for"""
+    st.markdown("#### 💰 Cost of Goods Sold")
+    today = ledger_today()
+    col1, col2 = st.columns(2)
+    with col1:
+        cogs_start = st.date_input("From", value=today - timedelta(days=30), key="cogs_start")
+    with col2:
+        cogs_end = st.date_input("To", value=today, key="cogs_end")
+
+    if st.button("💰 Calculate COGS", key="calculate_cogs"):
+        st.session_state.cogs = {'range': (cogs_start, cogs_end),
+                                 'result': get_cost_of_goods_sold(supabase, cogs_start, cogs_end)}
+
+    loaded = st.session_state.get('cogs')
+    if not loaded or loaded['range'] != (cogs_start, cogs_end):
+        return
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("COGS", f"${loaded['result']['cogs']:,.2f}")
+    with col2:
+        st.metric("Units Sold", f"{loaded['result']['units']:,.0f}")
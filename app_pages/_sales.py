@@ -0,0 +1,371 @@
+import streamlit as st
+import pandas as pd
+from io import BytesIO
+from datetime import datetime, timedelta
+from database.batch import QueryBatch
+from database.cache import cached_select
+from database.connection import get_connection
+from database.instrumentation import track_page
+from database.metrics import format_metric, get_sales_summary, unavailable_metrics
+from database.invoice_numbers import generate_invoice_number
+from database.procedures import post_sale
+from utils.expiry import show_lot_assignments
+from utils.pdf_generator import APP_INVOICE_WORKERS, REPORTLAB_AVAILABLE, bulk_invoices, render_invoice
+from utils.sales_analytics import BUCKETS, RANK_ORDERS, get_product_sales, get_sales_series
+
+
+@track_page
+def show_sales():
+    """Display sales page"""
+    st.subheader("💰 Sales")
+    supabase = get_connection()
+
+    # Check if we have any products to sell
+    try:
+        batch = load_sales(supabase)
+
+        products_rows = batch.result('products')
+        products_df = pd.DataFrame(products_rows) if products_rows else pd.DataFrame()
+
+        if products_df.empty:
+            st.warning("⚠️ No finished products available for sale. Please add products first.")
+            return
+
+        # Show sales summary
+        show_sale_summary(supabase, batch)
+
+        show_sales_analytics(supabase, products_df)
+
+        # Show sales form
+        show_sales_form(supabase, products_df)
+
+        # Show recent sales
+        show_recent_sales(supabase, batch)
+
+        show_bulk_invoices(supabase)
+
+    except Exception as e:
+        st.error(f"Sales error: {e}")
+
+
+def load_sales(supabase):
+    """Fetch products, summary and recent sales concurrently"""
+    batch = QueryBatch()
+    batch.add('products', cached_select, supabase, 'products', filters=[('eq', 'product_type', 'finished')])
+    batch.add('summary', get_sales_summary, supabase)
+    batch.add('recent_sales', fetch_recent_sales, supabase)
+    batch.run()
+    return batch
+
+
+def load_sales_analytics(supabase, start, end, bucket, order, top_n=10):
+    """Fetch the period series and the top products concurrently"""
+    batch = QueryBatch()
+    batch.add('series', get_sales_series, supabase, start, end, bucket)
+    batch.add('top', get_product_sales, supabase, start, end, top_n, order)
+    batch.run()
+    return batch
+
+
+def show_sales_form(supabase, products_df):
+    """Show the sales form"""
+    st.markdown("### 🛒 New Sale")
+
+    last_sale = st.session_state.get('last_sale_lots')
+    if last_sale:
+        with st.expander(f"📦 Batches used by {last_sale['invoice_number']}"):
+            show_lot_assignments(last_sale['result'], last_sale['names'])
+
+    with st.form("sales_form"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            customer_name = st.text_input("Customer Name", placeholder="Enter customer name")
+            customer_email = st.text_input("Customer Email", placeholder="customer@email.com")
+            
+        with col2:
+            customer_phone = st.text_input("Customer Phone", placeholder="+1234567890")
+            payment_method = st.selectbox("Payment Method", 
+                                        ["Cash", "Credit Card", "Debit Card", "Bank Transfer", "Other"])
+
+        st.markdown("#### 📦 Products")
+        
+        # Product selection
+        products_in_stock = products_df[products_df['quantity_in_stock'] > 0] if 'quantity_in_stock' in products_df.columns else products_df
+        
+        if products_in_stock.empty:
+            st.warning("No products in stock!")
+            st.form_submit_button("Process Sale", disabled=True)
+            return
+
+        # Multi-product selection
+        selected_items = []
+        total_amount = 0
+
+        for idx, product in products_in_stock.iterrows():
+            col_prod1, col_prod2, col_prod3, col_prod4 = st.columns([3, 2, 1, 2])
+            
+            with col_prod1:
+                st.write(f"**{product['name']}** ({product['sku']})")
+            
+            with col_prod2:
+                available_stock = product.get('quantity_in_stock', 0)
+                st.write(f"Stock: {available_stock}")
+            
+            with col_prod3:
+                price = product.get('price_selling', 0)
+                st.write(f"${price:.2f}")
+            
+            with col_prod4:
+                quantity = st.number_input(
+                    f"Qty", 
+                    min_value=0, 
+                    max_value=int(available_stock),
+                    value=0,
+                    key=f"qty_{product['id']}"
+                )
+                
+                if quantity > 0:
+                    item_total = quantity * price
+                    selected_items.append({
+                        'product_id': product['id'],
+                        'product_name': product['name'],
+                        'sku': product['sku'],
+                        'quantity': quantity,
+                        'unit_price': price,
+                        'total_price': item_total,
+                        'available_stock': available_stock
+                    })
+                    total_amount += item_total
+
+        # Show order summary
+        if selected_items:
+            st.markdown("#### 📋 Order Summary")
+            for item in selected_items:
+                st.write(f"• {item['quantity']}x {item['product_name']} @ ${item['unit_price']:.2f} = ${item['total_price']:.2f}")
+            
+            st.markdown(f"**Total: ${total_amount:.2f}**")
+
+        # Sales notes
+        notes = st.text_area("Sale Notes", placeholder="Any additional notes about this sale...")
+
+        # Submit button
+        submitted = st.form_submit_button("💸 Process Sale", type="primary")
+
+        if submitted:
+            if not customer_name:
+                st.error("Please enter customer name")
+            elif not selected_items:
+                st.error("Please select at least one product")
+            else:
+                process_sale(supabase, customer_name, customer_email, customer_phone, 
+                           payment_method, selected_items, total_amount, notes)
+
+
+def process_sale(supabase, customer_name, customer_email, customer_phone, 
+                payment_method, selected_items, total_amount, notes):
+    """Process the sale"""
+    try:
+        # Create sale record
+        sale_data = {
+            "customer_name": customer_name,
+            "customer_email": customer_email,
+            "customer_phone": customer_phone,
+            "payment_method": payment_method,
+            "total_amount": total_amount,
+            "sale_date": datetime.now().isoformat(),
+            "notes": notes,
+            "invoice_number": generate_invoice_number(supabase)
+        }
+        
+        # Header, items, stock and FEFO batch decrements are posted atomically server-side
+        sale_result = post_sale(supabase, sale_data, selected_items)
+
+        if sale_result:
+            # Shown above the form after the rerun
+            st.session_state.last_sale_lots = {
+                'invoice_number': sale_data['invoice_number'],
+                'result': sale_result,
+                'names': {item['product_id']: item.get('product_name') for item in selected_items},
+            }
+            st.success(f"✅ Sale processed successfully! Invoice: {sale_data['invoice_number']}")
+            
+            # Offer to generate PDF invoice if reportlab is available
+            if REPORTLAB_AVAILABLE:
+                if st.button("📄 Generate PDF Invoice"):
+                    pdf_data = create_pdf_invoice(sale_data, selected_items)
+                    if pdf_data:
+                        st.download_button(
+                            label="⬇️ Download Invoice PDF",
+                            data=pdf_data,
+                            file_name=f"invoice_{sale_data['invoice_number']}.pdf",
+                            mime="application/pdf"
+                        )
+            
+            st.rerun()
+            
+    except Exception as e:
+        st.error(f"Error processing sale: {e}")
+
+
+def show_sale_summary(supabase, batch=None):
+    """Show sales summary"""
+    st.markdown("### 📊 Sales Summary")
+    
+    try:
+        # Aggregated in the database; payload size is independent of sales volume
+        summary = batch.result('summary') if batch else get_sales_summary(supabase)
+        
+        if summary['sales_count']:
+            if unavailable_metrics(summary):
+                st.warning("Sales totals need the database functions in database/sql/03_metrics.sql and are shown as n/a")
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("Total Sales", summary['sales_count'])
+            
+            with col2:
+                st.metric("Total Revenue", format_metric(summary['sales_total'], "${:.2f}"))
+            
+            with col3:
+                st.metric("Average Sale", format_metric(summary['sales_average'], "${:.2f}"))
+            
+            with col4:
+                st.metric("Today's Sales", format_metric(summary['sales_today'], "${:.2f}"))
+        else:
+            st.info("No sales data available yet")
+            
+    except Exception as e:
+        st.error(f"Error loading sales summary: {e}")
+
+
+def show_sales_analytics(supabase, products_df, top_n=10):
+    """Revenue and margin over time and the best-selling products, from the sales rollups"""
+    with st.expander("📈 Sales Analytics", expanded=True):
+        try:
+            today = datetime.now().date()
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                start = st.date_input("From", value=today - timedelta(days=89), key="analytics_start")
+            with col2:
+                end = st.date_input("To", value=today, key="analytics_end")
+            with col3:
+                bucket = st.selectbox("Group by", list(BUCKETS), format_func=str.title, key="analytics_bucket")
+            with col4:
+                order = st.selectbox("Rank products by", list(RANK_ORDERS), format_func=str.title,
+                                     key="analytics_order")
+            if start > end:
+                st.warning("'From' must be on or before 'To'")
+                return
+
+            batch = load_sales_analytics(supabase, start, end, bucket, order, top_n)
+            series, top = batch.result('series'), batch.result('top')
+
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Revenue", f"${series['revenue'].sum():,.2f}")
+            with col2:
+                st.metric("Margin", f"${series['margin'].sum():,.2f}")
+            with col3:
+                st.metric("Units Sold", f"{series['units'].sum():,.0f}")
+            with col4:
+                st.metric("Sales", f"{series['sales_count'].sum():,.0f}")
+
+            st.bar_chart(series.set_index('period')[['revenue', 'margin']])
+
+            if top.empty:
+                st.info("No sales in this period")
+                return
+            names = products_df.set_index('id')['name'] if 'name' in products_df.columns else pd.Series(dtype=str)
+            # top is the cached frame shared between sessions; add the names to a copy
+            top = top.copy()
+            top['product'] = top['product_id'].map(names).fillna(top['product_id'].map('Product {}'.format))
+            st.markdown(f"#### 🏆 Top {top_n} Products by {order.title()}")
+            st.bar_chart(top.set_index('product')[[order]])
+            display_columns = {
+                'product': 'Product',
+                'units': 'Units',
+                'revenue': 'Revenue',
+                'cost': 'Cost',
+                'margin': 'Margin',
+                'margin_pct': 'Margin %'
+            }
+            st.dataframe(top.rename(columns=display_columns)[list(display_columns.values())].round(2),
+                         use_container_width=True, hide_index=True)
+
+        except Exception as e:
+            st.error(f"Error loading sales analytics: {e}")
+
+
+def fetch_recent_sales(supabase, limit=10):
+    """Fetch the most recent sales"""
+    return supabase.table('sales').select('*').order('sale_date', desc=True).limit(limit).execute()
+
+
+def show_recent_sales(supabase, batch=None):
+    """Show recent sales"""
+    st.markdown("### 📋 Recent Sales")
+    
+    try:
+        response = batch.result('recent_sales') if batch else fetch_recent_sales(supabase)
+        
+        if response.data:
+            df = pd.DataFrame(response.data)
+            # Format the display
+            display_df = df[['invoice_number', 'customer_name', 'total_amount', 'payment_method', 'sale_date']].copy()
+            display_df['sale_date'] = pd.to_datetime(display_df['sale_date']).dt.strftime('%Y-%m-%d %H:%M')
+            st.dataframe(display_df, use_container_width=True)
+        else:
+            st.info("No sales recorded yet")
+            
+    except Exception as e:
+        st.error(f"Error loading recent sales: {e}")
+
+
+def create_pdf_invoice(sale_data, items):
+    """Create PDF invoice"""
+    if not REPORTLAB_AVAILABLE:
+        return None
+
+    try:
+        return render_invoice(sale_data, items)
+    except Exception as e:
+        st.error(f"Error creating PDF: {e}")
+        return None
+
+
+def show_bulk_invoices(supabase):
+    """Regenerate every invoice in a date range as a zip or one merged PDF"""
+    with st.expander("🧾 Bulk Invoices"):
+        if not REPORTLAB_AVAILABLE:
+            st.info("Install reportlab to generate invoices.")
+            return
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            start_date = st.date_input("From", value=datetime.now().date().replace(day=1), key="bulk_invoice_from")
+        with col2:
+            end_date = st.date_input("To", value=datetime.now().date(), key="bulk_invoice_to")
+        with col3:
+            output = st.radio("Output", ["zip", "pdf"], key="bulk_invoice_output",
+                              format_func=lambda o: "Zip of PDFs" if o == "zip" else "Single merged PDF")
+
+        if st.button("📄 Generate Invoices"):
+            try:
+                buffer = BytesIO()
+                with st.spinner("Rendering invoices..."):
+                    stats = bulk_invoices(supabase, start_date, end_date, buffer, output, APP_INVOICE_WORKERS)
+
+                if stats['invoices']:
+                    st.success(f"✅ {stats['invoices']} invoices in {stats['seconds']:.1f}s "
+                               f"({stats['invoices_per_second']:.1f} invoices/sec)")
+                    st.download_button(
+                        label="⬇️ Download Invoices",
+                        data=buffer.getvalue(),
+                        file_name=f"invoices_{start_date:%Y%m%d}_{end_date:%Y%m%d}.{output}",
+                        mime="application/zip" if output == "zip" else "application/pdf"
+                    )
+                else:
+                    st.info("No sales in the selected range.")
+            except Exception as e:
+                st.error(f"Error generating invoices: {e}")
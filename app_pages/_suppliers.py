@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
+from database.cache import invalidate
 from database.connection import get_connection
+from database.instrumentation import track_page
+from utils.table_view import show_paginated_table
 
 def show_suppliers_v2():
     """Display suppliers page - COMPLETELY NEW VERSION"""
@@ -10,13 +13,13 @@ def show_suppliers_v2():
         # Get Supabase connection
         supabase = get_connection()
         
-        # Get all suppliers using Supabase
-        response = supabase.table('suppliers').select('*').execute()
-        suppliers = pd.DataFrame(response.data) if response.data else pd.DataFrame()
+        # Show suppliers one keyset page at a time
+        suppliers = show_paginated_table(
+            supabase, 'suppliers', 'name, contact, phone, email, raw_materials, category_codes',
+            key='suppliers', order_column='name'
+        )
 
-        if not suppliers.empty:
-            st.dataframe(suppliers)
-        else:
+        if suppliers.empty:
             st.info("No suppliers found. Add some suppliers below.")
 
         st.markdown("### ➕ Add Supplier")
@@ -41,6 +44,7 @@ def show_suppliers_v2():
                         "category_codes": category_codes
                     }
                     result = supabase.table('suppliers').insert(data).execute()
+                    invalidate('suppliers')
                     st.success(f"✅ Supplier '{name}' added successfully!")
                     st.rerun()
                 except Exception as e:
@@ -50,6 +54,7 @@ def show_suppliers_v2():
         st.error(f"❌ Error loading suppliers: {e}")
 
 # Keep the old function name for backward compatibility, but redirect to new one
+@track_page
 def show_suppliers():
     """Redirect to new version"""
     return show_suppliers_v2()
\ No newline at end of file
@@ -0,0 +1,75 @@
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from database.cache import query_cache
+from database.instrumentation import InstrumentedClient, begin_rerun
+
+
+def measure(scenario, client, repeat=3, warm=False):
+    """Run scenario(client) and return median wall time, queries, bytes and peak memory.
+
+    Cold runs clear the shared query cache first so every read goes to the
+    backend; warm runs prime it once and then measure cache-served reruns.
+    Peak memory comes from one extra tracemalloc run so tracing does not
+    distort the timings. Query counts and bytes come from the same
+    instrumentation the app uses. Bytes are the JSON size of each response,
+    measured in another untimed run since serializing them costs time and memory.
+    """
+    instrumented = InstrumentedClient(client, measure_bytes=False)
+
+    def run_once():
+        if not warm:
+            query_cache.clear()
+        log = begin_rerun(scenario.__name__)
+        started = time.perf_counter()
+        scenario(instrumented)
+        elapsed = time.perf_counter() - started
+        summary = log.summary()
+        return elapsed, summary['queries'], summary['bytes']
+
+    if warm:
+        query_cache.clear()
+        scenario(instrumented)
+
+    runs = [run_once() for _ in range(repeat)]
+
+    instrumented.measure_bytes = True
+    try:
+        payload = run_once()[2]
+    finally:
+        instrumented.measure_bytes = False
+
+    tracemalloc.start()
+    try:
+        run_once()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    times = [run[0] for run in runs]
+    return {
+        'wall_ms': statistics.median(times) * 1000,
+        'wall_ms_min': min(times) * 1000,
+        'queries': runs[-1][1],
+        'bytes': payload,
+        'peak_kb': peak / 1024,
+    }
+
+
+def git_revision():
+    """Current commit hash and whether the tree has uncommitted changes"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except Exception:
+        return None, None
+
+
+def environment():
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'machine': platform.machine()}
@@ -0,0 +1,104 @@
+"""Cold import times for the app entry point, its dependencies and each page.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 5 --top 15
+
+Every module is imported in a fresh interpreter with -X importtime, so the
+numbers include everything it pulls in transitively, as on a cold start.
+Modules that are not installed are reported as unavailable rather than failing
+the run.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from benchmarks.harness import environment, git_revision
+from utils.page_registry import PAGES
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Imported by the router on every start; page modules are imported only when opened
+STARTUP_MODULES = ['streamlit', 'pandas', 'numpy', 'supabase', 'database.connection',
+                   'utils.page_registry', 'utils.query_debug']
+HEAVY_MODULES = ['reportlab.platypus', 'pypdf', 'pyarrow.parquet', 'scipy.sparse', 'openpyxl']
+
+
+def import_once(module):
+    """Import module in a fresh interpreter; return (total_ms, [(cumulative_us, name)]) or None"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=ROOT,
+        env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+    )
+    if completed.returncode != 0:
+        return None
+    entries = []
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented two spaces per level
+        entries.append((int(cumulative), name[1:].rstrip()))
+    top_level = [us for us, name in entries if not name.startswith(' ')]
+    return sum(top_level) / 1000, entries
+
+
+def measure_module(module, repeat=3, top=10):
+    runs = [import_once(module) for _ in range(repeat)]
+    if any(run is None for run in runs):
+        return {'available': False}
+    totals = [run[0] for run in runs]
+    slowest = sorted(runs[-1][1], reverse=True)[:top]
+    return {
+        'available': True,
+        'ms': statistics.median(totals),
+        'ms_min': min(totals),
+        'slowest': [{'module': name.strip(), 'cumulative_ms': us / 1000} for us, name in slowest],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import times")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="slowest nested imports to keep per module")
+    parser.add_argument("--module", action="append", help="extra module to measure (repeatable)")
+    parser.add_argument("--out", default=RESULTS_DIR, help="directory for the results JSON")
+    args = parser.parse_args(argv)
+
+    groups = {
+        'startup': STARTUP_MODULES,
+        'pages': [module for module, _ in PAGES.values()],
+        'heavy': HEAVY_MODULES + (args.module or []),
+    }
+    results = {}
+    for group, modules in groups.items():
+        results[group] = {}
+        for module in modules:
+            result = measure_module(module, args.repeat, args.top)
+            results[group][module] = result
+            timing = f"{result['ms']:9.1f} ms" if result['available'] else "  unavailable"
+            print(f"{group:8} {module:32} {timing}")
+
+    commit, dirty = git_revision()
+    report = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'repeat': args.repeat,
+        'environment': environment(),
+        'modules': results,
+    }
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"{(commit or 'unknown')[:10]}{'-dirty' if dirty else ''}-imports.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Seed a local database and benchmark the page data paths.
+
+    python -m benchmarks.run --scale small
+    python -m benchmarks.run --scale large --scenario dashboard --repeat 5
+    python -m benchmarks.run --compare benchmarks/results/a.json benchmarks/results/b.json
+
+Results are written as JSON named after the commit and scale, so runs from
+different commits can be compared with --compare.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from benchmarks.harness import environment, git_revision, measure
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.synthetic import SCALES, scale_config, seed_database
+from database.local_backend import LocalClient
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+METRICS = ('wall_ms', 'queries', 'bytes', 'peak_kb')
+
+
+def run(config, scenarios, repeat=3, seed=42, db_path=':memory:'):
+    client = LocalClient(db_path)
+    started = time.perf_counter()
+    rows = seed_database(client, config, seed)
+    seed_seconds = time.perf_counter() - started
+
+    results = {}
+    for name in scenarios:
+        results[name] = {
+            'cold': measure(SCENARIOS[name], client, repeat),
+            'warm': measure(SCENARIOS[name], client, repeat, warm=True),
+        }
+        cold, warm = results[name]['cold'], results[name]['warm']
+        print(f"{name:18} cold {cold['wall_ms']:9.1f} ms {cold['queries']:4} q {cold['bytes'] / 1024:9.1f} KB "
+              f"{cold['peak_kb'] / 1024:7.1f} MB peak | warm {warm['wall_ms']:8.1f} ms {warm['queries']:4} q")
+    client.close()
+    return {'rows': rows, 'seed_seconds': seed_seconds, 'scenarios': results}
+
+
+def compare(old_path, new_path):
+    """Print per-scenario metric changes between two result files"""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    if old.get('config') != new.get('config'):
+        print("Warning: results were produced with different data configurations")
+    print(f"{(old.get('commit') or '?')[:10]} -> {(new.get('commit') or '?')[:10]}")
+    for name, phases in new['scenarios'].items():
+        if name not in old['scenarios']:
+            continue
+        for phase, metrics in phases.items():
+            before = old['scenarios'][name][phase]
+            changes = []
+            for metric in METRICS:
+                a, b = before[metric], metrics[metric]
+                delta = f"{(b - a) / a * 100:+.0f}%" if a else ("n/a" if not b else "new")
+                changes.append(f"{metric} {a:,.1f} -> {b:,.1f} ({delta})")
+            print(f"{name:18} {phase:4}  " + ", ".join(changes))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark page data paths on synthetic data")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--sales", type=int)
+    parser.add_argument("--batches", type=int)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="scenario to run (repeatable; default: all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", default=":memory:", help="SQLite file to seed (default: in memory)")
+    parser.add_argument("--out", default=RESULTS_DIR, help="directory for the results JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    if args.db != ':memory:' and os.path.exists(args.db):
+        print(f"{args.db} already exists; benchmarks need a fresh database", file=sys.stderr)
+        return 1
+
+    config = scale_config(args.scale, products=args.products, sales=args.sales, batches=args.batches)
+    scenarios = args.scenario or list(SCENARIOS)
+    commit, dirty = git_revision()
+    print(f"Seeding {config} ...")
+    result = run(config, scenarios, args.repeat, args.seed, args.db)
+
+    report = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'scale': args.scale,
+        'config': config,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'environment': environment(),
+        **result,
+    }
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"{(commit or 'unknown')[:10]}{'-dirty' if dirty else ''}-{args.scale}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
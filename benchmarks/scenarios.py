@@ -0,0 +1,140 @@
+"""Headless versions of the page render paths.
+
+Each scenario calls the same data functions as the page it is named after
+(the pages' own loaders, not copies of their queries), minus the Streamlit
+widgets, so it measures what the app runs.
+"""
+import io
+import itertools
+from datetime import datetime, timedelta
+import pandas as pd
+from database.cache import cached_select
+from database.metrics import count_rows, get_product_filter_options
+from database.pagination import DEFAULT_PAGE_SIZE, fetch_page
+from database.procedures import post_sale
+from database.invoice_numbers import generate_invoice_number
+from database.ledger import get_stock_as_of
+from utils.bom_graph import BOMGraph
+from utils.costing import calculate_product_costs
+from utils.expiry import get_expiring_batches
+from utils.exporter import write_export
+from utils.mrp import run_mrp
+from app_pages import _dashboard, _manufacturing, _products, _receiving, _sales
+
+_sale_products = itertools.count()
+
+
+def dashboard(supabase):
+    """app_pages/_dashboard.show_dashboard"""
+    batch = _dashboard.load_dashboard(supabase)
+    fin_df = pd.DataFrame(batch.result('finished'))
+    fin_df['Cost'] = fin_df['id'].map(batch.result('costs')).fillna(0.0)
+    pd.DataFrame(batch.result('raw'))
+
+
+def products(supabase):
+    """app_pages/_products.show_products (first page)"""
+    costs = calculate_product_costs(supabase)
+    filters = (('eq', 'product_type', 'finished'),)
+    rows, _ = fetch_page(supabase, 'products', _products.PRODUCT_COLUMNS, filters, None, DEFAULT_PAGE_SIZE)
+    pd.json_normalize(rows).assign(Cost=lambda df: df['id'].map(costs).fillna(0.0))
+    count_rows(supabase, 'products', filters)
+    cached_select(supabase, 'suppliers', 'id, name')
+
+
+def current_stock(supabase):
+    """app_pages/_receiving.show_receiving with the Current Stock tab (low stock filter)"""
+    _receiving.load_receiving(supabase)
+    get_product_filter_options(supabase)
+    filters = tuple(_receiving.stock_filters("All", "Low Stock", "All"))
+    rows, _ = fetch_page(supabase, 'products', _receiving.STOCK_COLUMNS, filters, None, DEFAULT_PAGE_SIZE)
+    pd.json_normalize(rows).assign(stock_status=lambda df: _receiving.stock_status_labels(df['quantity_in_stock']))
+    count_rows(supabase, 'products', filters)
+
+
+def stock_export(supabase):
+    """Current Stock 'Prepare CSV Export' over the whole catalog"""
+    write_export(_receiving.stock_export_pages(supabase, []), _receiving.STOCK_EXPORT_FIELDS, io.BytesIO())
+
+
+def sales_page(supabase):
+    """app_pages/_sales.show_sales (reads only)"""
+    _sales.load_sales(supabase)
+
+
+def sales_analytics(supabase):
+    """app_pages/_sales.show_sales_analytics: a year by week plus the top ten products"""
+    today = datetime.now().date()
+    _sales.load_sales_analytics(supabase, today - timedelta(days=364), today, 'week', 'revenue')
+
+
+def process_sale(supabase):
+    """app_pages/_sales.process_sale for a three-line sale (FEFO batch allocation happens inside post_sale)"""
+    finished = cached_select(supabase, 'products', 'id, name, price_selling',
+                             filters=[('eq', 'product_type', 'finished')])
+    start = next(_sale_products) * 3 % max(len(finished) - 3, 1)
+    items = [{'product_id': row['id'], 'product_name': row['name'], 'quantity': 1,
+              'unit_price': row['price_selling'], 'total_price': row['price_selling']}
+             for row in finished[start:start + 3]]
+    sale = {'customer_name': 'Benchmark', 'payment_method': 'Cash', 'sale_date': datetime.now().isoformat(),
+            'total_amount': sum(item['total_price'] for item in items),
+            'invoice_number': generate_invoice_number(supabase)}
+    post_sale(supabase, sale, items)
+
+
+def bulk_sale(supabase):
+    """post_sale with 2,000 one-unit lines across the finished catalog (FEFO over every product's batches)"""
+    finished = cached_select(supabase, 'products', 'id, name, price_selling',
+                             filters=[('eq', 'product_type', 'finished')])
+    items = [{'product_id': row['id'], 'product_name': row['name'], 'quantity': 1,
+              'unit_price': row['price_selling'], 'total_price': row['price_selling']}
+             for row in itertools.islice(itertools.cycle(finished), 2000)]
+    sale = {'customer_name': 'Benchmark', 'payment_method': 'Cash', 'sale_date': datetime.now().isoformat(),
+            'total_amount': sum(item['total_price'] for item in items),
+            'invoice_number': generate_invoice_number(supabase)}
+    post_sale(supabase, sale, items)
+
+
+def check_materials(supabase):
+    """app_pages/_manufacturing.handle_check_materials for the most complex product"""
+    graph = BOMGraph.from_supabase(supabase)
+    product_id = max(graph.children, key=lambda pid: len(graph.unit_requirements(pid)))
+    _manufacturing.fetch_material_requirements(supabase, product_id)
+
+
+def mrp(supabase):
+    """app_pages/_manufacturing.show_mrp over every open production order"""
+    run_mrp(supabase)
+
+
+def max_buildable(supabase):
+    """app_pages/_manufacturing.get_buildable for the product selectbox"""
+    _manufacturing.get_buildable(supabase)
+
+
+def stock_as_of(supabase):
+    """app_pages/_receiving.show_stock_ledger: the whole catalog as of 30 days ago"""
+    get_stock_as_of(supabase, datetime.now().date() - timedelta(days=30))
+
+
+def expiring_batches(supabase):
+    """app_pages/_raw_materials.show_expiring_batches"""
+    get_expiring_batches(supabase)
+
+
+SCENARIOS = {
+    'dashboard': dashboard,
+    'products': products,
+    'current_stock': current_stock,
+    'stock_export': stock_export,
+    'sales_page': sales_page,
+    'check_materials': check_materials,
+    'expiring_batches': expiring_batches,
+    'mrp': mrp,
+    'max_buildable': max_buildable,
+    'stock_as_of': stock_as_of,
+    'sales_analytics': sales_analytics,
+    # Writes last so the read scenarios all see the seeded data
+    'process_sale': process_sale,
+    'bulk_sale': bulk_sale,
+}
@@ -0,0 +1,233 @@
+"""Deterministic synthetic data for the local backend.
+
+seed_database() fills a LocalClient with suppliers, a raw/finished catalog,
+multi-level BOMs, receipts, batches and a sales history. The same scale and
+seed always produce the same rows, so results from different commits are
+measured against identical data.
+"""
+from datetime import date, timedelta
+import numpy as np
+from database.local_backend import LOCAL_PROCEDURES
+
+# Row counts per scale; any value can be overridden from the command line
+SCALES = {
+    'small': {'suppliers': 20, 'products': 500, 'sales': 5_000, 'batches': 20_000, 'receipts': 2_000, 'production_orders': 500},
+    'medium': {'suppliers': 100, 'products': 10_000, 'sales': 100_000, 'batches': 200_000, 'receipts': 20_000, 'production_orders': 5_000},
+    'large': {'suppliers': 200, 'products': 10_000, 'sales': 100_000, 'batches': 1_000_000, 'receipts': 50_000, 'production_orders': 5_000},
+}
+FINISHED_SHARE = 0.3
+BOM_LINES = (2, 6)
+SUBASSEMBLY_SHARE = 0.1
+ITEMS_PER_SALE = (1, 5)
+HISTORY_DAYS = 365
+CATEGORIES = ['Soil', 'Pots', 'Seeds', 'Fertilizer', 'Tools', 'Plants', 'Succulents', 'Herbs']
+
+
+def scale_config(scale='small', **overrides):
+    config = dict(SCALES[scale])
+    config.update({key: value for key, value in overrides.items() if value is not None})
+    return config
+
+
+def seed_database(client, config, seed=42, today=None):
+    """Bulk-load synthetic rows straight into a LocalClient's SQLite file.
+
+    Returns the number of rows written per table.
+    """
+    rng = np.random.default_rng(seed)
+    today = today or date.today()
+    conn = client.conn
+    counts = {}
+
+    with client.lock, conn:
+        counts['suppliers'] = _insert(conn, 'suppliers', ['name', 'contact', 'email'], [
+            (f"Supplier {i}", f"Contact {i}", f"supplier{i}@example.com")
+            for i in range(1, config['suppliers'] + 1)
+        ])
+
+        n_products = config['products']
+        n_finished = max(1, int(n_products * FINISHED_SHARE))
+        n_raw = n_products - n_finished
+        # ids are assigned in insert order: raw materials first, then finished goods
+        raw_ids = np.arange(1, n_raw + 1)
+        finished_ids = np.arange(n_raw + 1, n_products + 1)
+        categories = rng.integers(0, len(CATEGORIES), n_products)
+        stock = rng.integers(0, 500, n_products).astype(float)
+        stock[rng.random(n_products) < 0.05] = 0
+        price_paid = np.round(rng.uniform(0.5, 40, n_products), 2)
+        suppliers = rng.integers(1, config['suppliers'] + 1, n_products)
+        products = []
+        for i in range(n_products):
+            finished = i >= n_raw
+            products.append((
+                f"{'Product' if finished else 'Material'} {i + 1}",
+                f"{'F' if finished else 'R'}{i + 1:07d}",
+                'finished' if finished else 'raw',
+                CATEGORIES[categories[i]],
+                CATEGORIES[categories[i]][:3].upper(),
+                # Finished goods get deep stock so repeated sale scenarios never run dry
+                stock[i] + (100_000 if finished else 0),
+                0.0 if finished else price_paid[i],
+                round(price_paid[i] * 3, 2) if finished else 0.0,
+                int(suppliers[i]),
+            ))
+        counts['products'] = _insert(conn, 'products', [
+            'name', 'sku', 'product_type', 'category', 'category_code', 'quantity_in_stock',
+            'price_paid', 'price_selling', 'supplier_id'], products)
+
+        bom = []
+        for index, product_id in enumerate(finished_ids):
+            lines = rng.integers(*BOM_LINES)
+            for raw_id in rng.choice(raw_ids, size=min(lines, n_raw), replace=False):
+                bom.append((int(product_id), int(raw_id), float(rng.integers(1, 5))))
+            # Some products use an earlier finished product as a sub-assembly (keeps the graph acyclic)
+            if index and rng.random() < SUBASSEMBLY_SHARE:
+                bom.append((int(product_id), int(finished_ids[rng.integers(0, index)]), 1.0))
+        counts['bill_of_materials'] = _insert(
+            conn, 'bill_of_materials', ['finished_product_id', 'raw_material_id', 'quantity_required'], bom)
+
+        n_receipts = config['receipts']
+        receipt_products = rng.choice(raw_ids, n_receipts)
+        receipt_quantities = rng.integers(10, 200, n_receipts)
+        receipt_days = rng.integers(0, HISTORY_DAYS, n_receipts)
+        counts['inventory_receipts'] = _insert(conn, 'inventory_receipts', [
+            'product_id', 'product_name', 'supplier_id', 'quantity_received', 'unit_cost', 'total_cost',
+            'receipt_date', 'reference_number'], [
+            (int(pid), f"Material {pid}", int(suppliers[pid - 1]), float(qty), float(price_paid[pid - 1]),
+             round(float(qty * price_paid[pid - 1]), 2), (today - timedelta(days=int(day))).isoformat(),
+             f"PO-{i:07d}")
+            for i, (pid, qty, day) in enumerate(zip(receipt_products, receipt_quantities, receipt_days))
+        ])
+
+        n_batches = config['batches']
+        batch_products = rng.integers(1, n_products + 1, n_batches)
+        batch_quantities = rng.integers(0, 100, n_batches).astype(float)
+        expiry_offsets = rng.integers(-30, 540, n_batches)
+        no_expiry = rng.random(n_batches) < 0.1
+        counts['batches'] = _insert(conn, 'batches', [
+            'product_id', 'batch_number', 'quantity', 'receipt_id', 'expiry_date'], [
+            (int(pid), f"B{i:08d}", float(qty), int(i % n_receipts) + 1 if n_receipts else None,
+             None if skip else (today + timedelta(days=int(offset))).isoformat())
+            for i, (pid, qty, offset, skip) in enumerate(
+                zip(batch_products, batch_quantities, expiry_offsets, no_expiry))
+        ])
+
+        n_sales = config['sales']
+        sale_days = np.sort(rng.integers(0, HISTORY_DAYS, n_sales))[::-1]
+        sale_seconds = rng.integers(8 * 3600, 20 * 3600, n_sales)
+        item_counts = rng.integers(*ITEMS_PER_SALE, n_sales)
+        sales, items = [], []
+        for sale_index in range(n_sales):
+            sale_id = sale_index + 1
+            chosen = rng.choice(finished_ids, size=int(item_counts[sale_index]), replace=False)
+            quantities = rng.integers(1, 4, len(chosen))
+            total = 0.0
+            for product_id, quantity in zip(chosen, quantities):
+                unit_price = round(price_paid[product_id - 1] * 3, 2)
+                line_total = round(unit_price * quantity, 2)
+                total += line_total
+                items.append((sale_id, int(product_id), f"Product {product_id}", float(quantity),
+                              unit_price, line_total))
+            sold_at = (today - timedelta(days=int(sale_days[sale_index]))).isoformat() + \
+                f"T{int(sale_seconds[sale_index]) // 3600:02d}:{int(sale_seconds[sale_index]) % 3600 // 60:02d}:00"
+            sales.append((f"INV-SYN-{sale_id:08d}", f"Customer {sale_id % 5000}", 'Cash',
+                          round(total, 2), sold_at))
+        counts['sales'] = _insert(conn, 'sales', [
+            'invoice_number', 'customer_name', 'payment_method', 'total_amount', 'sale_date'], sales)
+        counts['sale_items'] = _insert(conn, 'sale_items', [
+            'sale_id', 'product_id', 'product_name', 'quantity', 'unit_price', 'total_price'], items)
+
+        # Open orders for MRP: mostly planned, the rest already started with their materials consumed
+        n_orders = config.get('production_orders', 0)
+        order_products = rng.choice(finished_ids, n_orders)
+        order_quantities = rng.integers(1, 50, n_orders).astype(float)
+        order_status = np.where(rng.random(n_orders) < 0.8, 'planned', 'in_progress')
+        counts['production_orders'] = _insert(conn, 'production_orders', [
+            'product_id', 'product_name', 'quantity_planned', 'status'], [
+            (int(pid), f"Product {pid}", float(qty), str(status))
+            for pid, qty, status in zip(order_products, order_quantities, order_status)
+        ])
+        direct = {}
+        for parent, child, qty in bom:
+            direct.setdefault(parent, []).append((child, qty))
+        counts['production_consumption'] = _insert(conn, 'production_consumption', [
+            'production_order_id', 'raw_material_id', 'quantity_consumed'], [
+            (index + 1, child, qty * float(order_quantities[index]))
+            for index in np.flatnonzero(order_status == 'in_progress').tolist()
+            for child, qty in direct[int(order_products[index])]
+        ])
+
+        counts['inventory_movements'] = _seed_ledger(conn, today, price_paid, stock, n_raw, receipt_products,
+                                                     receipt_quantities, receipt_days, items, sales)
+        # Sales rollups as post_sale would have kept them, costed from the ledger just written
+        counts['sales_daily_totals'] = LOCAL_PROCEDURES['rebuild_sales_rollups'](conn)
+
+    conn.execute("analyze")
+    return counts
+
+
+def _seed_ledger(conn, today, price_paid, stock, n_raw, receipt_products, receipt_quantities, receipt_days,
+                 items, sales):
+    """Replace the trigger's opening rows with a year of receipt and sale movements.
+
+    Each product opens HISTORY_DAYS ago with whatever balance makes its
+    movements end at its seeded stock; costs stay at price_paid so balances
+    are a running sum per product.
+    """
+    conn.execute("delete from inventory_balances")
+    conn.execute("delete from inventory_movements")
+    n_products = len(stock)
+    final = stock + np.where(np.arange(n_products) >= n_raw, 100_000, 0)
+    sale_times = {sale_id: sold_at for sale_id, (_, _, _, _, sold_at) in enumerate(sales, start=1)}
+
+    product = np.concatenate([receipt_products.astype(np.int64),
+                              np.array([item[1] for item in items], dtype=np.int64)])
+    quantity = np.concatenate([receipt_quantities.astype(float), -np.array([item[3] for item in items], dtype=float)])
+    moved_at = np.array(
+        [(today - timedelta(days=int(day))).isoformat() + "T07:00:00" for day in receipt_days] +
+        [sale_times[item[0]] for item in items])
+    kind = np.array(['receipt'] * len(receipt_products) + ['sale'] * len(items))
+    # Receipts and sales were inserted in this order, so their ids are positions + 1
+    source_type = np.array(['inventory_receipt'] * len(receipt_products) + ['sale'] * len(items))
+    source_id = np.concatenate([np.arange(1, len(receipt_products) + 1),
+                                np.array([item[0] for item in items], dtype=np.int64)])
+
+    opening = final - np.bincount(product - 1, weights=quantity, minlength=n_products)
+    opened_at = (today - timedelta(days=HISTORY_DAYS)).isoformat() + "T00:00:00"
+    product = np.concatenate([np.arange(1, n_products + 1), product])
+    quantity = np.concatenate([opening, quantity])
+    moved_at = np.concatenate([np.full(n_products, opened_at), moved_at])
+    kind = np.concatenate([np.full(n_products, 'opening'), kind])
+    source_type = np.concatenate([np.full(n_products, ''), source_type])
+    source_id = np.concatenate([np.zeros(n_products, dtype=np.int64), source_id])
+
+    order = np.lexsort((moved_at, product))
+    product, quantity, moved_at, kind = product[order], quantity[order], moved_at[order], kind[order]
+    source_type, source_id = source_type[order], source_id[order]
+    balance = np.cumsum(quantity)
+    starts = np.r_[0, np.flatnonzero(np.diff(product)) + 1]
+    balance -= np.repeat(balance[starts] - quantity[starts], np.diff(np.r_[starts, len(product)]))
+    cost = price_paid[product - 1]
+
+    count = _insert(conn, 'inventory_movements', [
+        'product_id', 'movement_type', 'quantity', 'unit_cost', 'value', 'balance_quantity', 'balance_value',
+        'average_cost', 'source_type', 'source_id', 'moved_at'], [
+        (int(pid), str(k), float(q), float(c), float(q * c), float(b), float(b * c), float(c),
+         str(st) or None, int(sid) or None, str(at))
+        for pid, k, q, c, b, st, sid, at in zip(product, kind, quantity, cost, balance, source_type, source_id,
+                                                moved_at)
+    ])
+    conn.execute(
+        "insert into inventory_balances (product_id, quantity, value, average_cost, last_movement_id, updated_at) "
+        "select product_id, balance_quantity, balance_value, average_cost, id, moved_at from inventory_movements "
+        "where id in (select max(id) from inventory_movements group by product_id)")
+    # Daily checkpoints for the seeded history, as take_inventory_snapshots() would have built them
+    conn.execute("delete from inventory_snapshots")
+    LOCAL_PROCEDURES['take_inventory_snapshots'](conn, (today - timedelta(days=1)).isoformat())
+    return count
+
+
+def _insert(conn, table, columns, rows):
+    placeholders = ', '.join('?' for _ in columns)
+    conn.executemany(f'insert into "{table}" ({", ".join(columns)}) values ({placeholders})', rows)
+    return len(rows)
@@ -0,0 +1,82 @@
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+DEFAULT_TIMEOUT = float(os.getenv("QUERY_BATCH_TIMEOUT", "15"))
+MAX_WORKERS = int(os.getenv("QUERY_BATCH_WORKERS", "16"))
+
+# Shared by every session; sized to stay within the connection pool
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="query-batch")
+
+_RAISE = object()
+
+
+class QueryBatch:
+    """Run a set of independent reads concurrently and gather their results.
+
+    Queries must not call Streamlit APIs: they run on worker threads without a
+    script context. Each query has its own timeout; a failed or timed-out query
+    does not affect the others, and result() re-raises its error at the point
+    the page uses it so existing per-section error handling still applies.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._queries = {}
+        self._results = {}
+        self._errors = {}
+        self.elapsed = None
+
+    def add(self, name, fn, *args, timeout=None, **kwargs):
+        """Register a query; fn(*args, **kwargs) runs when the batch runs"""
+        self._queries[name] = (fn, args, kwargs, timeout or self.timeout)
+        return self
+
+    def run(self):
+        """Submit every query at once and wait for each up to its own timeout"""
+        start = time.monotonic()
+        futures = {
+            name: (submit(fn, *args, **kwargs), timeout)
+            for name, (fn, args, kwargs, timeout) in self._queries.items()
+        }
+        for name, (future, timeout) in futures.items():
+            remaining = max(0.0, start + timeout - time.monotonic())
+            try:
+                self._results[name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                future.cancel()
+                self._errors[name] = TimeoutError(f"Query '{name}' timed out after {timeout}s")
+            except Exception as e:
+                self._errors[name] = e
+        self.elapsed = time.monotonic() - start
+        return self
+
+    def result(self, name, default=_RAISE):
+        """Return a query's result, re-raising its error unless a default is given"""
+        if name in self._errors:
+            if default is _RAISE:
+                raise self._errors[name]
+            return default
+        return self._results[name]
+
+    @property
+    def errors(self):
+        return dict(self._errors)
+
+
+def run_queries(queries, timeout=DEFAULT_TIMEOUT):
+    """Run a name -> callable mapping concurrently and return the finished batch"""
+    batch = QueryBatch(timeout=timeout)
+    for name, fn in queries.items():
+        batch.add(name, fn)
+    return batch.run()
+
+
+def submit(fn, *args, **kwargs):
+    """Run fn in the background on the shared query pool (e.g. prefetching).
+
+    fn runs in a copy of the caller's context, so per-rerun query
+    instrumentation follows the work onto the worker thread.
+    """
+    return _executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+
+
+class QueryCache:
+    """Process-wide TTL + LRU cache for reference-data reads.
+
+    Entries are keyed by table and query shape and remember which tables they
+    were read from; invalidate() drops every entry depending on a written
+    table. A per-table generation counter stops a read that started before a
+    write from storing its (now stale) result afterwards.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, default_ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get_or_load(self, key, loader, tables, ttl=None):
+        """Return the cached value for key, calling loader() on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[2]
+            self._stats['misses'] += 1
+            generations = {table: self._generations.get(table, 0) for table in tables}
+
+        value = loader()
+
+        with self._lock:
+            if all(self._generations.get(table, 0) == gen for table, gen in generations.items()):
+                expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+                self._entries[key] = (expires_at, tuple(tables), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+        return value
+
+    def invalidate(self, *tables):
+        """Drop every entry that depends on any of the given tables"""
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            stale = [key for key, (_, entry_tables, _) in self._entries.items()
+                     if any(table in entry_tables for table in tables)]
+            for key in stale:
+                del self._entries[key]
+            self._stats['invalidations'] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+            return stats
+
+
+query_cache = QueryCache()
+
+
+def cached_select(supabase, table, columns='*', filters=(), order=None, limit=None,
+                  depends_on=(), ttl=None):
+    """Cached supabase.table(table).select(columns) returning the row list.
+
+    filters are (method, column, value) tuples such as ('eq', 'product_type', 'raw');
+    order is (column, desc). depends_on lists extra tables read through embedded
+    selects. The returned rows are shared between sessions - treat them as read-only.
+    """
+    filters = tuple((method, column, tuple(value) if isinstance(value, list) else value)
+                    for method, column, value in filters)
+    key = (table, columns, filters, order, limit)
+
+    def load():
+        query = supabase.table(table).select(columns)
+        for method, column, value in filters:
+            query = getattr(query, method)(column, value)
+        if order is not None:
+            query = query.order(order[0], desc=order[1])
+        if limit is not None:
+            query = query.limit(limit)
+        return query.execute().data or []
+
+    return query_cache.get_or_load(key, load, (table,) + tuple(depends_on), ttl)
+
+
+def invalidate(*tables):
+    """Invalidate cached reads after the app writes to these tables"""
+    query_cache.invalidate(*tables)
+
+
+def cache_stats():
+    """Hit/miss/eviction counters for the shared query cache"""
+    return query_cache.stats()
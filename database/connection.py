@@ -1,29 +1,217 @@
 import streamlit as st
 import os
-from supabase import create_client
+import threading
+import time
+from database.instrumentation import instrument
+
+# Pool sizing for the shared HTTP client (one keep-alive pool for all sessions)
+POOL_MAX_CONNECTIONS = int(os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", "20"))
+POOL_MAX_KEEPALIVE = int(os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", "10"))
+POOL_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_POOL_KEEPALIVE_EXPIRY", "30"))
+HEALTH_CHECK_INTERVAL = float(os.getenv("SUPABASE_HEALTH_CHECK_INTERVAL", "60"))
+# "supabase" (hosted) or "local" (SQLite file at LOCAL_DB_PATH, see database/local_backend.py)
+DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "supabase")
+LOCAL_DB_PATH = os.getenv("LOCAL_DB_PATH", "local.db")
+
+
+class ConnectionManager:
+    """Process-wide Supabase client shared by every Streamlit session"""
+
+    def __init__(self, url, key, health_check_interval=HEALTH_CHECK_INTERVAL):
+        self.url = url
+        self.key = key
+        self.health_check_interval = health_check_interval
+        self._lock = threading.RLock()
+        self._client = None
+        self._last_health_check = 0.0
+        self._healthy = False
+        self._probing = False
+        self._stats = {
+            'clients_created': 0,
+            'reconnects': 0,
+            'checkouts': 0,
+            'health_checks': 0,
+            'failed_health_checks': 0,
+        }
+
+    def get_client(self):
+        """Return the shared client, reconnecting if it is missing or unhealthy.
+
+        A due health check runs outside the lock in the one thread that claims
+        it; other threads keep getting the current client meanwhile.
+        """
+        with self._lock:
+            if self._client is None:
+                self._connect()
+            self._stats['checkouts'] += 1
+            client = self._client
+            if self._probing or (self._healthy and not self._health_check_due()):
+                return client
+            self._probing = True
+        try:
+            healthy = self._check_health(client)
+        finally:
+            with self._lock:
+                self._probing = False
+        with self._lock:
+            # Another thread may have reconnected while this one probed
+            if client is self._client:
+                self._healthy = healthy
+                if not healthy:
+                    self._stats['reconnects'] += 1
+                    self._connect()
+            return self._client
+
+    def mark_unhealthy(self):
+        """Force a health check on the next checkout (call after a failed query)"""
+        with self._lock:
+            self._healthy = False
+
+    def query_failed(self, error):
+        """Called with every exception a query raises; transport failures mark the client unhealthy"""
+        if _is_connection_error(error):
+            self.mark_unhealthy()
+
+    def pool_stats(self):
+        """Return connection and pool statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'connected': self._client is not None,
+                'healthy': self._healthy,
+                'last_health_check': self._last_health_check,
+                'max_connections': POOL_MAX_CONNECTIONS,
+                'max_keepalive_connections': POOL_MAX_KEEPALIVE,
+                'open_connections': self._open_connections(),
+            })
+            return stats
+
+    def close(self):
+        """Close the shared client and its HTTP pool"""
+        with self._lock:
+            session = self._session()
+            if session is not None:
+                try:
+                    session.close()
+                except Exception:
+                    pass
+            self._client = None
+            self._healthy = False
+
+    def _connect(self):
+        self.close()
+        self._client = self._create_client()
+        self._stats['clients_created'] += 1
+        self._healthy = True
+        self._last_health_check = time.monotonic()
+
+    def _create_client(self):
+        # Imported here so the local backend and CLIs never load the Supabase SDK
+        from supabase import create_client
+        client = create_client(self.url, self.key)
+        _install_pooled_session(client)
+        return client
+
+    def _health_check_due(self):
+        return time.monotonic() - self._last_health_check >= self.health_check_interval
+
+    def _check_health(self, client):
+        # One round trip; callers must not hold self._lock
+        try:
+            client.table('suppliers').select('id').limit(1).execute()
+            healthy = True
+        except Exception:
+            healthy = False
+        with self._lock:
+            self._stats['health_checks'] += 1
+            self._stats['failed_health_checks'] += 0 if healthy else 1
+            self._last_health_check = time.monotonic()
+        return healthy
+
+    def _session(self):
+        if self._client is None:
+            return None
+        try:
+            return self._client.postgrest.session
+        except Exception:
+            return None
+
+    def _open_connections(self):
+        # httpx does not expose pool occupancy publicly; best effort only
+        try:
+            return len(self._session()._transport._pool.connections)
+        except Exception:
+            return None
+
+
+def _is_connection_error(error):
+    """True for network failures; errors the server answered with (APIError) are not"""
+    try:
+        import httpx
+        if isinstance(error, httpx.TransportError):
+            return True
+    except ImportError:
+        pass
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+def _install_pooled_session(client):
+    """Swap the PostgREST session for a keep-alive httpx client with pool limits"""
+    try:
+        import httpx
+        postgrest = client.postgrest
+        old_session = postgrest.session
+        postgrest.session = httpx.Client(
+            base_url=old_session.base_url,
+            headers=old_session.headers,
+            timeout=old_session.timeout,
+            limits=httpx.Limits(
+                max_connections=POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+            ),
+        )
+        old_session.close()
+    except Exception as e:
+        # Fall back to the client's default session rather than failing startup
+        print(f"Could not install pooled session: {e}")
+
+
+def create_connection_manager():
+    """Build the connection manager for the configured backend (also used by CLIs)"""
+    if DATABASE_BACKEND == "local":
+        from database.local_backend import LocalConnectionManager
+        return LocalConnectionManager(LOCAL_DB_PATH)
+
+    supabase_url = os.getenv("SUPABASE_URL")
+    supabase_key = os.getenv("SUPABASE_KEY")
+
+    if not supabase_url or not supabase_key:
+        raise Exception(f"Missing env vars: URL={bool(supabase_url)}, KEY={bool(supabase_key)}")
+
+    return ConnectionManager(supabase_url, supabase_key)
+
+
+@st.cache_resource
+def get_connection_manager():
+    """Create the process-wide connection manager once"""
+    return create_connection_manager()
+
 
 def get_supabase_client():
-    """Get Supabase client (no caching for debugging)"""
+    """Get the shared Supabase client (instrumented, see database/instrumentation.py)"""
     try:
-        st.write("🔍 Getting environment variables...")
-        
-        # Get credentials from environment variables
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
-        
-        st.write(f"URL: {'Found' if supabase_url else 'Missing'}")
-        st.write(f"Key: {'Found' if supabase_key else 'Missing'}")
-        
-        if not supabase_url or not supabase_key:
-            raise Exception(f"Missing env vars: URL={bool(supabase_url)}, KEY={bool(supabase_key)}")
-        
-        supabase = create_client(supabase_url, supabase_key)
-        st.write("✅ Supabase client created")
-        return supabase
-        
+        manager = get_connection_manager()
+        return instrument(manager.get_client(), on_error=manager.query_failed)
     except Exception as e:
         st.error(f"❌ Connection error: {e}")
         st.stop()
 
+
 def get_connection():
-    return get_supabase_client()
\ No newline at end of file
+    return get_supabase_client()
+
+
+def get_pool_stats():
+    """Return statistics for the shared connection pool"""
+    return get_connection_manager().pool_stats()
@@ -0,0 +1,295 @@
+"""Query instrumentation for the Supabase (or local) client.
+
+InstrumentedClient wraps a client and records every executed query: table or
+database function, action, filter shape (methods and columns, never values),
+duration, row count and (with QUERY_MEASURE_BYTES=1) response bytes. Records go to the current RerunLog,
+set per Streamlit rerun with begin_rerun() and tagged with the page function
+from page_scope()/track_page. Aggregate counters are kept process-wide for the
+OpenMetrics export.
+"""
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+INSTRUMENTATION_ENABLED = os.getenv("QUERY_INSTRUMENTATION", "1") == "1"
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH")
+# Response sizes re-serialize every result with json.dumps, so they are off
+# unless asked for; bytes are then recorded as 0
+MEASURE_BYTES = os.getenv("QUERY_MEASURE_BYTES", "0") == "1"
+# The same query shape repeated this often in one rerun is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", "5"))
+
+_current_rerun = contextvars.ContextVar('query_rerun', default=None)
+_current_page = contextvars.ContextVar('query_page', default=None)
+_rerun_ids = itertools.count(1)
+_rerun_ids_lock = threading.Lock()
+
+_FILTER_METHODS = {'eq', 'neq', 'gt', 'gte', 'lt', 'lte', 'like', 'ilike', 'is_', 'in_', 'or_',
+                   'match', 'filter', 'contains', 'range', 'order', 'limit', 'single'}
+_ACTIONS = {'select', 'insert', 'update', 'upsert', 'delete'}
+
+
+class RerunLog:
+    """Queries executed during one Streamlit rerun (or one benchmark run)"""
+
+    def __init__(self, label=None):
+        with _rerun_ids_lock:
+            self.id = next(_rerun_ids)
+        self.label = label
+        self.started = time.time()
+        self.records = []
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def summary(self):
+        """Totals per page and likely N+1 patterns"""
+        with self._lock:
+            records = list(self.records)
+        pages = defaultdict(lambda: {'queries': 0, 'duration_ms': 0.0, 'rows': 0, 'bytes': 0})
+        for record in records:
+            page = pages[record['page'] or '(app)']
+            page['queries'] += 1
+            page['duration_ms'] += record['duration_ms']
+            page['rows'] += record['rows']
+            page['bytes'] += record['bytes']
+        return {
+            'rerun': self.id,
+            'label': self.label,
+            'started': self.started,
+            'queries': len(records),
+            'duration_ms': sum(r['duration_ms'] for r in records),
+            'rows': sum(r['rows'] for r in records),
+            'bytes': sum(r['bytes'] for r in records),
+            'pages': dict(pages),
+            'n_plus_one': repeated_shapes(records),
+        }
+
+    def to_json(self):
+        with self._lock:
+            records = list(self.records)
+        return json.dumps({**self.summary(), 'records': records}, default=str)
+
+
+def repeated_shapes(records, threshold=N_PLUS_ONE_THRESHOLD):
+    """Query shapes (page, target, action, filters) executed at least threshold times"""
+    counts = Counter((r['page'], r['target'], r['action'], r['shape']) for r in records)
+    return [
+        {'page': page, 'target': target, 'action': action, 'shape': shape, 'count': count}
+        for (page, target, action, shape), count in counts.most_common() if count >= threshold
+    ]
+
+
+class _Metrics:
+    """Process-wide counters per (target, action) for the OpenMetrics export"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = defaultdict(lambda: {'count': 0, 'errors': 0, 'seconds': 0.0, 'rows': 0, 'bytes': 0})
+
+    def add(self, record):
+        with self._lock:
+            series = self._series[(record['target'], record['action'])]
+            series['count'] += 1
+            series['errors'] += 1 if record['error'] else 0
+            series['seconds'] += record['duration_ms'] / 1000
+            series['rows'] += record['rows']
+            series['bytes'] += record['bytes']
+
+    def snapshot(self):
+        with self._lock:
+            return {key: dict(value) for key, value in self._series.items()}
+
+
+metrics = _Metrics()
+
+
+def begin_rerun(label=None):
+    """Start a new RerunLog for the current context and return it"""
+    log = RerunLog(label)
+    _current_rerun.set(log)
+    return log
+
+
+def current_rerun():
+    return _current_rerun.get()
+
+
+class page_scope:
+    """Tag queries executed inside the block with a page name"""
+
+    def __init__(self, name):
+        self.name = name
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_page.set(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        _current_page.reset(self._token)
+        return False
+
+
+def track_page(fn):
+    """Decorator: attribute a page function's queries to it"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with page_scope(fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+class InstrumentedClient:
+    """Client wrapper that times and records every executed query.
+
+    on_error, if given, is called with every exception a query raises (the
+    connection manager uses it to schedule a health check).
+    """
+
+    def __init__(self, client, measure_bytes=MEASURE_BYTES, on_error=None):
+        self._client = client
+        self.measure_bytes = measure_bytes
+        self.on_error = on_error
+
+    def table(self, name):
+        return _InstrumentedQuery(self, self._client.table(name), name)
+
+    def rpc(self, name, params=None):
+        query = _InstrumentedQuery(self, self._client.rpc(name, params or {}), f"rpc:{name}")
+        query._action = 'rpc'
+        return query
+
+    @property
+    def wrapped(self):
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class _InstrumentedQuery:
+    def __init__(self, client, query, target):
+        self._client = client
+        self._query = query
+        self._target = target
+        self._action = 'select'
+        self._shape = []
+
+    def execute(self):
+        started = time.perf_counter()
+        error = None
+        response = None
+        try:
+            response = self._query.execute()
+            return response
+        except Exception as e:
+            error = str(e)
+            if self._client.on_error is not None:
+                self._client.on_error(e)
+            raise
+        finally:
+            _record(self, time.perf_counter() - started, response, error)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._query, name)
+        if not callable(attribute):
+            # Properties such as .not_ return a new builder; keep wrapping it
+            if hasattr(attribute, 'execute'):
+                self._shape.append(name)
+                self._query = attribute
+                return self
+            return attribute
+
+        def call(*args, **kwargs):
+            if name in _ACTIONS:
+                self._action = name
+            elif name in _FILTER_METHODS:
+                column = args[0] if args and name not in ('or_', 'limit', 'range', 'single', 'match') else ''
+                if name == 'match' and args:
+                    column = ','.join(sorted(args[0]))
+                self._shape.append(f"{name}({column})" if column else name)
+            result = attribute(*args, **kwargs)
+            # Builder methods return the builder; keep wrapping it
+            if hasattr(result, 'execute'):
+                self._query = result
+                return self
+            return result
+        return call
+
+
+def _record(query, seconds, response, error):
+    data = getattr(response, 'data', None)
+    rows = len(data) if isinstance(data, list) else (0 if data is None else 1)
+    size = 0
+    if query._client.measure_bytes and data is not None:
+        size = len(json.dumps(data, default=str))
+    record = {
+        'target': query._target,
+        'action': query._action,
+        'shape': ' '.join(query._shape),
+        'page': _current_page.get(),
+        'duration_ms': seconds * 1000,
+        'rows': rows,
+        'bytes': size,
+        'error': error,
+        'at': time.time(),
+        'thread': threading.current_thread().name,
+    }
+    metrics.add(record)
+    log = _current_rerun.get()
+    if log is not None:
+        record['rerun'] = log.id
+        log.add(record)
+    if QUERY_LOG_PATH:
+        _append_log(record)
+
+
+_log_lock = threading.Lock()
+
+
+def _append_log(record):
+    try:
+        with _log_lock, open(QUERY_LOG_PATH, 'a') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+    except OSError as e:
+        print(f"Could not write query log: {e}")
+
+
+def instrument(client, on_error=None):
+    """Wrap client unless instrumentation is disabled or it is already wrapped"""
+    if not INSTRUMENTATION_ENABLED or isinstance(client, InstrumentedClient):
+        return client
+    return InstrumentedClient(client, on_error=on_error)
+
+
+def openmetrics():
+    """Process-wide query counters in OpenMetrics text format"""
+    families = [
+        ('erp_queries', 'count', 'Executed queries by target table or function and action.'),
+        ('erp_query_errors', 'errors', 'Queries that raised.'),
+        ('erp_query_duration_seconds', 'seconds', 'Time spent executing queries.'),
+        ('erp_query_rows', 'rows', 'Rows returned.'),
+    ]
+    if MEASURE_BYTES:
+        families.append(('erp_query_response_bytes', 'bytes', 'JSON size of query responses.'))
+    snapshot = sorted(metrics.snapshot().items())
+    lines = []
+    for family, field, help_text in families:
+        lines.append(f'# TYPE {family} counter')
+        lines.append(f'# HELP {family} {help_text}')
+        for (target, action), series in snapshot:
+            lines.append(f'{family}_total{{target="{_escape(target)}",action="{action}"}} {series[field]}')
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
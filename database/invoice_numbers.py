@@ -0,0 +1,56 @@
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from database.procedures import call_procedure
+
+INVOICE_BLOCK_SIZE = int(os.getenv("INVOICE_BLOCK_SIZE", "100"))
+
+
+class InvoiceNumberAllocator:
+    """Hand out invoice numbers from blocks reserved on a database sequence.
+
+    One reserve_invoice_numbers() call fetches a whole block, so issuing a
+    number is usually a local pop. Numbers are unique across processes because
+    every block comes from the same sequence; unused numbers are lost when the
+    process exits, which leaves gaps but never duplicates.
+    """
+
+    def __init__(self, block_size=INVOICE_BLOCK_SIZE):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._numbers = deque()
+
+    def next_number(self, client):
+        """Return the next reserved sequence value, reserving a block if needed"""
+        with self._lock:
+            if not self._numbers:
+                self._numbers.extend(self._reserve(client))
+            return self._numbers.popleft()
+
+    def take(self, client, count):
+        """Return count sequence values at once (bulk posting)"""
+        with self._lock:
+            while len(self._numbers) < count:
+                self._numbers.extend(self._reserve(client, max(self.block_size, count - len(self._numbers))))
+            return [self._numbers.popleft() for _ in range(count)]
+
+    def _reserve(self, client, count=None):
+        numbers = call_procedure(client, 'reserve_invoice_numbers', {'p_count': count or self.block_size})
+        if not numbers:
+            raise Exception("Could not reserve invoice numbers")
+        return [int(number) for number in numbers]
+
+
+# Shared by every session in the process
+invoice_numbers = InvoiceNumberAllocator()
+
+
+def format_invoice_number(number, issued_at=None):
+    issued_at = issued_at or datetime.now()
+    return f"INV-{issued_at.strftime('%Y%m%d')}-{number:06d}"
+
+
+def generate_invoice_number(client):
+    """Generate a unique invoice number"""
+    return format_invoice_number(invoice_numbers.next_number(client))
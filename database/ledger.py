@@ -0,0 +1,149 @@
+"""Inventory movement ledger (database/sql/09_inventory_ledger.sql).
+
+Every stock change is an inventory_movements row that carries the product's
+running balance, value and moving-average cost after it, and
+inventory_balances holds the latest of those per product. Reads here go to a
+balance or to a single movement instead of rescanning receipts and sales.
+
+Dates are business days in LEDGER_TIMEZONE (UTC unless set), which should
+match the database's TimeZone setting that the daily checkpoints use. The
+local SQLite backend stamps movements in UTC.
+"""
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from database.cache import query_cache
+from database.procedures import call_procedure
+
+MOVEMENT_TYPES = ('opening', 'receipt', 'sale', 'consumption', 'output', 'adjustment')
+MOVEMENT_COLUMNS = 'id, product_id, movement_type, quantity, unit_cost, value, balance_quantity, ' \
+                   'balance_value, average_cost, source_type, source_id, moved_at'
+BALANCE_COLUMNS = 'product_id, quantity, value, average_cost, last_movement_id'
+PRODUCT_ID_CHUNK = 200
+LEDGER_TIMEZONE = ZoneInfo(os.environ["LEDGER_TIMEZONE"]) if os.getenv("LEDGER_TIMEZONE") else timezone.utc
+
+
+def record_movement(client, product_id, movement_type, quantity, unit_cost=None, source_type=None, source_id=None):
+    """Move stock through the ledger (quantity is signed: positive in, negative out)"""
+    if movement_type not in MOVEMENT_TYPES:
+        raise ValueError(f"Unknown movement type: {movement_type}")
+    return call_procedure(client, 'record_movement', {
+        'p_product_id': int(product_id),
+        'p_movement_type': movement_type,
+        'p_quantity': float(quantity),
+        'p_unit_cost': float(unit_cost) if unit_cost is not None else None,
+        'p_source_type': source_type,
+        'p_source_id': int(source_id) if source_id is not None else None,
+    })
+
+
+def get_balances(supabase, product_ids):
+    """product_id -> {'quantity', 'value', 'average_cost', 'last_movement_id'} (cached until the ledger changes)"""
+    product_ids = sorted({int(pid) for pid in product_ids})
+
+    def load():
+        balances = {}
+        for offset in range(0, len(product_ids), PRODUCT_ID_CHUNK):
+            chunk = product_ids[offset:offset + PRODUCT_ID_CHUNK]
+            rows = supabase.table('inventory_balances').select(BALANCE_COLUMNS).in_('product_id', chunk).execute().data
+            balances.update({row['product_id']: row for row in rows or []})
+        return balances
+
+    return query_cache.get_or_load(('inventory_balances', tuple(product_ids)), load, ('inventory_balances',))
+
+
+def get_stock_at(supabase, product_id, at):
+    """Quantity, value and average cost of a product as of a datetime (or the end of a date).
+
+    One indexed lookup of the last movement at or before that time.
+    """
+    at = _end_of_day(at)
+    rows = supabase.table('inventory_movements').select(
+        'id, balance_quantity, balance_value, average_cost, moved_at'
+    ).eq('product_id', int(product_id)).lte('moved_at', at.isoformat()).order(
+        'moved_at', desc=True).order('id', desc=True).limit(1).execute().data
+    if not rows:
+        return {'quantity': 0.0, 'value': 0.0, 'average_cost': 0.0, 'movement_id': None, 'moved_at': None}
+    row = rows[0]
+    return {'quantity': float(row['balance_quantity']), 'value': float(row['balance_value']),
+            'average_cost': float(row['average_cost']), 'movement_id': row['id'], 'moved_at': row['moved_at']}
+
+
+def take_snapshots(client, through=None):
+    """Add daily checkpoints for every missing day up to through (default yesterday); returns days added.
+
+    Runs nightly through pg_cron where it is installed (10_inventory_snapshots.sql);
+    otherwise from the Stock Ledger's checkpoint button. As-of queries are
+    correct without recent checkpoints, only slower.
+    """
+    through = through or ledger_today() - timedelta(days=1)
+    return int(call_procedure(client, 'take_inventory_snapshots', {'p_through': through.isoformat()}) or 0)
+
+
+def ledger_today():
+    """Today's date in LEDGER_TIMEZONE"""
+    return datetime.now(LEDGER_TIMEZONE).date()
+
+
+def get_stock_as_of(supabase, at, product_ids=None):
+    """Ledger stock of the whole catalog (or product_ids) as of a datetime or the end of a date.
+
+    Reads the last daily checkpoint before that time and replays only the
+    movements after it. Returns {'checkpoint', 'movements' (replayed count),
+    'stock': {product_id: {'quantity', 'value', 'average_cost'}}}; products at
+    zero are omitted.
+    """
+    at = _end_of_day(at)
+    ids = sorted({int(pid) for pid in product_ids}) if product_ids is not None else None
+
+    def load():
+        params = {'p_at': at.isoformat()}
+        if ids is not None:
+            params['p_product_ids'] = ids
+        data = call_procedure(supabase, 'stock_as_of', params) or {}
+        return {
+            'checkpoint': data.get('checkpoint'),
+            'movements': int(data.get('movements') or 0),
+            'stock': {row['product_id']: {'quantity': float(row['quantity']), 'value': float(row['value']),
+                                          'average_cost': float(row['average_cost'])}
+                      for row in data.get('stock') or []},
+        }
+
+    key = ('stock_as_of', at.isoformat(), tuple(ids) if ids is not None else None)
+    return query_cache.get_or_load(key, load, ('inventory_movements', 'inventory_snapshots'))
+
+
+def get_product_movements(supabase, product_id, limit=50):
+    """Most recent movements of one product, newest first"""
+    return supabase.table('inventory_movements').select(MOVEMENT_COLUMNS).eq(
+        'product_id', int(product_id)).order('moved_at', desc=True).order('id', desc=True).limit(limit).execute().data or []
+
+
+def get_cost_of_goods_sold(supabase, start, end):
+    """COGS for sales posted from start to end (dates, inclusive) at the moving average at sale time.
+
+    Returns {'cogs', 'units', 'by_product': [{'product_id', 'units', 'cogs'}, ...]}.
+    """
+    def load():
+        data = call_procedure(supabase, 'cost_of_goods_sold', {
+            'p_start': start.isoformat(),
+            'p_end': (end + timedelta(days=1)).isoformat(),
+        }) or {}
+        return {
+            'cogs': float(data.get('cogs') or 0),
+            'units': float(data.get('units') or 0),
+            'by_product': data.get('by_product') or [],
+        }
+
+    return query_cache.get_or_load(('cogs', start.isoformat(), end.isoformat()), load, ('inventory_movements',))
+
+
+def _end_of_day(at):
+    """A date as the end of that day in LEDGER_TIMEZONE, naive datetimes as LEDGER_TIMEZONE; returned in UTC"""
+    if not isinstance(at, (date, datetime)):
+        at = datetime.fromisoformat(str(at))
+    if not isinstance(at, datetime):
+        at = datetime.combine(at, time.max)
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=LEDGER_TIMEZONE)
+    return at.astimezone(timezone.utc)
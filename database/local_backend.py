@@ -0,0 +1,1309 @@
+"""Local SQLite backend for offline runs, load tests and benchmarks.
+
+Pages and helpers only use the Supabase client through a small repository
+interface: ``client.table(name)`` returning a PostgREST-style query builder
+(select with embeds, filters, order, limit, insert/update/upsert/delete,
+execute) and ``client.rpc(name, params)`` for the database functions in
+database/sql. LocalClient implements that same interface on a SQLite file,
+so the app runs unchanged with DATABASE_BACKEND=local.
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from database.pagination import split_columns
+
+NOW = "(strftime('%Y-%m-%dT%H:%M:%f', 'now'))"
+
+# SQLite mirror of database/sql (tables and the ones created by the functions' scripts)
+SCHEMA = f"""
+create table if not exists suppliers (
+    id integer primary key autoincrement,
+    name text not null,
+    contact text,
+    phone text,
+    email text,
+    raw_materials text,
+    category_codes text
+);
+
+create table if not exists products (
+    id integer primary key autoincrement,
+    name text not null,
+    sku text unique,
+    product_type text check (product_type in ('raw', 'finished')) default 'raw',
+    category text,
+    category_code text,
+    quantity_in_stock real not null default 0,
+    price_paid real default 0,
+    price_selling real default 0,
+    supplier_id integer references suppliers (id),
+    notes text
+);
+
+create table if not exists bill_of_materials (
+    id integer primary key autoincrement,
+    finished_product_id integer not null references products (id),
+    raw_material_id integer not null references products (id),
+    quantity_required real not null,
+    product_volume real default 0,
+    product_name text
+);
+
+create table if not exists sales (
+    id integer primary key autoincrement,
+    invoice_number text,
+    customer_name text,
+    customer_email text,
+    customer_phone text,
+    payment_method text,
+    total_amount real not null default 0,
+    sale_date text not null default {NOW},
+    notes text
+);
+
+create table if not exists sale_items (
+    id integer primary key autoincrement,
+    sale_id integer not null references sales (id),
+    product_id integer not null references products (id),
+    product_name text,
+    quantity real not null,
+    unit_price real not null default 0,
+    total_price real not null default 0
+);
+
+create table if not exists production_orders (
+    id integer primary key autoincrement,
+    product_id integer not null references products (id),
+    product_name text,
+    quantity_planned real not null,
+    quantity_produced real,
+    start_date text default {NOW},
+    end_date text,
+    status text default 'planned',
+    notes text
+);
+
+create table if not exists inventory_receipts (
+    id integer primary key autoincrement,
+    product_id integer not null references products (id),
+    product_name text,
+    supplier_id integer references suppliers (id),
+    quantity_received real not null,
+    unit_cost real default 0,
+    total_cost real default 0,
+    receipt_date text not null default (date('now')),
+    reference_number text,
+    notes text,
+    status text not null default 'received'
+);
+
+create table if not exists batches (
+    id integer primary key autoincrement,
+    product_id integer not null references products (id),
+    batch_number text,
+    quantity real not null default 0,
+    receipt_id integer references inventory_receipts (id),
+    expiry_date text,
+    location text,
+    notes text
+);
+
+create table if not exists production_consumption (
+    id integer primary key autoincrement,
+    production_order_id integer not null references production_orders (id),
+    raw_material_id integer not null references products (id),
+    quantity_consumed real not null,
+    consumed_at text not null default {NOW}
+);
+
+create table if not exists batch_allocations (
+    id integer primary key autoincrement,
+    batch_id integer not null references batches (id),
+    product_id integer not null references products (id),
+    quantity real not null,
+    source_type text not null,
+    source_id integer,
+    allocated_at text not null default {NOW}
+);
+
+create table if not exists invoice_number_seq (
+    id integer primary key autoincrement
+);
+
+create index if not exists sales_sale_date_idx on sales (sale_date);
+create unique index if not exists sales_invoice_number_key on sales (invoice_number);
+create index if not exists products_type_stock_idx on products (product_type, quantity_in_stock);
+create index if not exists products_category_idx on products (category);
+create index if not exists batches_expiry_date_idx on batches (expiry_date);
+create index if not exists batches_product_expiry_idx on batches (product_id, expiry_date);
+create index if not exists sale_items_sale_idx on sale_items (sale_id);
+create index if not exists bom_finished_idx on bill_of_materials (finished_product_id);
+create index if not exists production_consumption_order_idx on production_consumption (production_order_id);
+create index if not exists batch_allocations_source_idx on batch_allocations (source_type, source_id);
+create index if not exists inventory_receipts_open_idx on inventory_receipts (product_id) where status = 'open';
+create index if not exists production_orders_status_idx on production_orders (status);
+
+create table if not exists inventory_movements (
+    id integer primary key autoincrement,
+    product_id integer not null references products (id),
+    movement_type text not null
+        check (movement_type in ('opening', 'receipt', 'sale', 'consumption', 'output', 'adjustment')),
+    quantity real not null,
+    unit_cost real not null default 0,
+    value real not null default 0,
+    balance_quantity real not null,
+    balance_value real not null,
+    average_cost real not null,
+    source_type text,
+    source_id integer,
+    moved_at text not null default {NOW}
+);
+
+create index if not exists inventory_movements_product_idx on inventory_movements (product_id, moved_at, id);
+create index if not exists inventory_movements_type_date_idx on inventory_movements (movement_type, moved_at);
+create index if not exists inventory_movements_source_idx on inventory_movements (source_type, source_id);
+create index if not exists inventory_movements_moved_at_idx on inventory_movements (moved_at);
+
+create table if not exists inventory_snapshots (
+    snapshot_date text not null,
+    product_id integer not null references products (id),
+    quantity real not null,
+    value real not null,
+    average_cost real not null,
+    last_movement_id integer,
+    primary key (snapshot_date, product_id)
+);
+
+create index if not exists inventory_snapshots_product_idx on inventory_snapshots (product_id, snapshot_date);
+
+create table if not exists sales_daily (
+    sale_day text not null,
+    product_id integer not null references products (id),
+    revenue real not null default 0,
+    units real not null default 0,
+    cost real not null default 0,
+    sales_count integer not null default 0,
+    primary key (sale_day, product_id)
+);
+
+create index if not exists sales_daily_product_idx on sales_daily (product_id, sale_day);
+
+create table if not exists sales_monthly (
+    sale_month text not null,
+    product_id integer not null references products (id),
+    revenue real not null default 0,
+    units real not null default 0,
+    cost real not null default 0,
+    sales_count integer not null default 0,
+    primary key (sale_month, product_id)
+);
+
+create table if not exists sales_daily_totals (
+    sale_day text primary key,
+    sales_count integer not null default 0,
+    sales_amount real not null default 0,
+    revenue real not null default 0,
+    units real not null default 0,
+    cost real not null default 0
+);
+
+create table if not exists inventory_balances (
+    product_id integer primary key references products (id),
+    quantity real not null default 0,
+    value real not null default 0,
+    average_cost real not null default 0,
+    last_movement_id integer,
+    updated_at text not null default {NOW}
+);
+"""
+
+# products_stock_ledger from 09_inventory_ledger.sql: stock edits made outside
+# the posting functions become opening/adjustment movements at the current
+# average cost (or price_paid for a product without one)
+_STOCK_LEDGER_TRIGGER = f"""
+create trigger if not exists products_stock_ledger_{{event}} after {{event_clause}} on products
+when coalesce(new.quantity_in_stock, 0) <>
+     coalesce((select quantity from inventory_balances where product_id = new.id), 0)
+begin
+    -- Not "insert or ignore": an upsert's conflict clause would override it inside the trigger
+    insert into inventory_balances (product_id)
+    select new.id where not exists (select 1 from inventory_balances where product_id = new.id);
+    insert into inventory_movements (product_id, movement_type, quantity, unit_cost, value,
+                                     balance_quantity, balance_value, average_cost, source_type, source_id)
+    select new.id, case when b.last_movement_id is null then 'opening' else 'adjustment' end,
+           coalesce(new.quantity_in_stock, 0) - b.quantity, c.cost,
+           (coalesce(new.quantity_in_stock, 0) - b.quantity) * c.cost,
+           coalesce(new.quantity_in_stock, 0), coalesce(new.quantity_in_stock, 0) * c.cost, c.cost,
+           'products', new.id
+    from inventory_balances b,
+         (select case when average_cost > 0 then average_cost else coalesce(new.price_paid, 0) end as cost
+          from inventory_balances where product_id = new.id) c
+    where b.product_id = new.id;
+    update inventory_balances
+    set quantity = coalesce(new.quantity_in_stock, 0),
+        value = coalesce(new.quantity_in_stock, 0) * (select average_cost from inventory_movements
+                                                      where id = last_insert_rowid()),
+        average_cost = (select average_cost from inventory_movements where id = last_insert_rowid()),
+        last_movement_id = last_insert_rowid(),
+        updated_at = {NOW}
+    where product_id = new.id;
+end;
+"""
+SCHEMA += _STOCK_LEDGER_TRIGGER.format(event='insert', event_clause='insert') + \
+    _STOCK_LEDGER_TRIGGER.format(event='update', event_clause='update of quantity_in_stock')
+
+# (table, column) -> referenced table, used to resolve embedded selects
+FOREIGN_KEYS = {
+    'products': {'supplier_id': 'suppliers'},
+    'bill_of_materials': {'finished_product_id': 'products', 'raw_material_id': 'products'},
+    'sale_items': {'sale_id': 'sales', 'product_id': 'products'},
+    'production_orders': {'product_id': 'products'},
+    'inventory_receipts': {'product_id': 'products', 'supplier_id': 'suppliers'},
+    'batches': {'product_id': 'products', 'receipt_id': 'inventory_receipts'},
+    'production_consumption': {'production_order_id': 'production_orders', 'raw_material_id': 'products'},
+    'batch_allocations': {'batch_id': 'batches', 'product_id': 'products'},
+}
+
+COMPARISONS = {'eq': '=', 'neq': '!=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<=',
+               'like': 'like', 'ilike': 'like'}
+
+
+class LocalBackendError(Exception):
+    """Raised for invalid queries or failed database functions"""
+
+
+class LocalResponse:
+    """Same shape as the PostgREST APIResponse the pages read"""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class LocalClient:
+    """Supabase-compatible client over one SQLite database file"""
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("pragma foreign_keys = on")
+        if path != ":memory:":
+            self.conn.execute("pragma journal_mode = wal")
+        self.conn.executescript(SCHEMA)
+        self._columns = {}
+
+    def table(self, name):
+        return LocalQuery(self, name)
+
+    def from_(self, name):
+        return self.table(name)
+
+    def rpc(self, name, params=None):
+        if name not in LOCAL_PROCEDURES:
+            raise LocalBackendError(f"Unknown database function: {name}")
+        return _LocalCall(self, name, params or {})
+
+    def columns(self, table):
+        """Column names of a table (also validates the table name)"""
+        if table not in self._columns:
+            with self.lock:
+                rows = self.conn.execute(f'pragma table_info("{table}")').fetchall()
+            if not rows:
+                raise LocalBackendError(f"Unknown table: {table}")
+            self._columns[table] = [row['name'] for row in rows]
+        return self._columns[table]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class _LocalCall:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        client = self.client
+        with client.lock:
+            try:
+                client.conn.execute("begin immediate")
+                result = LOCAL_PROCEDURES[self.name](client.conn, **self.params)
+                client.conn.execute("commit")
+            except sqlite3.Error as e:
+                # Constraint violations surface like the table API's (PostgREST raises APIError for both)
+                client.conn.execute("rollback")
+                raise LocalBackendError(str(e))
+            except Exception:
+                client.conn.execute("rollback")
+                raise
+        return LocalResponse(result)
+
+
+class LocalQuery:
+    """The subset of the PostgREST query builder used by the app"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table_name = table
+        client.columns(table)
+        self._action = 'select'
+        self._columns = '*'
+        self._count = None
+        self._head = False
+        self._payload = None
+        self._on_conflict = None
+        self._where = []
+        self._params = []
+        self._order = []
+        self._limit = None
+        self._offset = None
+        self._single = False
+
+    # -- actions -------------------------------------------------------------
+
+    def select(self, columns='*', count=None, head=False):
+        self._columns = columns or '*'
+        self._count = count
+        self._head = head
+        return self
+
+    def insert(self, rows, **kwargs):
+        self._action, self._payload = 'insert', rows
+        return self
+
+    def upsert(self, rows, on_conflict='id', **kwargs):
+        self._action, self._payload, self._on_conflict = 'upsert', rows, on_conflict or 'id'
+        return self
+
+    def update(self, values, **kwargs):
+        self._action, self._payload = 'update', values
+        return self
+
+    def delete(self, **kwargs):
+        self._action = 'delete'
+        return self
+
+    # -- filters ---------------------------------------------------------------
+
+    def eq(self, column, value):
+        return self._compare('eq', column, value)
+
+    def neq(self, column, value):
+        return self._compare('neq', column, value)
+
+    def gt(self, column, value):
+        return self._compare('gt', column, value)
+
+    def gte(self, column, value):
+        return self._compare('gte', column, value)
+
+    def lt(self, column, value):
+        return self._compare('lt', column, value)
+
+    def lte(self, column, value):
+        return self._compare('lte', column, value)
+
+    def like(self, column, pattern):
+        return self._compare('like', column, pattern)
+
+    def ilike(self, column, pattern):
+        return self._compare('ilike', column, pattern)
+
+    def is_(self, column, value):
+        sql, params = self._condition(column, 'is', value)
+        return self._add_where(sql, params)
+
+    def in_(self, column, values):
+        sql, params = self._condition(column, 'in', list(values))
+        return self._add_where(sql, params)
+
+    def match(self, query):
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    def filter(self, column, operator, value):
+        sql, params = self._condition(column, operator, value)
+        return self._add_where(sql, params)
+
+    def or_(self, filters, reference_table=None):
+        sql, params = self._logic_tree('or', filters)
+        return self._add_where(sql, params)
+
+    # -- modifiers -------------------------------------------------------------
+
+    def order(self, column, desc=False, nullsfirst=None, **kwargs):
+        direction = 'desc' if desc else 'asc'
+        nulls = '' if nullsfirst is None else (' nulls first' if nullsfirst else ' nulls last')
+        self._order.append(f'{self._column(column)} {direction}{nulls}')
+        return self
+
+    def limit(self, size, **kwargs):
+        self._limit = int(size)
+        return self
+
+    def range(self, start, end, **kwargs):
+        self._offset, self._limit = int(start), int(end) - int(start) + 1
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    def maybe_single(self):
+        self._single = 'maybe'
+        return self
+
+    # -- execution -------------------------------------------------------------
+
+    def execute(self):
+        with self.client.lock:
+            if self._action == 'select':
+                return self._execute_select()
+            try:
+                with self.client.conn:
+                    data = getattr(self, f'_execute_{self._action}')()
+            except sqlite3.Error as e:
+                raise LocalBackendError(str(e))
+            return LocalResponse(data)
+
+    def _execute_select(self):
+        where = self._where_sql()
+        count = None
+        if self._count:
+            count = self.client.conn.execute(
+                f'select count(*) from "{self.table_name}"{where}', self._params).fetchone()[0]
+        if self._head:
+            return LocalResponse([], count)
+
+        sql = f'select * from "{self.table_name}"{where}'
+        if self._order:
+            sql += ' order by ' + ', '.join(self._order)
+        if self._limit is not None or self._offset is not None:
+            sql += f' limit {self._limit if self._limit is not None else -1} offset {self._offset or 0}'
+        rows = [dict(row) for row in self.client.conn.execute(sql, self._params)]
+        data = _project(self.client, self.table_name, rows, self._columns)
+
+        if self._single:
+            if len(data) != 1 and not (self._single == 'maybe' and not data):
+                raise LocalBackendError(f"Expected a single row, got {len(data)}")
+            data = data[0] if data else None
+        return LocalResponse(data, count)
+
+    def _execute_insert(self):
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        ids = []
+        for row in rows:
+            columns = self._writable(row)
+            placeholders = ', '.join('?' for _ in columns)
+            cursor = self.client.conn.execute(
+                f'insert into "{self.table_name}" ({", ".join(self._column(c) for c in columns)}) '
+                f'values ({placeholders})', [_sql_value(row[c]) for c in columns])
+            ids.append(cursor.lastrowid)
+        return self._rows_by_rowid(ids)
+
+    def _execute_upsert(self):
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        conflict = self._column(self._on_conflict)
+        ids = []
+        for row in rows:
+            columns = self._writable(row)
+            updates = ', '.join(f'{self._column(c)} = excluded.{self._column(c)}'
+                                for c in columns if c != self._on_conflict)
+            sql = (f'insert into "{self.table_name}" ({", ".join(self._column(c) for c in columns)}) '
+                   f'values ({", ".join("?" for _ in columns)}) on conflict ({conflict}) '
+                   + (f'do update set {updates}' if updates else 'do nothing') + ' returning rowid')
+            returned = self.client.conn.execute(sql, [_sql_value(row[c]) for c in columns]).fetchone()
+            if returned is not None:
+                ids.append(returned[0])
+        return self._rows_by_rowid(ids)
+
+    def _execute_update(self):
+        columns = self._writable(self._payload)
+        assignments = ', '.join(f'{self._column(c)} = ?' for c in columns)
+        sql = f'update "{self.table_name}" set {assignments}{self._where_sql()} returning rowid'
+        values = [_sql_value(self._payload[c]) for c in columns] + self._params
+        # Re-read so values come back with column affinity applied
+        return self._rows_by_rowid([row[0] for row in self.client.conn.execute(sql, values).fetchall()])
+
+    def _execute_delete(self):
+        sql = f'delete from "{self.table_name}"{self._where_sql()} returning *'
+        return [dict(row) for row in self.client.conn.execute(sql, self._params)]
+
+    # -- helpers -----------------------------------------------------------------
+
+    def _rows_by_rowid(self, rowids):
+        # rowid is the id column where there is one, and also covers the rollup tables that have none
+        if not rowids:
+            return []
+        placeholders = ', '.join('?' for _ in rowids)
+        rows = self.client.conn.execute(
+            f'select * from "{self.table_name}" where rowid in ({placeholders}) order by rowid', rowids)
+        return [dict(row) for row in rows]
+
+    def _writable(self, row):
+        known = set(self.client.columns(self.table_name))
+        unknown = [column for column in row if column not in known]
+        if unknown:
+            raise LocalBackendError(f"Unknown column(s) for {self.table_name}: {', '.join(unknown)}")
+        return list(row)
+
+    def _column(self, column):
+        if column not in self.client.columns(self.table_name):
+            raise LocalBackendError(f"Unknown column for {self.table_name}: {column}")
+        return f'"{column}"'
+
+    def _compare(self, operator, column, value):
+        sql, params = self._condition(column, operator, value)
+        return self._add_where(sql, params)
+
+    def _add_where(self, sql, params):
+        self._where.append(sql)
+        self._params.extend(params)
+        return self
+
+    def _where_sql(self):
+        return ' where ' + ' and '.join(f'({clause})' for clause in self._where) if self._where else ''
+
+    def _condition(self, column, operator, value):
+        negate = operator.startswith('not.')
+        operator = operator[4:] if negate else operator
+        column_sql = self._column(column)
+        if operator in COMPARISONS:
+            if operator in ('like', 'ilike'):
+                # PostgREST accepts * as the wildcard; ilike is case-insensitive
+                pattern = str(value).replace('*', '%')
+                sql, params = (f'lower({column_sql}) like lower(?)' if operator == 'ilike'
+                               else f'{column_sql} glob ?'), [pattern]
+                if operator == 'like':
+                    params = [pattern.replace('%', '*').replace('_', '?')]
+            else:
+                sql, params = f'{column_sql} {COMPARISONS[operator]} ?', [_sql_value(value)]
+        elif operator == 'is':
+            keyword = {None: 'null', 'null': 'null', True: 'true', 'true': 'true',
+                       False: 'false', 'false': 'false'}.get(value)
+            if keyword is None:
+                raise LocalBackendError(f"Unsupported is value: {value}")
+            sql, params = (f'{column_sql} is null', []) if keyword == 'null' else \
+                (f'{column_sql} = ?', [1 if keyword == 'true' else 0])
+        elif operator == 'in':
+            if isinstance(value, str):
+                value = _split_list(value.strip('()'))
+            values = list(value)
+            if not values:
+                sql, params = '0', []
+            else:
+                sql, params = f'{column_sql} in ({", ".join("?" for _ in values)})', [_sql_value(v) for v in values]
+        else:
+            raise LocalBackendError(f"Unsupported filter operator: {operator}")
+        return (f'not ({sql})', params) if negate else (sql, params)
+
+    def _logic_tree(self, joiner, expression):
+        """Compile PostgREST or=/and= syntax, e.g. a.gt.1,and(a.eq.1,id.gt.5)"""
+        clauses, params = [], []
+        for part in _split_top_level(expression):
+            match = re.match(r'^(not\.)?(and|or)\((.*)\)$', part, re.S)
+            if match:
+                sql, sub_params = self._logic_tree(match.group(2), match.group(3))
+                if match.group(1):
+                    sql = f'not ({sql})'
+            else:
+                column, operator, value = _parse_condition(part)
+                sql, sub_params = self._condition(column, operator, value)
+            clauses.append(f'({sql})')
+            params.extend(sub_params)
+        return f' {joiner} '.join(clauses), params
+
+
+def _parse_condition(text):
+    column, rest = text.split('.', 1)
+    operator, value = rest.split('.', 1)
+    if operator == 'not':
+        negated, value = value.split('.', 1)
+        operator = f'not.{negated}'
+    if value.startswith('"') and value.endswith('"'):
+        value = re.sub(r'\\(.)', r'\1', value[1:-1])
+    elif value == 'null':
+        value = None
+    return column, operator, value
+
+
+def _split_top_level(text):
+    """Split on commas outside parentheses and double quotes"""
+    parts, depth, quoted, escaped, current = [], 0, False, False, ''
+    for char in text:
+        if escaped:
+            escaped = False
+        elif char == '\\' and quoted:
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char in '()':
+            depth += 1 if char == '(' else -1
+        elif not quoted and char == ',' and depth == 0:
+            parts.append(current.strip())
+            current = ''
+            continue
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _split_list(text):
+    return [_parse_condition(f'x.eq.{item}')[2] for item in _split_top_level(text)]
+
+
+def _sql_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return int(value)
+    if hasattr(value, 'item'):
+        # numpy scalars
+        return value.item()
+    return value
+
+
+def _parse_select(columns):
+    """Split a select string into plain columns and embeds (key, fk, target table, columns)"""
+    plain, embeds = [], []
+    for item in split_columns(columns):
+        match = re.match(r'^(?:(\w+):)?(\w+)(?:!\w+)?\((.*)\)$', item, re.S)
+        if match:
+            embeds.append((match.group(1), match.group(2), match.group(3)))
+            continue
+        # "alias:column" renames a column
+        alias, _, column = item.rpartition(':')
+        plain.append((alias or column, column))
+    return plain, embeds
+
+
+def _project(client, table, rows, columns):
+    """Apply the select list to full rows, resolving embeds with one query each"""
+    plain, embeds = _parse_select(columns)
+    if any(column == '*' for _, column in plain):
+        projected = [dict(row) for row in rows]
+    else:
+        for _, column in plain:
+            if column not in client.columns(table):
+                raise LocalBackendError(f"Unknown column for {table}: {column}")
+        projected = [{key: row[column] for key, column in plain} for row in rows]
+
+    for alias, name, sub_columns in embeds:
+        _embed(client, table, rows, projected, alias, name, sub_columns)
+    return projected
+
+
+def _embed(client, table, rows, projected, alias, name, sub_columns):
+    outgoing = FOREIGN_KEYS.get(table, {})
+    if name in outgoing:
+        # alias:fk_column(...) - many-to-one through that column
+        fk_column, target = name, outgoing[name]
+    else:
+        matches = [column for column, target in outgoing.items() if target == name]
+        fk_column, target = (matches[0], name) if len(matches) == 1 else (None, name)
+
+    if fk_column is not None:
+        keys = sorted({row[fk_column] for row in rows if row[fk_column] is not None})
+        related = _related_rows(client, target, 'id', keys, sub_columns)
+        by_id = {row['id']: related_row for row, related_row in related}
+        for row, out in zip(rows, projected):
+            out[alias or name] = by_id.get(row[fk_column])
+        return
+
+    # one-to-many: the embedded table references this one
+    child_fks = [column for column, parent in FOREIGN_KEYS.get(name, {}).items() if parent == table]
+    if len(child_fks) != 1:
+        raise LocalBackendError(f"Cannot resolve embed {name} from {table}")
+    child_fk = child_fks[0]
+    keys = sorted({row['id'] for row in rows})
+    grouped = defaultdict(list)
+    for row, related_row in _related_rows(client, name, child_fk, keys, sub_columns):
+        grouped[row[child_fk]].append(related_row)
+    for row, out in zip(rows, projected):
+        out[alias or name] = grouped.get(row['id'], [])
+
+
+def _related_rows(client, table, key_column, keys, columns):
+    """(full row, projected row) pairs for rows whose key_column is in keys"""
+    if not keys:
+        return []
+    full_rows = []
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        placeholders = ', '.join('?' for _ in chunk)
+        full_rows.extend(dict(row) for row in client.conn.execute(
+            f'select * from "{table}" where "{key_column}" in ({placeholders}) order by id', chunk))
+    return list(zip(full_rows, _project(client, table, full_rows, columns)))
+
+
+# -- database functions (Python ports of database/sql) -------------------------
+
+def _records(value):
+    return json.loads(value) if isinstance(value, str) else (value or [])
+
+
+def _grouped_quantities(records, key):
+    totals = defaultdict(float)
+    for record in records:
+        totals[int(record[key])] += float(record['quantity'])
+    return totals
+
+
+def _post_sale(conn, p_sale, p_items):
+    sale, items = _records(p_sale), _records(p_items)
+    if not items:
+        raise LocalBackendError("Sale has no items")
+
+    for product_id, quantity in sorted(_grouped_quantities(items, 'product_id').items()):
+        row = conn.execute("select quantity_in_stock from products where id = ?", (product_id,)).fetchone()
+        if row is None or row[0] < quantity:
+            available = row[0] if row else 0
+            raise LocalBackendError(
+                f"Insufficient stock for product {product_id}: requested {quantity}, available {available}")
+
+    sale_id = conn.execute(
+        "insert into sales (invoice_number, customer_name, customer_email, customer_phone, payment_method, "
+        f"total_amount, sale_date, notes) values (?, ?, ?, ?, ?, ?, coalesce(?, {NOW}), ?)",
+        (sale.get('invoice_number'), sale.get('customer_name'), sale.get('customer_email'),
+         sale.get('customer_phone'), sale.get('payment_method'), float(sale.get('total_amount') or 0),
+         sale.get('sale_date'), sale.get('notes'))
+    ).lastrowid
+
+    conn.executemany(
+        "insert into sale_items (sale_id, product_id, product_name, quantity, unit_price, total_price) "
+        "values (?, ?, ?, ?, ?, ?)",
+        [(sale_id, int(item['product_id']), item.get('product_name'), float(item['quantity']),
+          float(item.get('unit_price') or 0),
+          float(item['total_price']) if item.get('total_price') is not None
+          else float(item['quantity']) * float(item.get('unit_price') or 0))
+         for item in items])
+    for product_id, quantity in sorted(_grouped_quantities(items, 'product_id').items()):
+        _record_movement(conn, product_id, 'sale', -quantity, None, 'sale', sale_id)
+    lots = _allocate_batches(conn, items, 'sale', sale_id)
+    _rollup_sales(conn, [sale_id])
+    return {'id': sale_id, 'invoice_number': sale.get('invoice_number'), **lots}
+
+
+def _start_production(conn, p_order, p_materials):
+    order, materials = _records(p_order), _records(p_materials)
+    needed = _grouped_quantities(materials, 'raw_material_id')
+
+    shortages = []
+    for material_id, quantity in sorted(needed.items()):
+        row = conn.execute("select name, quantity_in_stock from products where id = ?", (material_id,)).fetchone()
+        if row is None or row['quantity_in_stock'] < quantity:
+            name = row['name'] if row else material_id
+            shortages.append(f"{name} (need {quantity:g}, have {row['quantity_in_stock'] if row else 0:g})")
+    if shortages:
+        raise LocalBackendError(f"Insufficient materials: {', '.join(shortages)}")
+
+    order_id = conn.execute(
+        "insert into production_orders (product_id, product_name, quantity_planned, start_date, status, notes) "
+        f"values (?, ?, ?, coalesce(?, {NOW}), 'in_progress', ?)",
+        (int(order['product_id']), order.get('product_name'), float(order['quantity_planned']),
+         order.get('start_date'), order.get('notes'))
+    ).lastrowid
+    conn.executemany(
+        "insert into production_consumption (production_order_id, raw_material_id, quantity_consumed) "
+        "values (?, ?, ?)", [(order_id, material_id, quantity) for material_id, quantity in needed.items()])
+    for material_id, quantity in sorted(needed.items()):
+        _record_movement(conn, material_id, 'consumption', -quantity, None, 'production_order', order_id)
+    lots = _allocate_batches(conn, [{'product_id': material_id, 'quantity': quantity}
+                                    for material_id, quantity in needed.items()], 'production_order', order_id)
+    return {'id': order_id, **lots}
+
+
+def _consume_batches(conn, p_allocations, p_source_type, p_source_id=None):
+    allocations = _records(p_allocations)
+    per_batch = _grouped_quantities(allocations, 'batch_id')
+    updated = 0
+    for batch_id, quantity in per_batch.items():
+        updated += conn.execute(
+            "update batches set quantity = quantity - ? where id = ? and quantity >= ?",
+            (quantity, batch_id, quantity)).rowcount
+    if updated != len(per_batch):
+        raise LocalBackendError(
+            f"Batch quantities changed during allocation ({updated} of {len(per_batch)} batches updated)")
+    conn.executemany(
+        "insert into batch_allocations (batch_id, product_id, quantity, source_type, source_id) "
+        "values (?, ?, ?, ?, ?)",
+        [(int(a['batch_id']), int(a['product_id']), float(a['quantity']), p_source_type, p_source_id)
+         for a in allocations])
+    return updated
+
+
+def _allocate_batches(conn, p_lines, p_source_type, p_source_id=None):
+    needed = _grouped_quantities(_records(p_lines), 'product_id')
+    # One read of every open batch of the products, one write each for the decrements and the allocations
+    batches = defaultdict(list)
+    for batch in conn.execute(
+            "select id, product_id, batch_number, expiry_date, quantity from batches "
+            "where product_id in (select value from json_each(?)) and quantity > 0 "
+            "order by product_id, expiry_date is null, expiry_date, id", (json.dumps(list(needed)),)):
+        batches[batch['product_id']].append(batch)
+
+    allocations, shortfalls = [], []
+    for product_id, quantity in sorted(needed.items()):
+        remaining = quantity
+        for batch in batches[product_id]:
+            if remaining <= 0:
+                break
+            take = min(remaining, batch['quantity'])
+            allocations.append({'product_id': product_id, 'batch_id': batch['id'],
+                                'batch_number': batch['batch_number'], 'expiry_date': batch['expiry_date'],
+                                'quantity': take})
+            remaining -= take
+        if remaining > 0:
+            shortfalls.append({'product_id': product_id, 'quantity': remaining})
+
+    conn.executemany("update batches set quantity = quantity - ? where id = ?",
+                     [(a['quantity'], a['batch_id']) for a in allocations])
+    conn.executemany(
+        "insert into batch_allocations (batch_id, product_id, quantity, source_type, source_id) "
+        "values (?, ?, ?, ?, ?)",
+        [(a['batch_id'], a['product_id'], a['quantity'], p_source_type, p_source_id) for a in allocations])
+    return {'allocations': allocations, 'shortfalls': shortfalls}
+
+
+def _apply_movement(conn, product_id, movement_type, quantity, unit_cost=None, source_type=None,
+                    source_id=None, fallback_cost=0):
+    conn.execute("insert or ignore into inventory_balances (product_id) values (?)", (product_id,))
+    balance = conn.execute("select quantity, average_cost from inventory_balances where product_id = ?",
+                           (product_id,)).fetchone()
+    if quantity > 0 and unit_cost is not None:
+        cost = float(unit_cost)
+    elif balance['average_cost'] > 0:
+        cost = balance['average_cost']
+    else:
+        cost = float(fallback_cost or 0)
+    new_quantity = balance['quantity'] + quantity
+    if quantity > 0 and balance['quantity'] > 0 and new_quantity > 0:
+        average = (balance['quantity'] * balance['average_cost'] + quantity * cost) / new_quantity
+    elif quantity > 0 or balance['average_cost'] == 0:
+        average = cost
+    else:
+        average = balance['average_cost']
+
+    movement_id = conn.execute(
+        "insert into inventory_movements (product_id, movement_type, quantity, unit_cost, value, balance_quantity, "
+        "balance_value, average_cost, source_type, source_id) values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (product_id, movement_type, quantity, cost, quantity * cost, new_quantity, new_quantity * average,
+         average, source_type, source_id)).lastrowid
+    movement = dict(conn.execute("select * from inventory_movements where id = ?", (movement_id,)).fetchone())
+    conn.execute(
+        "update inventory_balances set quantity = ?, value = ?, average_cost = ?, last_movement_id = ?, "
+        "updated_at = ? where product_id = ?",
+        (new_quantity, new_quantity * average, average, movement_id, movement['moved_at'], product_id))
+    return movement
+
+
+def _record_movement(conn, p_product_id, p_movement_type, p_quantity, p_unit_cost=None, p_source_type=None,
+                     p_source_id=None):
+    product = conn.execute("select price_paid from products where id = ?", (int(p_product_id),)).fetchone()
+    if product is None:
+        raise LocalBackendError(f"Unknown product {p_product_id}")
+    movement = _apply_movement(conn, int(p_product_id), p_movement_type, float(p_quantity),
+                               p_unit_cost, p_source_type, p_source_id, product['price_paid'])
+    # The balance already matches, so the products trigger records nothing more
+    if p_movement_type == 'receipt':
+        conn.execute("update products set quantity_in_stock = ?, price_paid = ? where id = ?",
+                     (movement['balance_quantity'], movement['average_cost'], int(p_product_id)))
+    else:
+        conn.execute("update products set quantity_in_stock = ? where id = ?",
+                     (movement['balance_quantity'], int(p_product_id)))
+    return movement
+
+
+def _post_receipt(conn, p_receipt, p_batch=None):
+    receipt = _records(p_receipt)
+    batch = _records(p_batch) if p_batch else None
+    quantity = float(receipt.get('quantity_received') or 0)
+    unit_cost = float(receipt.get('unit_cost') or 0)
+    if quantity <= 0:
+        raise LocalBackendError("Quantity received must be positive")
+    product_id = int(receipt['product_id'])
+    supplier_id = receipt.get('supplier_id')
+
+    receipt_id = conn.execute(
+        "insert into inventory_receipts (product_id, product_name, supplier_id, quantity_received, unit_cost, "
+        "total_cost, receipt_date, reference_number, notes) values (?, ?, ?, ?, ?, ?, coalesce(?, date('now')), ?, ?)",
+        (product_id, receipt.get('product_name'), supplier_id, quantity, unit_cost, quantity * unit_cost,
+         receipt.get('receipt_date'), receipt.get('reference_number'), receipt.get('notes'))).lastrowid
+    movement = _record_movement(conn, product_id, 'receipt', quantity, unit_cost, 'inventory_receipt', receipt_id)
+    if supplier_id is not None:
+        conn.execute("update products set supplier_id = ? where id = ?", (int(supplier_id), product_id))
+
+    batch_id = None
+    if batch is not None:
+        batch_id = conn.execute(
+            "insert into batches (product_id, batch_number, quantity, receipt_id, expiry_date, location, notes) "
+            "values (?, ?, ?, ?, ?, ?, ?)",
+            (product_id, batch.get('batch_number') or f"BATCH-{receipt_id}", quantity, receipt_id,
+             batch.get('expiry_date'), batch.get('location'), batch.get('notes'))).lastrowid
+    return {'id': receipt_id, 'quantity_in_stock': movement['balance_quantity'],
+            'average_cost': movement['average_cost'], 'batch_id': batch_id}
+
+
+def _finish_production(conn, p_order_id, p_quantity):
+    order = conn.execute("select product_id, status from production_orders where id = ?", (p_order_id,)).fetchone()
+    if order is None or order['status'] != 'in_progress':
+        raise LocalBackendError(f"Production order {p_order_id} is not in progress")
+    quantity = float(p_quantity or 0)
+    if quantity <= 0:
+        raise LocalBackendError("Quantity produced must be positive")
+    cost = -conn.execute(
+        "select coalesce(sum(value), 0) from inventory_movements "
+        "where source_type = 'production_order' and source_id = ? and movement_type = 'consumption'",
+        (p_order_id,)).fetchone()[0]
+    conn.execute(f"update production_orders set status = 'completed', end_date = {NOW}, quantity_produced = ? "
+                 "where id = ?", (quantity, p_order_id))
+    movement = _record_movement(conn, order['product_id'], 'output', quantity, cost / quantity,
+                                'production_order', p_order_id)
+    return {'id': p_order_id, 'quantity_in_stock': movement['balance_quantity'], 'unit_cost': cost / quantity}
+
+
+def _cost_of_goods_sold(conn, p_start, p_end):
+    rows = conn.execute(
+        "select product_id, -sum(quantity) as units, -sum(value) as cogs from inventory_movements "
+        "where movement_type = 'sale' and moved_at >= ? and moved_at < ? group by product_id order by cogs desc",
+        (p_start, p_end)).fetchall()
+    return {'cogs': sum(row['cogs'] for row in rows), 'units': sum(row['units'] for row in rows),
+            'by_product': [dict(row) for row in rows]}
+
+
+def _take_inventory_snapshots(conn, p_through=None):
+    through = date.fromisoformat(p_through) if p_through else date.today() - timedelta(days=1)
+    last = conn.execute("select max(snapshot_date) from inventory_snapshots").fetchone()[0]
+    if last is not None:
+        day = date.fromisoformat(last) + timedelta(days=1)
+    else:
+        first = conn.execute("select min(moved_at) from inventory_movements").fetchone()[0]
+        if first is None:
+            return 0
+        day = date.fromisoformat(first[:10])
+
+    # Carry the previous day's balances forward and apply each day's movements in order
+    balances = {row[0]: tuple(row) for row in conn.execute(
+        "select product_id, quantity, value, average_cost, last_movement_id from inventory_snapshots "
+        "where snapshot_date = ?", ((day - timedelta(days=1)).isoformat(),))}
+    days = 0
+    while day <= through:
+        next_day = day + timedelta(days=1)
+        for row in conn.execute(
+                "select product_id, balance_quantity, balance_value, average_cost, id from inventory_movements "
+                "where moved_at >= ? and moved_at < ? order by moved_at, id", (day.isoformat(), next_day.isoformat())):
+            balances[row[0]] = tuple(row)
+        balances = {pid: row for pid, row in balances.items() if row[1] != 0}
+        conn.executemany(
+            "insert into inventory_snapshots (snapshot_date, product_id, quantity, value, average_cost, "
+            "last_movement_id) values (?, ?, ?, ?, ?, ?)",
+            [(day.isoformat(),) + row for row in balances.values()])
+        day = next_day
+        days += 1
+    return days
+
+
+def _utc_text(value):
+    """A timestamp as the naive UTC text moved_at is stored in (NOW is UTC)"""
+    at = datetime.fromisoformat(str(value))
+    if at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at.isoformat()
+
+
+def _stock_as_of(conn, p_at, p_product_ids=None):
+    at = _utc_text(p_at)
+    product_filter, product_params = "", []
+    if p_product_ids is not None:
+        product_ids = [int(pid) for pid in _records(p_product_ids)]
+        product_filter = f" and product_id in ({', '.join('?' for _ in product_ids)})"
+        product_params = product_ids
+
+    checkpoint = conn.execute("select max(snapshot_date) from inventory_snapshots where snapshot_date < ?",
+                              (at[:10],)).fetchone()[0]
+    stock = {}
+    window_start = ''
+    if checkpoint is not None:
+        window_start = (date.fromisoformat(checkpoint) + timedelta(days=1)).isoformat()
+        for row in conn.execute("select product_id, quantity, value, average_cost from inventory_snapshots "
+                                "where snapshot_date = ?" + product_filter, [checkpoint] + product_params):
+            stock[row['product_id']] = dict(row)
+
+    replayed = 0
+    for row in conn.execute(
+            "select product_id, balance_quantity, balance_value, average_cost from inventory_movements "
+            "where moved_at >= ? and moved_at <= ?" + product_filter + " order by moved_at, id",
+            [window_start, at] + product_params):
+        stock[row['product_id']] = {'product_id': row['product_id'], 'quantity': row['balance_quantity'],
+                                    'value': row['balance_value'], 'average_cost': row['average_cost']}
+        replayed += 1
+    return {
+        'checkpoint': checkpoint,
+        'movements': replayed,
+        'stock': [stock[pid] for pid in sorted(stock) if stock[pid]['quantity'] != 0],
+    }
+
+
+# sales_rollup_rows from 11_sales_rollups.sql, as a CTE over the sales chosen by {where}
+_SALES_ROLLUP_ROWS = """
+with chosen as (
+    select id, substr(sale_date, 1, 10) as sale_day, total_amount from sales where {where}
+),
+items as (
+    select i.sale_id, i.product_id, sum(i.total_price) as revenue, sum(i.quantity) as units
+    from sale_items i where i.sale_id in (select id from chosen)
+    group by i.sale_id, i.product_id
+),
+costs as (
+    select m.source_id as sale_id, m.product_id, -sum(m.value) as cost
+    from inventory_movements m
+    where m.source_type = 'sale' and m.movement_type = 'sale' and m.source_id in (select id from chosen)
+    group by m.source_id, m.product_id
+),
+rollup_rows as (
+    select c.id as sale_id, c.sale_day, c.total_amount as sales_amount, i.product_id, i.revenue, i.units,
+           coalesce(k.cost, 0) as cost
+    from chosen c
+    join items i on i.sale_id = c.id
+    left join costs k on k.sale_id = i.sale_id and k.product_id = i.product_id
+)
+"""
+
+
+def _month(day_column):
+    return f"substr({day_column}, 1, 7) || '-01'"
+
+
+def _insert_sales_rollups(conn, where, params, additive):
+    rows = _SALES_ROLLUP_ROWS.format(where=where)
+    upsert = {
+        'sales_daily': "on conflict (sale_day, product_id) do update set revenue = revenue + excluded.revenue, "
+                       "units = units + excluded.units, cost = cost + excluded.cost, "
+                       "sales_count = sales_count + excluded.sales_count",
+        'sales_monthly': "on conflict (sale_month, product_id) do update set revenue = revenue + excluded.revenue, "
+                         "units = units + excluded.units, cost = cost + excluded.cost, "
+                         "sales_count = sales_count + excluded.sales_count",
+        'sales_daily_totals': "on conflict (sale_day) do update set sales_count = sales_count + excluded.sales_count, "
+                              "sales_amount = sales_amount + excluded.sales_amount, "
+                              "revenue = revenue + excluded.revenue, units = units + excluded.units, "
+                              "cost = cost + excluded.cost",
+    }
+    conn.execute(
+        rows + "insert into sales_daily (sale_day, product_id, revenue, units, cost, sales_count) "
+        "select sale_day, product_id, sum(revenue), sum(units), sum(cost), count(*) from rollup_rows "
+        "where true group by sale_day, product_id " + (upsert['sales_daily'] if additive else ''), params)
+    if additive:
+        conn.execute(
+            rows + "insert into sales_monthly (sale_month, product_id, revenue, units, cost, sales_count) "
+            f"select {_month('sale_day')}, product_id, sum(revenue), sum(units), sum(cost), count(*) "
+            "from rollup_rows where true group by 1, product_id " + upsert['sales_monthly'], params)
+    # rowcount is -1 for statements that start with a CTE, so count the changes instead
+    changes = conn.total_changes
+    conn.execute(
+        rows + "insert into sales_daily_totals (sale_day, sales_count, sales_amount, revenue, units, cost) "
+        "select sale_day, count(*), sum(sales_amount), sum(revenue), sum(units), sum(cost) from ("
+        "select sale_id, sale_day, max(sales_amount) as sales_amount, sum(revenue) as revenue, "
+        "sum(units) as units, sum(cost) as cost from rollup_rows group by sale_id, sale_day"
+        ") where true group by sale_day " + (upsert['sales_daily_totals'] if additive else ''), params)
+    return conn.total_changes - changes
+
+
+def _rollup_sales(conn, p_sale_ids):
+    sale_ids = [int(sale_id) for sale_id in _records(p_sale_ids)]
+    if not sale_ids:
+        return 0
+    _insert_sales_rollups(conn, f"id in ({', '.join('?' for _ in sale_ids)})", sale_ids, additive=True)
+    return len(sale_ids)
+
+
+def _rebuild_sales_rollups(conn, p_start=None, p_end=None):
+    start = p_start or '0000-01-01'
+    end = p_end or '9999-12-31'
+    conn.execute("delete from sales_daily where sale_day >= ? and sale_day <= ?", (start, end))
+    conn.execute("delete from sales_daily_totals where sale_day >= ? and sale_day <= ?", (start, end))
+    after_end = (date.fromisoformat(end) + timedelta(days=1)).isoformat() if p_end else end
+    days = _insert_sales_rollups(conn, "sale_date >= ? and sale_date < ?", (start, after_end), additive=False)
+
+    first_month, last_month = start[:7] + '-01', end[:7] + '-01'
+    conn.execute("delete from sales_monthly where sale_month >= ? and sale_month <= ?", (first_month, last_month))
+    conn.execute(
+        "insert into sales_monthly (sale_month, product_id, revenue, units, cost, sales_count) "
+        f"select {_month('sale_day')}, product_id, sum(revenue), sum(units), sum(cost), sum(sales_count) "
+        f"from sales_daily where {_month('sale_day')} >= ? and {_month('sale_day')} <= ? group by 1, product_id",
+        (first_month, last_month))
+    return days
+
+
+def _sales_series(conn, p_start, p_end, p_bucket='day'):
+    periods = {
+        'day': 'sale_day',
+        # date_trunc('week') starts weeks on Monday
+        'week': "date(sale_day, 'weekday 0', '-6 days')",
+        'month': _month('sale_day'),
+    }
+    if p_bucket not in periods:
+        raise LocalBackendError(f"Unknown bucket: {p_bucket}")
+    rows = conn.execute(
+        f"select {periods[p_bucket]} as period, sum(sales_count) as sales_count, sum(sales_amount) as sales_amount, "
+        "sum(revenue) as revenue, sum(units) as units, sum(cost) as cost from sales_daily_totals "
+        "where sale_day >= ? and sale_day <= ? group by 1 order by 1", (p_start, p_end))
+    return [dict(row) for row in rows]
+
+
+def _sales_by_product(conn, p_start, p_end, p_limit=None, p_order='revenue'):
+    orders = {'revenue': 'revenue', 'units': 'units', 'margin': 'revenue - cost'}
+    if p_order not in orders:
+        raise LocalBackendError(f"Unknown order: {p_order}")
+    start, end = date.fromisoformat(p_start), date.fromisoformat(p_end)
+    # Months wholly inside the range are [first_month, after_month)
+    first_month = (start - timedelta(days=1)).replace(day=1) + timedelta(days=32)
+    first_month = first_month.replace(day=1).isoformat()
+    after_month = (end + timedelta(days=1)).replace(day=1).isoformat()
+    limit = " limit ?" if p_limit is not None else ""
+    rows = conn.execute(
+        "select * from (select product_id, sum(revenue) as revenue, sum(units) as units, sum(cost) as cost, "
+        "sum(sales_count) as sales_count from ("
+        "select product_id, revenue, units, cost, sales_count from sales_monthly "
+        "where sale_month >= ? and sale_month < ? "
+        "union all "
+        "select product_id, revenue, units, cost, sales_count from sales_daily "
+        "where sale_day >= ? and sale_day <= ? and (sale_day < ? or sale_day >= ?)"
+        f") group by product_id) order by {orders[p_order]} desc, product_id{limit}",
+        [first_month, after_month, p_start, p_end, first_month, after_month]
+        + ([int(p_limit)] if p_limit is not None else []))
+    return [dict(row) for row in rows]
+
+
+def _reserve_invoice_numbers(conn, p_count=100):
+    numbers = []
+    for _ in range(max(int(p_count), 1)):
+        numbers.append(conn.execute("insert into invoice_number_seq default values").lastrowid)
+    # Keep the sequence table from growing; autoincrement remembers the high-water mark
+    conn.execute("delete from invoice_number_seq")
+    return numbers
+
+
+def _sales_summary(conn, p_today=None):
+    today = date.fromisoformat(p_today) if p_today else date.today()
+    row = conn.execute(
+        "select coalesce(sum(sales_count), 0), coalesce(sum(sales_amount), 0), "
+        "coalesce(sum(sales_amount) / nullif(sum(sales_count), 0), 0), "
+        "coalesce(sum(case when sale_day = ? then sales_amount end), 0) from sales_daily_totals",
+        (today.isoformat(),)).fetchone()
+    return {'sales_count': row[0], 'sales_total': row[1], 'sales_average': row[2], 'sales_today': row[3]}
+
+
+def _inventory_summary(conn, p_low_stock_threshold=10):
+    summary = {}
+    rows = conn.execute(
+        "select p.product_type, count(*), "
+        "sum(case when p.quantity_in_stock <= ? then 1 else 0 end), "
+        "sum(case when p.quantity_in_stock = 0 then 1 else 0 end), "
+        "coalesce(sum(b.value), 0), "
+        "coalesce(sum(p.quantity_in_stock), 0) "
+        "from products p left join inventory_balances b on b.product_id = p.id "
+        "group by p.product_type", (p_low_stock_threshold,))
+    for product_type, count, low, out, value, quantity in rows:
+        if product_type is None:
+            continue
+        summary.update({
+            f'{product_type}_count': count,
+            f'{product_type}_low_stock': low,
+            f'{product_type}_out_of_stock': out,
+            f'{product_type}_inventory_value': value,
+            f'{product_type}_total_quantity': quantity,
+        })
+    return summary
+
+
+def _dashboard_metrics(conn, p_today=None, p_low_stock_threshold=10):
+    metrics = _sales_summary(conn, p_today)
+    metrics.update(_inventory_summary(conn, p_low_stock_threshold))
+    metrics['supplier_count'] = conn.execute("select count(*) from suppliers").fetchone()[0]
+    return metrics
+
+
+def _product_filter_options(conn):
+    return {
+        'product_types': [row[0] for row in conn.execute(
+            "select distinct product_type from products where product_type is not null order by 1")],
+        'categories': [row[0] for row in conn.execute(
+            "select distinct category from products where category is not null and category <> '' order by 1")],
+    }
+
+
+# Database function name -> Python implementation taking (conn, **params)
+LOCAL_PROCEDURES = {
+    'post_sale': _post_sale,
+    'start_production': _start_production,
+    'consume_batches': _consume_batches,
+    'allocate_batches': _allocate_batches,
+    'reserve_invoice_numbers': _reserve_invoice_numbers,
+    'sales_summary': _sales_summary,
+    'inventory_summary': _inventory_summary,
+    'dashboard_metrics': _dashboard_metrics,
+    'product_filter_options': _product_filter_options,
+    'record_movement': _record_movement,
+    'post_receipt': _post_receipt,
+    'finish_production': _finish_production,
+    'cost_of_goods_sold': _cost_of_goods_sold,
+    'take_inventory_snapshots': _take_inventory_snapshots,
+    'stock_as_of': _stock_as_of,
+    'rollup_sales': _rollup_sales,
+    'rebuild_sales_rollups': _rebuild_sales_rollups,
+    'sales_series': _sales_series,
+    'sales_by_product': _sales_by_product,
+}
+
+
+class LocalConnectionManager:
+    """Same interface as connection.ConnectionManager for the local backend"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._client = None
+        self._stats = {'clients_created': 0, 'checkouts': 0}
+        self._created_at = None
+
+    def get_client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = LocalClient(self.path)
+                self._stats['clients_created'] += 1
+                self._created_at = time.time()
+            self._stats['checkouts'] += 1
+            return self._client
+
+    def mark_unhealthy(self):
+        pass
+
+    def query_failed(self, error):
+        pass
+
+    def pool_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({'backend': 'sqlite', 'path': self.path, 'connected': self._client is not None,
+                          'healthy': self._client is not None, 'created_at': self._created_at})
+            return stats
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from datetime import datetime
+from database.cache import cached_select, query_cache
+from database.procedures import call_procedure
+
+LOW_STOCK_THRESHOLD = 10
+
+SALES_SUMMARY_KEYS = ['sales_count', 'sales_total', 'sales_average', 'sales_today']
+INVENTORY_KEYS = [
+    f"{product_type}_{metric}"
+    for product_type in ('raw', 'finished')
+    for metric in ('count', 'low_stock', 'out_of_stock', 'inventory_value', 'total_quantity')
+]
+DASHBOARD_KEYS = SALES_SUMMARY_KEYS + INVENTORY_KEYS + ['supplier_count']
+FLOAT_SUFFIXES = ('_total', '_average', '_today', '_value', '_quantity')
+# A metrics function that failed goes straight to its fallback for this long
+RPC_RETRY_SECONDS = float(os.getenv("METRICS_RPC_RETRY_SECONDS", "300"))
+
+_UNAVAILABLE = object()
+_failed_rpcs = {}
+_failed_rpcs_lock = threading.Lock()
+
+
+def get_sales_summary(supabase, today=None):
+    """Sales count/total/average/today computed in the database"""
+    today = today or datetime.now().date()
+    data = _call_rpc(supabase, 'sales_summary', {'p_today': today.isoformat()}, "using count requests")
+    if data is _UNAVAILABLE:
+        return _metrics(_count_metrics(supabase, SALES_SUMMARY_KEYS), SALES_SUMMARY_KEYS, missing=None)
+    return _metrics(data, SALES_SUMMARY_KEYS)
+
+
+def get_inventory_summary(supabase, low_stock_threshold=LOW_STOCK_THRESHOLD):
+    """Per product type counts, stock totals and inventory value computed in the database"""
+    data = _call_rpc(supabase, 'inventory_summary', {'p_low_stock_threshold': low_stock_threshold},
+                     "using count requests")
+    if data is _UNAVAILABLE:
+        return _metrics(_count_metrics(supabase, INVENTORY_KEYS, low_stock_threshold), INVENTORY_KEYS, missing=None)
+    return _metrics(data, INVENTORY_KEYS)
+
+
+def get_dashboard_metrics(supabase, today=None, low_stock_threshold=LOW_STOCK_THRESHOLD):
+    """Dashboard header metrics computed in the database in one round trip"""
+    today = today or datetime.now().date()
+    data = _call_rpc(supabase, 'dashboard_metrics', {
+        'p_today': today.isoformat(),
+        'p_low_stock_threshold': low_stock_threshold,
+    }, "using count requests")
+    if data is _UNAVAILABLE:
+        return _metrics(_count_metrics(supabase, DASHBOARD_KEYS, low_stock_threshold), DASHBOARD_KEYS,
+                        missing=None)
+    return _metrics(data, DASHBOARD_KEYS)
+
+
+def get_product_filter_options(supabase):
+    """Distinct product types and categories for filter dropdowns (cached)"""
+    def load():
+        data = _call_rpc(supabase, 'product_filter_options', {}, "using column read")
+        if data is not _UNAVAILABLE:
+            data = data or {}
+            return data.get('product_types') or [], data.get('categories') or []
+        rows = cached_select(supabase, 'products', 'product_type, category')
+        product_types = sorted({row['product_type'] for row in rows if row.get('product_type')})
+        categories = sorted({row['category'] for row in rows if row.get('category')})
+        return product_types, categories
+
+    return query_cache.get_or_load(('filter_options', 'products'), load, ('products',))
+
+
+def _call_rpc(supabase, name, params, fallback):
+    """Call a metrics function, or return _UNAVAILABLE if it fails or failed within RPC_RETRY_SECONDS.
+
+    Only the first failure is printed, not one per rerun; a success clears it.
+    """
+    with _failed_rpcs_lock:
+        failed_at = _failed_rpcs.get(name)
+    if failed_at is not None and time.monotonic() - failed_at < RPC_RETRY_SECONDS:
+        return _UNAVAILABLE
+    try:
+        data = call_procedure(supabase, name, params)
+    except Exception as e:
+        with _failed_rpcs_lock:
+            _failed_rpcs[name] = time.monotonic()
+        if failed_at is None:
+            print(f"{name} RPC unavailable, {fallback}: {e}")
+        return _UNAVAILABLE
+    if failed_at is not None:
+        with _failed_rpcs_lock:
+            _failed_rpcs.pop(name, None)
+    return data
+
+
+def count_rows(supabase, table, filters=()):
+    """Exact row count via a PostgREST HEAD request (no rows transferred)"""
+    query = supabase.table(table).select('id', count='exact', head=True)
+    for method, column, value in filters:
+        query = getattr(query, method)(column, value)
+    return query.execute().count or 0
+
+
+def _count_metrics(supabase, keys, low_stock_threshold=LOW_STOCK_THRESHOLD):
+    # Fallback for databases without database/sql/03_metrics.sql applied:
+    # counts still avoid downloading rows; sums are not computed (None).
+    counts = {}
+    if 'sales_count' in keys:
+        counts['sales_count'] = count_rows(supabase, 'sales')
+    if 'supplier_count' in keys:
+        counts['supplier_count'] = count_rows(supabase, 'suppliers')
+    for key in keys:
+        product_type, _, metric = key.partition('_')
+        if product_type not in ('raw', 'finished') or metric in ('inventory_value', 'total_quantity'):
+            continue
+        filters = [('eq', 'product_type', product_type)]
+        if metric == 'low_stock':
+            filters.append(('lte', 'quantity_in_stock', low_stock_threshold))
+        elif metric == 'out_of_stock':
+            filters.append(('eq', 'quantity_in_stock', 0))
+        counts[key] = count_rows(supabase, 'products', filters)
+    return counts
+
+
+def unavailable_metrics(metrics):
+    """Keys the count fallback could not compute (their value is None)"""
+    return [key for key, value in metrics.items() if value is None]
+
+
+def format_metric(value, template="{:,.2f}"):
+    """Format a metric for st.metric, or 'n/a' when it could not be computed"""
+    return "n/a" if value is None else template.format(value)
+
+
+def _metrics(data, keys, missing=0):
+    # missing=0 for RPC results (absent keys are empty groups); None for the
+    # count fallback, so sums it cannot compute are not shown as zero
+    data = data or {}
+    metrics = {}
+    for key in keys:
+        value = data.get(key)
+        if value is None:
+            metrics[key] = missing
+            continue
+        metrics[key] = float(value) if key.endswith(FLOAT_SUFFIXES) else int(value)
+    return metrics
@@ -0,0 +1,99 @@
+import os
+from database.cache import query_cache
+
+DEFAULT_PAGE_SIZE = int(os.getenv("TABLE_PAGE_SIZE", "50"))
+PAGE_CACHE_TTL = float(os.getenv("TABLE_PAGE_CACHE_TTL", "60"))
+
+
+def fetch_page(supabase, table, columns='*', filters=(), cursor=None, page_size=DEFAULT_PAGE_SIZE,
+               order_column='id', desc=False, depends_on=(), cache=True):
+    """Fetch one keyset page of rows after cursor.
+
+    Rows are ordered by order_column with id as a tie-breaker, so the cursor is
+    the id of the last row when ordering by id, or (value, id) otherwise. NULLs
+    sort last ascending and first descending, as in Postgres by default. One
+    extra row is requested to learn whether another page exists without a
+    count query. Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    filters = tuple(filters)
+    columns = _with_key_columns(columns, order_column)
+
+    def load():
+        query = supabase.table(table).select(columns)
+        for method, column, value in filters:
+            query = getattr(query, method)(column, value)
+        if cursor is not None:
+            query = _after_cursor(query, cursor, order_column, desc)
+        # Explicit so SQLite (NULLs first ascending) pages the same way
+        query = query.order(order_column, desc=desc, nullsfirst=desc)
+        if order_column != 'id':
+            query = query.order('id', desc=desc)
+        rows = query.limit(page_size + 1).execute().data or []
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            next_cursor = last['id'] if order_column == 'id' else (last[order_column], last['id'])
+        return rows, next_cursor
+
+    if not cache:
+        return load()
+    key = ('page', table, columns, filters, cursor, page_size, order_column, desc)
+    return query_cache.get_or_load(key, load, (table,) + tuple(depends_on), PAGE_CACHE_TTL)
+
+
+def iter_pages(supabase, table, columns='*', filters=(), page_size=1000, order_column='id', desc=False):
+    """Yield successive keyset pages of a table (uncached, for exports and batch jobs)"""
+    cursor = None
+    while True:
+        rows, cursor = fetch_page(supabase, table, columns, filters, cursor, page_size,
+                                  order_column, desc, cache=False)
+        if rows:
+            yield rows
+        if cursor is None:
+            return
+
+
+def _after_cursor(query, cursor, order_column, desc):
+    op = 'lt' if desc else 'gt'
+    if order_column == 'id':
+        return getattr(query, op)('id', cursor)
+    value, last_id = cursor
+    if value is None:
+        # Ascending, only NULLs remain; descending, the rest of the NULLs then every value
+        if not desc:
+            return query.is_(order_column, 'null').gt('id', last_id)
+        return query.or_(f'and({order_column}.is.null,id.lt.{last_id}),{order_column}.not.is.null')
+    # Quote the value so commas, colons and parentheses survive the or= syntax
+    value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    after = f'{order_column}.{op}."{value}",and({order_column}.eq."{value}",id.{op}.{last_id})'
+    if not desc:
+        after += f',{order_column}.is.null'
+    return query.or_(after)
+
+
+def _with_key_columns(columns, order_column):
+    # Keyset paging needs the cursor columns in every row
+    if columns.strip() == '*':
+        return columns
+    selected = split_columns(columns)
+    for key in ('id', order_column):
+        if key not in selected:
+            selected.append(key)
+    return ', '.join(selected)
+
+
+def split_columns(columns):
+    """Split a PostgREST select string on top-level commas (embeds stay intact)"""
+    parts, depth, current = [], 0, ''
+    for char in columns:
+        if char == ',' and depth == 0:
+            parts.append(current.strip())
+            current = ''
+            continue
+        depth += (char == '(') - (char == ')')
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
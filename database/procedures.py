@@ -0,0 +1,134 @@
+import json
+from database.cache import invalidate
+
+# Tables each database function writes, for cache invalidation
+PROCEDURE_WRITES = {
+    'post_sale': ('sales', 'sale_items', 'products', 'inventory_movements', 'inventory_balances', 'batches',
+                  'batch_allocations', 'sales_daily', 'sales_monthly', 'sales_daily_totals'),
+    'start_production': ('production_orders', 'production_consumption', 'products', 'inventory_movements',
+                         'inventory_balances', 'batches', 'batch_allocations'),
+    'consume_batches': ('batches', 'batch_allocations'),
+    'allocate_batches': ('batches', 'batch_allocations'),
+    'record_movement': ('products', 'inventory_movements', 'inventory_balances'),
+    'post_receipt': ('inventory_receipts', 'batches', 'products', 'inventory_movements', 'inventory_balances'),
+    'finish_production': ('production_orders', 'products', 'inventory_movements', 'inventory_balances'),
+    'take_inventory_snapshots': ('inventory_snapshots',),
+    'rollup_sales': ('sales_daily', 'sales_monthly', 'sales_daily_totals'),
+    'rebuild_sales_rollups': ('sales_daily', 'sales_monthly', 'sales_daily_totals'),
+}
+
+
+def call_procedure(client, name, params):
+    """Call a database function through Supabase RPC or a DB-API connection.
+
+    The Supabase path goes through PostgREST's /rpc endpoint; a psycopg2
+    connection (e.g. a local Postgres with database/sql applied) runs the same
+    function directly, which is what the SQL is tested against.
+    """
+    if hasattr(client, 'rpc'):
+        result = client.rpc(name, params).execute().data
+        invalidate(*PROCEDURE_WRITES.get(name, ()))
+        return result
+
+    arguments = ', '.join(f"{key} => %s" for key in params)
+    values = [json.dumps(value, default=str) if isinstance(value, (dict, list)) else value
+              for value in params.values()]
+    try:
+        with client.cursor() as cur:
+            cur.execute(f"select {name}({arguments})", values)
+            result = cur.fetchone()[0]
+        client.commit()
+        invalidate(*PROCEDURE_WRITES.get(name, ()))
+        return result
+    except Exception:
+        client.rollback()
+        raise
+
+
+def post_sale(client, sale_data, items):
+    """Insert a sale, its items, the stock decrements and the FEFO batch decrements in one transaction.
+
+    Returns {'id', 'invoice_number', 'allocations' (lots sold), 'shortfalls'
+    (quantity not held in any tracked batch)}.
+    """
+    sale = {
+        "invoice_number": sale_data.get("invoice_number"),
+        "customer_name": sale_data.get("customer_name"),
+        "customer_email": sale_data.get("customer_email"),
+        "customer_phone": sale_data.get("customer_phone"),
+        "payment_method": sale_data.get("payment_method"),
+        "total_amount": float(sale_data.get("total_amount") or 0),
+        "sale_date": sale_data.get("sale_date"),
+        "notes": sale_data.get("notes"),
+    }
+    sale_items = [
+        {
+            "product_id": int(item["product_id"]),
+            "product_name": item.get("product_name"),
+            "quantity": float(item["quantity"]),
+            "unit_price": float(item.get("unit_price") or 0),
+            "total_price": float(item.get("total_price") or 0),
+        }
+        for item in items
+    ]
+    return call_procedure(client, 'post_sale', {'p_sale': sale, 'p_items': sale_items})
+
+
+def start_production(client, order_data, requirements):
+    """Open a production order and consume its raw materials and their FEFO batches in one transaction.
+
+    Returns {'id', 'allocations', 'shortfalls'} like post_sale.
+    """
+    order = {
+        "product_id": int(order_data["product_id"]),
+        "product_name": order_data.get("product_name"),
+        "quantity_planned": float(order_data["quantity_planned"]),
+        "start_date": order_data.get("start_date"),
+        "notes": order_data.get("notes"),
+    }
+    materials = [
+        {"raw_material_id": int(req["raw_material_id"]), "quantity": float(req["total_needed"])}
+        for req in requirements
+    ]
+    return call_procedure(client, 'start_production', {'p_order': order, 'p_materials': materials})
+
+
+def post_receipt(client, receipt_data, batch_data=None):
+    """Record a receipt, its stock and moving-average cost update and optional batch in one transaction"""
+    receipt = {
+        "product_id": int(receipt_data["product_id"]),
+        "product_name": receipt_data.get("product_name"),
+        "supplier_id": int(receipt_data["supplier_id"]) if receipt_data.get("supplier_id") is not None else None,
+        "quantity_received": float(receipt_data["quantity_received"]),
+        "unit_cost": float(receipt_data.get("unit_cost") or 0),
+        "receipt_date": receipt_data.get("receipt_date"),
+        "reference_number": receipt_data.get("reference_number"),
+        "notes": receipt_data.get("notes"),
+    }
+    batch = None
+    if batch_data is not None:
+        batch = {
+            "batch_number": batch_data.get("batch_number"),
+            "expiry_date": batch_data.get("expiry_date"),
+            "location": batch_data.get("location"),
+            "notes": batch_data.get("notes"),
+        }
+    return call_procedure(client, 'post_receipt', {'p_receipt': receipt, 'p_batch': batch})
+
+
+def finish_production(client, order_id, quantity):
+    """Complete an in-progress order and book its output at the cost of the materials consumed"""
+    return call_procedure(client, 'finish_production', {'p_order_id': int(order_id), 'p_quantity': float(quantity)})
+
+
+def consume_batches(client, allocations, source_type, source_id=None):
+    """Apply FEFO batch decrements in one call and record the lot assignments"""
+    payload = [
+        {"batch_id": int(a["batch_id"]), "product_id": int(a["product_id"]), "quantity": float(a["quantity"])}
+        for a in allocations
+    ]
+    return call_procedure(client, 'consume_batches', {
+        'p_allocations': payload,
+        'p_source_type': source_type,
+        'p_source_id': int(source_id) if source_id is not None else None,
+    })
@@ -1,4 +1,8 @@
 import streamlit as st
+from pathlib import Path
+
+SQL_DIR = Path(__file__).parent / "sql"
+
 
 def create_tables(supabase_client):
     """Verify database connection - tables should be created in Supabase dashboard"""
@@ -6,9 +10,22 @@ def create_tables(supabase_client):
         # Test connection by trying to access a table
         # Tables should be created through Supabase dashboard, not programmatically
         st.info("✅ Database connected. Ensure tables exist in Supabase dashboard:")
-        st.info("Tables needed: suppliers, products, bill_of_materials, transactions, sales, sales_items, raw_material_batches, receiving_quality_checks")
+        st.info("Run the scripts in database/sql (in file order) in the Supabase SQL editor")
         return True
-        
+
     except Exception as e:
         st.error(f"❌ Database connection test failed: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+def sql_files():
+    """SQL scripts for tables and functions, in the order they must be applied"""
+    return sorted(SQL_DIR.glob("*.sql"))
+
+
+def apply_sql_files(pg_connection):
+    """Apply database/sql to a Postgres connection (e.g. a local test database)"""
+    with pg_connection.cursor() as cur:
+        for path in sql_files():
+            cur.execute(path.read_text())
+    pg_connection.commit()
@@ -0,0 +1,93 @@
+-- Core tables used by the app. Supabase already has these; this file lets
+-- the same schema be created on a local Postgres for testing.
+
+create table if not exists suppliers (
+    id bigserial primary key,
+    name text not null,
+    contact text,
+    phone text,
+    email text,
+    raw_materials text,
+    category_codes text
+);
+
+create table if not exists products (
+    id bigserial primary key,
+    name text not null,
+    sku text unique,
+    product_type text check (product_type in ('raw', 'finished')) default 'raw',
+    category text,
+    category_code text,
+    quantity_in_stock numeric not null default 0,
+    price_paid numeric default 0,
+    price_selling numeric default 0,
+    supplier_id bigint references suppliers (id),
+    notes text
+);
+
+create table if not exists bill_of_materials (
+    id bigserial primary key,
+    finished_product_id bigint not null references products (id),
+    raw_material_id bigint not null references products (id),
+    quantity_required numeric not null,
+    product_volume numeric default 0,
+    product_name text
+);
+
+create table if not exists sales (
+    id bigserial primary key,
+    invoice_number text,
+    customer_name text,
+    customer_email text,
+    customer_phone text,
+    payment_method text,
+    total_amount numeric not null default 0,
+    sale_date timestamptz not null default now(),
+    notes text
+);
+
+create table if not exists sale_items (
+    id bigserial primary key,
+    sale_id bigint not null references sales (id),
+    product_id bigint not null references products (id),
+    product_name text,
+    quantity numeric not null,
+    unit_price numeric not null default 0,
+    total_price numeric not null default 0
+);
+
+create table if not exists production_orders (
+    id bigserial primary key,
+    product_id bigint not null references products (id),
+    product_name text,
+    quantity_planned numeric not null,
+    quantity_produced numeric,
+    start_date timestamptz default now(),
+    end_date timestamptz,
+    status text default 'planned',
+    notes text
+);
+
+create table if not exists inventory_receipts (
+    id bigserial primary key,
+    product_id bigint not null references products (id),
+    product_name text,
+    supplier_id bigint references suppliers (id),
+    quantity_received numeric not null,
+    unit_cost numeric default 0,
+    total_cost numeric default 0,
+    receipt_date date not null default current_date,
+    reference_number text,
+    notes text
+);
+
+create table if not exists batches (
+    id bigserial primary key,
+    product_id bigint not null references products (id),
+    batch_number text,
+    quantity numeric not null default 0,
+    receipt_id bigint references inventory_receipts (id),
+    expiry_date date,
+    location text,
+    notes text
+);
@@ -0,0 +1,94 @@
+-- post_sale(p_sale, p_items)
+--
+-- Posts a sale header, all of its items, the matching stock decrements and
+-- the FEFO batch decrements in one transaction. Product rows are locked before the stock check so two
+-- concurrent sales of the same product cannot both pass it, and stock is
+-- decremented relative to the current row value rather than a client copy.
+--
+-- p_sale:  {"invoice_number", "customer_name", "customer_email", "customer_phone",
+--           "payment_method", "total_amount", "sale_date", "notes"}
+-- p_items: [{"product_id", "product_name", "quantity", "unit_price", "total_price"}, ...]
+--
+-- Returns {"id": <sale id>, "invoice_number": <invoice number>,
+--          "allocations": [...], "shortfalls": [...]} (see allocate_batches in 06_fefo.sql).
+
+create or replace function post_sale(p_sale jsonb, p_items jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_sale_id bigint;
+    v_short record;
+    v_lots jsonb;
+begin
+    if p_items is null or jsonb_array_length(p_items) = 0 then
+        raise exception 'Sale has no items';
+    end if;
+
+    -- Lock in id order to avoid deadlocks between concurrent sales
+    perform 1
+    from products p
+    where p.id in (
+        select item.product_id
+        from jsonb_to_recordset(p_items) as item(product_id bigint)
+    )
+    order by p.id
+    for update;
+
+    select d.product_id, d.quantity, p.quantity_in_stock
+    into v_short
+    from (
+        select item.product_id, sum(item.quantity) as quantity
+        from jsonb_to_recordset(p_items) as item(product_id bigint, quantity numeric)
+        group by item.product_id
+    ) d
+    left join products p on p.id = d.product_id
+    where p.id is null or p.quantity_in_stock < d.quantity
+    limit 1;
+
+    if found then
+        raise exception 'Insufficient stock for product %: requested %, available %',
+            v_short.product_id, v_short.quantity, coalesce(v_short.quantity_in_stock, 0);
+    end if;
+
+    insert into sales (
+        invoice_number, customer_name, customer_email, customer_phone,
+        payment_method, total_amount, sale_date, notes
+    )
+    values (
+        p_sale->>'invoice_number',
+        p_sale->>'customer_name',
+        p_sale->>'customer_email',
+        p_sale->>'customer_phone',
+        p_sale->>'payment_method',
+        coalesce((p_sale->>'total_amount')::numeric, 0),
+        coalesce((p_sale->>'sale_date')::timestamptz, now()),
+        p_sale->>'notes'
+    )
+    returning id into v_sale_id;
+
+    insert into sale_items (sale_id, product_id, product_name, quantity, unit_price, total_price)
+    select v_sale_id, item.product_id, item.product_name, item.quantity,
+           coalesce(item.unit_price, 0), coalesce(item.total_price, item.quantity * coalesce(item.unit_price, 0))
+    from jsonb_to_recordset(p_items) as item(
+        product_id bigint, product_name text, quantity numeric, unit_price numeric, total_price numeric
+    );
+
+    -- Stock moves through the inventory ledger (09_inventory_ledger.sql)
+    perform record_movement(d.product_id, 'sale', -d.quantity, null, 'sale', v_sale_id)
+    from (
+        select item.product_id, sum(item.quantity) as quantity
+        from jsonb_to_recordset(p_items) as item(product_id bigint, quantity numeric)
+        group by item.product_id
+        order by item.product_id
+    ) d;
+
+    -- Lots sold, earliest expiry first (06_fefo.sql)
+    v_lots := allocate_batches(p_items, 'sale', v_sale_id);
+
+    -- Daily and monthly sales rollups (11_sales_rollups.sql)
+    perform rollup_sales(jsonb_build_array(v_sale_id));
+
+    return jsonb_build_object('id', v_sale_id, 'invoice_number', p_sale->>'invoice_number') || v_lots;
+end;
+$$;
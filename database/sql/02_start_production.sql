@@ -0,0 +1,99 @@
+-- production_consumption records the raw materials each production order
+-- consumed (the Supabase counterpart of the old work_order_consumption table).
+
+create table if not exists production_consumption (
+    id bigserial primary key,
+    production_order_id bigint not null references production_orders (id),
+    raw_material_id bigint not null references products (id),
+    quantity_consumed numeric not null,
+    consumed_at timestamptz not null default now()
+);
+
+create index if not exists production_consumption_order_idx
+    on production_consumption (production_order_id);
+
+-- start_production(p_order, p_materials)
+--
+-- Opens a production order and consumes its raw materials, and the FEFO batches
+-- they are drawn from, in one transaction.
+-- Material rows are locked and availability is re-checked at commit time, so
+-- a stale "Check Materials" result can never drive stock negative. If any
+-- material is short the whole call fails and nothing is written.
+--
+-- p_order:     {"product_id", "product_name", "quantity_planned", "start_date", "notes"}
+-- p_materials: [{"raw_material_id", "quantity"}, ...]
+--
+-- Returns {"id": <production order id>, "allocations": [...], "shortfalls": [...]}
+-- (see allocate_batches in 06_fefo.sql).
+
+create or replace function start_production(p_order jsonb, p_materials jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_order_id bigint;
+    v_shortages text;
+    v_lots jsonb;
+begin
+    perform 1
+    from products p
+    where p.id in (
+        select m.raw_material_id
+        from jsonb_to_recordset(p_materials) as m(raw_material_id bigint)
+    )
+    order by p.id
+    for update;
+
+    select string_agg(
+               format('%s (need %s, have %s)', coalesce(p.name, d.raw_material_id::text),
+                      d.quantity, coalesce(p.quantity_in_stock, 0)),
+               ', ')
+    into v_shortages
+    from (
+        select m.raw_material_id, sum(m.quantity) as quantity
+        from jsonb_to_recordset(p_materials) as m(raw_material_id bigint, quantity numeric)
+        group by m.raw_material_id
+    ) d
+    left join products p on p.id = d.raw_material_id
+    where p.id is null or p.quantity_in_stock < d.quantity;
+
+    if v_shortages is not null then
+        raise exception 'Insufficient materials: %', v_shortages;
+    end if;
+
+    insert into production_orders (product_id, product_name, quantity_planned, start_date, status, notes)
+    values (
+        (p_order->>'product_id')::bigint,
+        p_order->>'product_name',
+        (p_order->>'quantity_planned')::numeric,
+        coalesce((p_order->>'start_date')::timestamptz, now()),
+        'in_progress',
+        p_order->>'notes'
+    )
+    returning id into v_order_id;
+
+    insert into production_consumption (production_order_id, raw_material_id, quantity_consumed)
+    select v_order_id, m.raw_material_id, sum(m.quantity)
+    from jsonb_to_recordset(p_materials) as m(raw_material_id bigint, quantity numeric)
+    group by m.raw_material_id;
+
+    -- Stock moves through the inventory ledger (09_inventory_ledger.sql)
+    perform record_movement(d.raw_material_id, 'consumption', -d.quantity, null, 'production_order', v_order_id)
+    from (
+        select m.raw_material_id, sum(m.quantity) as quantity
+        from jsonb_to_recordset(p_materials) as m(raw_material_id bigint, quantity numeric)
+        group by m.raw_material_id
+        order by m.raw_material_id
+    ) d;
+
+    -- Material lots consumed, earliest expiry first (06_fefo.sql)
+    select allocate_batches(
+        coalesce(jsonb_agg(jsonb_build_object('product_id', m.raw_material_id, 'quantity', m.quantity)), '[]'::jsonb),
+        'production_order', v_order_id
+    )
+    into v_lots
+    from jsonb_to_recordset(p_materials) as m(raw_material_id bigint, quantity numeric);
+
+    return jsonb_build_object('id', v_order_id) || v_lots;
+end;
+$$;
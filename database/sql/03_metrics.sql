@@ -0,0 +1,70 @@
+-- Aggregations for the dashboard and sales summary. Each function returns a
+-- single small JSON object so payload size does not grow with the tables.
+
+create index if not exists sales_sale_date_idx on sales (sale_date);
+create index if not exists products_type_stock_idx on products (product_type, quantity_in_stock);
+
+-- sales_summary(p_today)
+-- Returns {"sales_count", "sales_total", "sales_average", "sales_today"}.
+create or replace function sales_summary(p_today date default current_date)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'sales_count', count(*),
+        'sales_total', coalesce(sum(total_amount), 0),
+        'sales_average', coalesce(avg(total_amount), 0),
+        'sales_today', coalesce(sum(total_amount) filter (
+            where sale_date >= p_today and sale_date < p_today + 1
+        ), 0)
+    )
+    from sales;
+$$;
+
+-- inventory_summary(p_low_stock_threshold)
+-- Returns per product_type counts and values, e.g. {"raw_count", "raw_low_stock",
+-- "raw_out_of_stock", "raw_inventory_value", "raw_total_quantity", "finished_count", ...}.
+create or replace function inventory_summary(p_low_stock_threshold numeric default 10)
+returns jsonb
+language sql
+stable
+as $$
+    select coalesce(jsonb_object_agg(key, value), '{}'::jsonb)
+    from (
+        select t.product_type || '_' || kv.key as key, kv.value
+        from (
+            select
+                product_type,
+                count(*) as count,
+                count(*) filter (where quantity_in_stock <= p_low_stock_threshold) as low_stock,
+                count(*) filter (where quantity_in_stock = 0) as out_of_stock,
+                coalesce(sum(quantity_in_stock * coalesce(price_paid, 0)), 0) as inventory_value,
+                coalesce(sum(quantity_in_stock), 0) as total_quantity
+            from products
+            group by product_type
+        ) t
+        cross join lateral jsonb_each(jsonb_build_object(
+            'count', t.count,
+            'low_stock', t.low_stock,
+            'out_of_stock', t.out_of_stock,
+            'inventory_value', t.inventory_value,
+            'total_quantity', t.total_quantity
+        )) kv
+    ) flattened;
+$$;
+
+-- dashboard_metrics(p_today, p_low_stock_threshold)
+-- Everything the dashboard header needs in one round trip.
+create or replace function dashboard_metrics(
+    p_today date default current_date,
+    p_low_stock_threshold numeric default 10
+)
+returns jsonb
+language sql
+stable
+as $$
+    select sales_summary(p_today)
+        || inventory_summary(p_low_stock_threshold)
+        || jsonb_build_object('supplier_count', (select count(*) from suppliers));
+$$;
@@ -0,0 +1,23 @@
+-- product_filter_options()
+-- Distinct product types and categories for filter dropdowns, so the client
+-- never has to download the catalog just to build option lists.
+-- Returns {"product_types": [...], "categories": [...]}.
+
+create index if not exists products_category_idx on products (category);
+
+create or replace function product_filter_options()
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'product_types', coalesce(
+            (select jsonb_agg(product_type order by product_type)
+             from (select distinct product_type from products where product_type is not null) t),
+            '[]'::jsonb),
+        'categories', coalesce(
+            (select jsonb_agg(category order by category)
+             from (select distinct category from products where category is not null and category <> '') c),
+            '[]'::jsonb)
+    );
+$$;
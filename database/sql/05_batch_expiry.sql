@@ -0,0 +1,7 @@
+-- Serves the expiring-batches query on the raw materials page:
+--   select ... from batches
+--   where expiry_date between today and today + N and quantity > 0
+--   order by expiry_date
+-- The range scan touches only the window instead of the full batch history.
+
+create index if not exists batches_expiry_date_idx on batches (expiry_date);
@@ -0,0 +1,153 @@
+-- First-expiry-first-out batch consumption.
+--
+-- post_sale and start_production call allocate_batches() in their own
+-- transaction, so batches.quantity moves together with
+-- products.quantity_in_stock. consume_batches() applies an explicit list of
+-- per-batch decrements (e.g. a manual correction). Both record the lot
+-- assignments in batch_allocations for traceability.
+
+create index if not exists batches_product_expiry_idx on batches (product_id, expiry_date);
+
+create table if not exists batch_allocations (
+    id bigserial primary key,
+    batch_id bigint not null references batches (id),
+    product_id bigint not null references products (id),
+    quantity numeric not null,
+    source_type text not null,
+    source_id bigint,
+    allocated_at timestamptz not null default now()
+);
+
+create index if not exists batch_allocations_source_idx on batch_allocations (source_type, source_id);
+
+-- consume_batches(p_allocations, p_source_type, p_source_id)
+--
+-- p_allocations: [{"batch_id", "product_id", "quantity"}, ...]
+-- Decrements each batch only if it still holds enough stock; if any batch
+-- changed since it was read, the whole call fails so the caller can re-plan.
+-- Returns the number of batches updated.
+
+create or replace function consume_batches(p_allocations jsonb, p_source_type text, p_source_id bigint default null)
+returns integer
+language plpgsql
+as $$
+declare
+    v_expected integer;
+    v_updated integer;
+begin
+    select count(distinct a.batch_id)
+    into v_expected
+    from jsonb_to_recordset(p_allocations) as a(batch_id bigint);
+
+    update batches b
+    set quantity = b.quantity - a.quantity
+    from (
+        select a.batch_id, sum(a.quantity) as quantity
+        from jsonb_to_recordset(p_allocations) as a(batch_id bigint, quantity numeric)
+        group by a.batch_id
+    ) a
+    where b.id = a.batch_id
+      and b.quantity >= a.quantity;
+
+    get diagnostics v_updated = row_count;
+
+    if v_updated <> v_expected then
+        raise exception 'Batch quantities changed during allocation (% of % batches updated)',
+            v_updated, v_expected;
+    end if;
+
+    insert into batch_allocations (batch_id, product_id, quantity, source_type, source_id)
+    select a.batch_id, a.product_id, a.quantity, p_source_type, p_source_id
+    from jsonb_to_recordset(p_allocations) as a(batch_id bigint, product_id bigint, quantity numeric);
+
+    return v_updated;
+end;
+$$;
+
+-- allocate_batches(p_lines, p_source_type, p_source_id)
+--
+-- p_lines: [{"product_id", "quantity"}, ...]
+-- Draws each product's quantity from its open batches, earliest expiry first
+-- (batches without an expiry date last). Batch rows are locked, so callers
+-- that already hold the product row locks see a consistent set. Stock not
+-- held in any tracked batch is reported, not rejected: products.quantity_in_stock
+-- is checked by the caller.
+-- Set-based, so a sale of thousands of lines is one update and one insert:
+-- a batch is drawn from when the batches ahead of it (by expiry) hold less
+-- than the quantity needed, and gives the smaller of its quantity and what
+-- is still needed after them.
+-- Returns {"allocations": [{"product_id", "batch_id", "batch_number", "expiry_date", "quantity"}, ...],
+--          "shortfalls": [{"product_id", "quantity"}, ...]}.
+
+create or replace function allocate_batches(p_lines jsonb, p_source_type text, p_source_id bigint default null)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_result jsonb;
+begin
+    perform 1
+    from batches b
+    where b.product_id in (select l.product_id from jsonb_to_recordset(p_lines) as l(product_id bigint))
+      and b.quantity > 0
+    order by b.id
+    for update;
+
+    with lines as (
+        select l.product_id, sum(l.quantity) as quantity
+        from jsonb_to_recordset(p_lines) as l(product_id bigint, quantity numeric)
+        group by l.product_id
+    ),
+    ranked as (
+        select b.id, b.product_id, b.batch_number, b.expiry_date, b.quantity, l.quantity as needed,
+               coalesce(sum(b.quantity) over (
+                   partition by b.product_id order by b.expiry_date nulls last, b.id
+                   rows between unbounded preceding and 1 preceding
+               ), 0) as ahead,
+               row_number() over (order by b.product_id, b.expiry_date nulls last, b.id) as position
+        from batches b
+        join lines l on l.product_id = b.product_id
+        where b.quantity > 0
+    ),
+    taken as (
+        select id, product_id, batch_number, expiry_date, least(quantity, needed - ahead) as quantity, position
+        from ranked
+        where ahead < needed
+    ),
+    decremented as (
+        update batches b
+        set quantity = b.quantity - t.quantity
+        from taken t
+        where b.id = t.id
+    ),
+    recorded as (
+        insert into batch_allocations (batch_id, product_id, quantity, source_type, source_id)
+        select id, product_id, quantity, p_source_type, p_source_id
+        from taken
+        order by position
+    ),
+    shortfalls as (
+        select l.product_id, l.quantity - coalesce(sum(t.quantity), 0) as quantity
+        from lines l
+        left join taken t on t.product_id = l.product_id
+        group by l.product_id, l.quantity
+        having l.quantity - coalesce(sum(t.quantity), 0) > 0
+    )
+    select jsonb_build_object(
+        'allocations', coalesce((
+            select jsonb_agg(jsonb_build_object(
+                'product_id', product_id, 'batch_id', id, 'batch_number', batch_number,
+                'expiry_date', expiry_date, 'quantity', quantity
+            ) order by position)
+            from taken
+        ), '[]'::jsonb),
+        'shortfalls', coalesce((
+            select jsonb_agg(jsonb_build_object('product_id', product_id, 'quantity', quantity) order by product_id)
+            from shortfalls
+        ), '[]'::jsonb)
+    )
+    into v_result;
+
+    return v_result;
+end;
+$$;
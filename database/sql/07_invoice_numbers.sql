@@ -0,0 +1,37 @@
+-- Invoice numbering.
+--
+-- Invoice numbers come from a sequence, so they are unique across every
+-- session and process. Clients reserve a block per round trip
+-- (database/invoice_numbers.py) and hand numbers out locally; numbers from a
+-- block that is never used are simply skipped, so gaps are expected.
+
+create sequence if not exists invoice_number_seq;
+
+-- reserve_invoice_numbers(p_count)
+--
+-- Returns p_count fresh sequence values, ascending.
+
+create or replace function reserve_invoice_numbers(p_count integer default 100)
+returns bigint[]
+language sql
+volatile
+as $$
+    select array_agg(n order by n)
+    from (
+        select nextval('invoice_number_seq') as n
+        from generate_series(1, greatest(p_count, 1))
+    ) reserved;
+$$;
+
+-- Backstop for numbers issued any other way (manual entry, older clients).
+-- Sales without a number are allowed. Adding the constraint fails if
+-- existing sales already repeat a number; list them with
+--   select invoice_number, count(*) from sales group by 1 having count(*) > 1;
+-- and renumber them before applying this file.
+do $$
+begin
+    if not exists (select 1 from pg_constraint where conname = 'sales_invoice_number_key') then
+        alter table sales add constraint sales_invoice_number_key unique (invoice_number);
+    end if;
+end;
+$$;
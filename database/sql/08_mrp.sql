@@ -0,0 +1,13 @@
+-- Materials requirements planning (utils/mrp.py)
+--
+-- Receipts recorded on the receiving page are already in quantity_in_stock.
+-- A receipt with status 'open' is an expected delivery (ordered, not yet
+-- received); MRP nets those against shortages as on-order quantity.
+
+alter table inventory_receipts add column if not exists status text not null default 'received';
+
+create index if not exists inventory_receipts_open_idx
+    on inventory_receipts (product_id) where status = 'open';
+
+-- MRP reads every planned and in-progress order
+create index if not exists production_orders_status_idx on production_orders (status);
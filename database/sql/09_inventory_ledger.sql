@@ -0,0 +1,377 @@
+-- Inventory movement ledger (database/ledger.py)
+--
+-- Every stock change appends one inventory_movements row carrying the running
+-- balance, value and moving-average cost of that product after the movement.
+-- inventory_balances holds the latest of those per product, so valuation,
+-- COGS and stock-at-date queries read a balance or a movement range instead
+-- of recomputing from products and receipts.
+--
+-- Movements are stamped when they are posted (not with the receipt or sale
+-- date entered on a form), so balances are in time order per product. The
+-- stamp is clock_timestamp(), taken while the product's balance row is
+-- locked, not now(): now() is the transaction start, so a posting that
+-- started first but waited for the lock would get an earlier moved_at than
+-- the movement it follows, and as-of lookups would pick the wrong balance.
+--
+-- Cost rules: inbound movements with a unit cost (receipts, production
+-- output) update the moving average; everything else moves at the current
+-- average. products.price_paid follows the average on receipts, as the
+-- receiving form used to compute it client-side.
+
+create table if not exists inventory_movements (
+    id bigserial primary key,
+    product_id bigint not null references products (id),
+    movement_type text not null
+        check (movement_type in ('opening', 'receipt', 'sale', 'consumption', 'output', 'adjustment')),
+    quantity numeric not null,
+    unit_cost numeric not null default 0,
+    value numeric not null default 0,
+    balance_quantity numeric not null,
+    balance_value numeric not null,
+    average_cost numeric not null,
+    source_type text,
+    source_id bigint,
+    moved_at timestamptz not null default clock_timestamp()
+);
+
+alter table inventory_movements alter column moved_at set default clock_timestamp();
+
+create index if not exists inventory_movements_product_idx on inventory_movements (product_id, moved_at, id);
+create index if not exists inventory_movements_type_date_idx on inventory_movements (movement_type, moved_at);
+create index if not exists inventory_movements_source_idx on inventory_movements (source_type, source_id);
+
+create table if not exists inventory_balances (
+    product_id bigint primary key references products (id),
+    quantity numeric not null default 0,
+    value numeric not null default 0,
+    average_cost numeric not null default 0,
+    last_movement_id bigint,
+    updated_at timestamptz not null default now()
+);
+
+-- apply_inventory_movement(...)
+--
+-- Appends a movement and advances the product's balance; does not touch
+-- products (record_movement and the products trigger do that side).
+-- p_fallback_cost prices movements for a product with no average yet.
+
+create or replace function apply_inventory_movement(
+    p_product_id bigint,
+    p_movement_type text,
+    p_quantity numeric,
+    p_unit_cost numeric default null,
+    p_source_type text default null,
+    p_source_id bigint default null,
+    p_fallback_cost numeric default 0
+)
+returns inventory_movements
+language plpgsql
+as $$
+declare
+    v_balance inventory_balances;
+    v_cost numeric;
+    v_average numeric;
+    v_quantity numeric;
+    v_movement inventory_movements;
+begin
+    insert into inventory_balances (product_id) values (p_product_id) on conflict do nothing;
+    select * into v_balance from inventory_balances where product_id = p_product_id for update;
+
+    v_cost := case
+        when p_quantity > 0 and p_unit_cost is not null then p_unit_cost
+        when v_balance.average_cost > 0 then v_balance.average_cost
+        else coalesce(p_fallback_cost, 0)
+    end;
+    v_quantity := v_balance.quantity + p_quantity;
+    v_average := case
+        when p_quantity > 0 and v_balance.quantity > 0 and v_quantity > 0
+            then (v_balance.quantity * v_balance.average_cost + p_quantity * v_cost) / v_quantity
+        when p_quantity > 0 or v_balance.average_cost = 0 then v_cost
+        else v_balance.average_cost
+    end;
+
+    insert into inventory_movements (
+        product_id, movement_type, quantity, unit_cost, value,
+        balance_quantity, balance_value, average_cost, source_type, source_id
+    )
+    values (
+        p_product_id, p_movement_type, p_quantity, v_cost, p_quantity * v_cost,
+        v_quantity, v_quantity * v_average, v_average, p_source_type, p_source_id
+    )
+    returning * into v_movement;
+
+    update inventory_balances
+    set quantity = v_quantity,
+        value = v_quantity * v_average,
+        average_cost = v_average,
+        last_movement_id = v_movement.id,
+        updated_at = v_movement.moved_at
+    where product_id = p_product_id;
+
+    return v_movement;
+end;
+$$;
+
+-- record_movement(p_product_id, p_movement_type, p_quantity, p_unit_cost, p_source_type, p_source_id)
+--
+-- Moves stock: appends the movement and applies it to products.quantity_in_stock
+-- (and price_paid for receipts). Used by the posting functions below and in
+-- 01_post_sale.sql / 02_start_production.sql. Returns the movement as JSON.
+
+create or replace function record_movement(
+    p_product_id bigint,
+    p_movement_type text,
+    p_quantity numeric,
+    p_unit_cost numeric default null,
+    p_source_type text default null,
+    p_source_id bigint default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_product products;
+    v_movement inventory_movements;
+begin
+    select * into v_product from products where id = p_product_id for update;
+    if not found then
+        raise exception 'Unknown product %', p_product_id;
+    end if;
+
+    v_movement := apply_inventory_movement(
+        p_product_id, p_movement_type, p_quantity, p_unit_cost, p_source_type, p_source_id,
+        v_product.price_paid
+    );
+
+    -- The balance already matches, so the products trigger records nothing more
+    update products
+    set quantity_in_stock = v_movement.balance_quantity,
+        price_paid = case when p_movement_type = 'receipt' then v_movement.average_cost else price_paid end
+    where id = p_product_id;
+
+    return to_jsonb(v_movement);
+end;
+$$;
+
+-- Stock edits made outside the posting functions (new products, imports,
+-- manual corrections) are recorded as opening or adjustment movements.
+
+create or replace function products_stock_ledger()
+returns trigger
+language plpgsql
+as $$
+declare
+    v_balance numeric;
+    v_has_balance boolean;
+begin
+    select quantity into v_balance from inventory_balances where product_id = new.id;
+    v_has_balance := found;
+    if coalesce(new.quantity_in_stock, 0) <> coalesce(v_balance, 0) then
+        perform apply_inventory_movement(
+            new.id,
+            case when v_has_balance then 'adjustment' else 'opening' end,
+            coalesce(new.quantity_in_stock, 0) - coalesce(v_balance, 0),
+            null, 'products', new.id, new.price_paid
+        );
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists products_stock_ledger on products;
+create trigger products_stock_ledger
+    after insert or update of quantity_in_stock on products
+    for each row execute function products_stock_ledger();
+
+-- Opening balances for stock that predates the ledger
+insert into inventory_movements (
+    product_id, movement_type, quantity, unit_cost, value,
+    balance_quantity, balance_value, average_cost, source_type, source_id
+)
+select p.id, 'opening', p.quantity_in_stock, coalesce(p.price_paid, 0),
+       p.quantity_in_stock * coalesce(p.price_paid, 0), p.quantity_in_stock,
+       p.quantity_in_stock * coalesce(p.price_paid, 0), coalesce(p.price_paid, 0), 'products', p.id
+from products p
+where p.quantity_in_stock <> 0
+  and not exists (select 1 from inventory_balances b where b.product_id = p.id);
+
+insert into inventory_balances (product_id, quantity, value, average_cost, last_movement_id, updated_at)
+select m.product_id, m.balance_quantity, m.balance_value, m.average_cost, m.id, m.moved_at
+from inventory_movements m
+where m.movement_type = 'opening'
+on conflict (product_id) do nothing;
+
+-- post_receipt(p_receipt, p_batch)
+--
+-- Records a delivery: the receipt row, the stock and moving-average cost
+-- update through the ledger and, optionally, its batch.
+--
+-- p_receipt: {"product_id", "product_name", "supplier_id", "quantity_received", "unit_cost",
+--             "receipt_date", "reference_number", "notes"}
+-- p_batch:   {"batch_number", "expiry_date", "location", "notes"} or null
+--
+-- Returns {"id", "quantity_in_stock", "average_cost", "batch_id"}.
+
+create or replace function post_receipt(p_receipt jsonb, p_batch jsonb default null)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_receipt_id bigint;
+    v_batch_id bigint;
+    v_quantity numeric := (p_receipt->>'quantity_received')::numeric;
+    v_unit_cost numeric := coalesce((p_receipt->>'unit_cost')::numeric, 0);
+    v_movement jsonb;
+begin
+    if v_quantity is null or v_quantity <= 0 then
+        raise exception 'Quantity received must be positive';
+    end if;
+
+    insert into inventory_receipts (
+        product_id, product_name, supplier_id, quantity_received, unit_cost, total_cost,
+        receipt_date, reference_number, notes
+    )
+    values (
+        (p_receipt->>'product_id')::bigint,
+        p_receipt->>'product_name',
+        (p_receipt->>'supplier_id')::bigint,
+        v_quantity,
+        v_unit_cost,
+        v_quantity * v_unit_cost,
+        coalesce((p_receipt->>'receipt_date')::date, current_date),
+        p_receipt->>'reference_number',
+        p_receipt->>'notes'
+    )
+    returning id into v_receipt_id;
+
+    v_movement := record_movement(
+        (p_receipt->>'product_id')::bigint, 'receipt', v_quantity, v_unit_cost, 'inventory_receipt', v_receipt_id
+    );
+
+    if p_receipt->>'supplier_id' is not null then
+        update products set supplier_id = (p_receipt->>'supplier_id')::bigint
+        where id = (p_receipt->>'product_id')::bigint;
+    end if;
+
+    if p_batch is not null then
+        insert into batches (product_id, batch_number, quantity, receipt_id, expiry_date, location, notes)
+        values (
+            (p_receipt->>'product_id')::bigint,
+            coalesce(nullif(p_batch->>'batch_number', ''), 'BATCH-' || v_receipt_id),
+            v_quantity,
+            v_receipt_id,
+            (p_batch->>'expiry_date')::date,
+            p_batch->>'location',
+            p_batch->>'notes'
+        )
+        returning id into v_batch_id;
+    end if;
+
+    return jsonb_build_object(
+        'id', v_receipt_id,
+        'quantity_in_stock', v_movement->'balance_quantity',
+        'average_cost', v_movement->'average_cost',
+        'batch_id', v_batch_id
+    );
+end;
+$$;
+
+-- finish_production(p_order_id, p_quantity)
+--
+-- Completes an in-progress order and books its output into stock at the
+-- ledger cost of the materials it consumed.
+-- Returns {"id", "quantity_in_stock", "unit_cost"}.
+
+create or replace function finish_production(p_order_id bigint, p_quantity numeric)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_order production_orders;
+    v_cost numeric;
+    v_movement jsonb;
+begin
+    select * into v_order from production_orders where id = p_order_id for update;
+    if not found or v_order.status <> 'in_progress' then
+        raise exception 'Production order % is not in progress', p_order_id;
+    end if;
+    if p_quantity is null or p_quantity <= 0 then
+        raise exception 'Quantity produced must be positive';
+    end if;
+
+    select coalesce(-sum(value), 0) into v_cost
+    from inventory_movements
+    where source_type = 'production_order' and source_id = p_order_id and movement_type = 'consumption';
+
+    update production_orders
+    set status = 'completed', end_date = now(), quantity_produced = p_quantity
+    where id = p_order_id;
+
+    v_movement := record_movement(
+        v_order.product_id, 'output', p_quantity, v_cost / p_quantity, 'production_order', p_order_id
+    );
+
+    return jsonb_build_object(
+        'id', p_order_id,
+        'quantity_in_stock', v_movement->'balance_quantity',
+        'unit_cost', v_cost / p_quantity
+    );
+end;
+$$;
+
+-- inventory_summary(p_low_stock_threshold)
+-- Replaces the 03_metrics.sql version: inventory value now comes from the
+-- ledger balances (moving-average cost) rather than quantity * price_paid.
+create or replace function inventory_summary(p_low_stock_threshold numeric default 10)
+returns jsonb
+language sql
+stable
+as $$
+    select coalesce(jsonb_object_agg(key, value), '{}'::jsonb)
+    from (
+        select t.product_type || '_' || kv.key as key, kv.value
+        from (
+            select
+                p.product_type,
+                count(*) as count,
+                count(*) filter (where p.quantity_in_stock <= p_low_stock_threshold) as low_stock,
+                count(*) filter (where p.quantity_in_stock = 0) as out_of_stock,
+                coalesce(sum(b.value), 0) as inventory_value,
+                coalesce(sum(p.quantity_in_stock), 0) as total_quantity
+            from products p
+            left join inventory_balances b on b.product_id = p.id
+            group by p.product_type
+        ) t
+        cross join lateral jsonb_each(jsonb_build_object(
+            'count', t.count,
+            'low_stock', t.low_stock,
+            'out_of_stock', t.out_of_stock,
+            'inventory_value', t.inventory_value,
+            'total_quantity', t.total_quantity
+        )) kv
+    ) flattened;
+$$;
+
+-- cost_of_goods_sold(p_start, p_end)
+-- Cost of sale movements with moved_at in [p_start, p_end), at the moving
+-- average at the time of each sale.
+-- Returns {"cogs", "units", "by_product": [{"product_id", "units", "cogs"}, ...]}.
+create or replace function cost_of_goods_sold(p_start date, p_end date)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'cogs', coalesce(sum(t.cogs), 0),
+        'units', coalesce(sum(t.units), 0),
+        'by_product', coalesce(jsonb_agg(jsonb_build_object(
+            'product_id', t.product_id, 'units', t.units, 'cogs', t.cogs
+        ) order by t.cogs desc), '[]'::jsonb)
+    )
+    from (
+        select product_id, -sum(quantity) as units, -sum(value) as cogs
+        from inventory_movements
+        where movement_type = 'sale' and moved_at >= p_start and moved_at < p_end
+        group by product_id
+    ) t;
+$$;
@@ -0,0 +1,144 @@
+-- Daily inventory checkpoints for point-in-time stock (database/ledger.py)
+--
+-- inventory_snapshots holds every product's ledger balance at the end of each
+-- day (days in the database time zone). Products at zero are not stored. A
+-- catalog-wide "stock as of T" reads the last checkpoint before T and
+-- replays only the movements after it. Movements carry running balances, so
+-- replaying means taking each product's last movement in that window.
+--
+-- Snapshots are built incrementally: each day is the previous day's
+-- snapshot plus that day's movements. take_inventory_snapshots() fills any
+-- missing days up to yesterday. It runs nightly through pg_cron where that
+-- extension is installed (scheduled at the end of this file); elsewhere the
+-- Stock Ledger tab has a button for it. Page views never write checkpoints.
+-- Missing checkpoints only make as-of queries replay more movements.
+
+create table if not exists inventory_snapshots (
+    snapshot_date date not null,
+    product_id bigint not null references products (id),
+    quantity numeric not null,
+    value numeric not null,
+    average_cost numeric not null,
+    last_movement_id bigint,
+    primary key (snapshot_date, product_id)
+);
+
+create index if not exists inventory_snapshots_product_idx on inventory_snapshots (product_id, snapshot_date);
+
+-- Each snapshot day reads one day of movements across all products
+create index if not exists inventory_movements_moved_at_idx on inventory_movements (moved_at);
+
+-- take_inventory_snapshots(p_through)
+-- Returns the number of days added.
+create or replace function take_inventory_snapshots(p_through date default current_date - 1)
+returns integer
+language plpgsql
+as $$
+declare
+    v_day date;
+    v_days integer := 0;
+begin
+    -- One writer at a time; a concurrent caller waits and then finds nothing to do
+    perform pg_advisory_xact_lock(hashtext('take_inventory_snapshots'));
+
+    select max(snapshot_date) + 1 into v_day from inventory_snapshots;
+    if v_day is null then
+        select min(moved_at)::date into v_day from inventory_movements;
+    end if;
+    if v_day is null then
+        return 0;
+    end if;
+
+    while v_day <= p_through loop
+        insert into inventory_snapshots (snapshot_date, product_id, quantity, value, average_cost, last_movement_id)
+        select v_day,
+               coalesce(m.product_id, s.product_id),
+               coalesce(m.balance_quantity, s.quantity),
+               coalesce(m.balance_value, s.value),
+               coalesce(m.average_cost, s.average_cost),
+               coalesce(m.id, s.last_movement_id)
+        from (
+            select * from inventory_snapshots where snapshot_date = v_day - 1
+        ) s
+        full join (
+            select distinct on (product_id) product_id, balance_quantity, balance_value, average_cost, id
+            from inventory_movements
+            where moved_at >= v_day and moved_at < v_day + 1
+            order by product_id, moved_at desc, id desc
+        ) m on m.product_id = s.product_id
+        where coalesce(m.balance_quantity, s.quantity) <> 0;
+
+        v_day := v_day + 1;
+        v_days := v_days + 1;
+    end loop;
+
+    return v_days;
+end;
+$$;
+
+-- stock_as_of(p_at, p_product_ids)
+--
+-- Ledger balance of every product (or only the ids in the p_product_ids JSON
+-- array) at p_at: the last checkpoint ending at or before p_at, overridden by
+-- each product's last movement after it. Without any checkpoint the whole
+-- history up to p_at is used.
+-- Returns {"checkpoint": <date or null>, "movements": <movements replayed>,
+--          "stock": [{"product_id", "quantity", "value", "average_cost"}, ...]}.
+create or replace function stock_as_of(p_at timestamptz, p_product_ids jsonb default null)
+returns jsonb
+language sql
+stable
+as $$
+    with products_wanted as (
+        select jsonb_array_elements_text(p_product_ids)::bigint as product_id
+    ),
+    checkpoint as (
+        select max(snapshot_date) as day from inventory_snapshots where snapshot_date < p_at::date
+    ),
+    window_movements as (
+        select m.*
+        from inventory_movements m, checkpoint c
+        where m.moved_at <= p_at
+          and (c.day is null or m.moved_at >= c.day + 1)
+          and (p_product_ids is null or m.product_id in (select product_id from products_wanted))
+    ),
+    latest as (
+        select distinct on (product_id) product_id, balance_quantity, balance_value, average_cost
+        from window_movements
+        order by product_id, moved_at desc, id desc
+    ),
+    base as (
+        select s.product_id, s.quantity, s.value, s.average_cost
+        from inventory_snapshots s, checkpoint c
+        where s.snapshot_date = c.day
+          and (p_product_ids is null or s.product_id in (select product_id from products_wanted))
+    ),
+    stock as (
+        select coalesce(l.product_id, b.product_id) as product_id,
+               coalesce(l.balance_quantity, b.quantity) as quantity,
+               coalesce(l.balance_value, b.value) as value,
+               coalesce(l.average_cost, b.average_cost) as average_cost
+        from base b
+        full join latest l on l.product_id = b.product_id
+    )
+    select jsonb_build_object(
+        'checkpoint', (select day from checkpoint),
+        'movements', (select count(*) from window_movements),
+        'stock', coalesce((
+            select jsonb_agg(jsonb_build_object(
+                'product_id', product_id, 'quantity', quantity, 'value', value, 'average_cost', average_cost
+            ) order by product_id)
+            from stock
+            where quantity <> 0
+        ), '[]'::jsonb)
+    );
+$$;
+
+-- Nightly checkpoints (Supabase: enable pg_cron under Database > Extensions first)
+do $$
+begin
+    if exists (select 1 from pg_extension where extname = 'pg_cron') then
+        perform cron.schedule('inventory-snapshots', '5 0 * * *', 'select take_inventory_snapshots()');
+    end if;
+end;
+$$;
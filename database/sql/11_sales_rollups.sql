@@ -0,0 +1,285 @@
+-- Materialized sales rollups (utils/sales_analytics.py)
+--
+-- sales_daily holds revenue, units and cost of goods sold per product and
+-- day. sales_monthly holds the same per product and month. sales_daily_totals
+-- holds one row per day for the whole store. Days are in the database time
+-- zone. Cost is the value of the sale's inventory movements, at the moving
+-- average when the sale was posted. Margin is revenue minus cost.
+--
+-- post_sale adds each new sale to the rollups in its own transaction.
+-- Time-series and top-N queries then read a few hundred rollup rows instead
+-- of every sale_items row. rebuild_sales_rollups() recomputes a date range
+-- from sale_items, for backfills and for sales written outside post_sale.
+
+create table if not exists sales_daily (
+    sale_day date not null,
+    product_id bigint not null references products (id),
+    revenue numeric not null default 0,
+    units numeric not null default 0,
+    cost numeric not null default 0,
+    sales_count integer not null default 0,
+    primary key (sale_day, product_id)
+);
+
+create index if not exists sales_daily_product_idx on sales_daily (product_id, sale_day);
+
+create table if not exists sales_monthly (
+    sale_month date not null,
+    product_id bigint not null references products (id),
+    revenue numeric not null default 0,
+    units numeric not null default 0,
+    cost numeric not null default 0,
+    sales_count integer not null default 0,
+    primary key (sale_month, product_id)
+);
+
+create table if not exists sales_daily_totals (
+    sale_day date primary key,
+    sales_count integer not null default 0,
+    sales_amount numeric not null default 0,
+    revenue numeric not null default 0,
+    units numeric not null default 0,
+    cost numeric not null default 0
+);
+
+create index if not exists sale_items_sale_idx on sale_items (sale_id);
+
+-- Revenue, units and cost per sale and product, for the sales in p_sale_ids
+-- or (when that is null) dated from p_start to p_end inclusive.
+create or replace function sales_rollup_rows(p_sale_ids bigint[], p_start date, p_end date)
+returns table (sale_id bigint, sale_day date, sales_amount numeric, product_id bigint,
+               revenue numeric, units numeric, cost numeric)
+language sql
+stable
+as $$
+    with chosen as (
+        select s.id, s.sale_date::date as sale_day, s.total_amount
+        from sales s
+        where (p_sale_ids is null or s.id = any(p_sale_ids))
+          and (p_start is null or s.sale_date >= p_start)
+          and (p_end is null or s.sale_date < p_end + 1)
+    ),
+    items as (
+        select i.sale_id, i.product_id, sum(i.total_price) as revenue, sum(i.quantity) as units
+        from sale_items i
+        where i.sale_id in (select id from chosen)
+        group by i.sale_id, i.product_id
+    ),
+    costs as (
+        select m.source_id as sale_id, m.product_id, -sum(m.value) as cost
+        from inventory_movements m
+        where m.source_type = 'sale' and m.movement_type = 'sale' and m.source_id in (select id from chosen)
+        group by m.source_id, m.product_id
+    )
+    select c.id, c.sale_day, c.total_amount, i.product_id, i.revenue, i.units, coalesce(k.cost, 0)
+    from chosen c
+    join items i on i.sale_id = c.id
+    left join costs k on k.sale_id = i.sale_id and k.product_id = i.product_id;
+$$;
+
+-- rollup_sales(p_sale_ids)
+-- Adds the sales in the p_sale_ids JSON array to the rollups. Each sale must
+-- be added exactly once; post_sale does this for every sale it posts.
+create or replace function rollup_sales(p_sale_ids jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+    v_ids bigint[];
+begin
+    select array_agg(value::bigint) into v_ids from jsonb_array_elements_text(p_sale_ids);
+    if v_ids is null then
+        return 0;
+    end if;
+
+    insert into sales_daily (sale_day, product_id, revenue, units, cost, sales_count)
+    select sale_day, product_id, sum(revenue), sum(units), sum(cost), count(*)
+    from sales_rollup_rows(v_ids, null, null)
+    group by sale_day, product_id
+    on conflict (sale_day, product_id) do update set
+        revenue = sales_daily.revenue + excluded.revenue,
+        units = sales_daily.units + excluded.units,
+        cost = sales_daily.cost + excluded.cost,
+        sales_count = sales_daily.sales_count + excluded.sales_count;
+
+    insert into sales_monthly (sale_month, product_id, revenue, units, cost, sales_count)
+    select date_trunc('month', sale_day)::date, product_id, sum(revenue), sum(units), sum(cost), count(*)
+    from sales_rollup_rows(v_ids, null, null)
+    group by 1, product_id
+    on conflict (sale_month, product_id) do update set
+        revenue = sales_monthly.revenue + excluded.revenue,
+        units = sales_monthly.units + excluded.units,
+        cost = sales_monthly.cost + excluded.cost,
+        sales_count = sales_monthly.sales_count + excluded.sales_count;
+
+    insert into sales_daily_totals (sale_day, sales_count, sales_amount, revenue, units, cost)
+    select sale_day, count(*), sum(sales_amount), sum(revenue), sum(units), sum(cost)
+    from (
+        -- One row per sale so the header amount is counted once
+        select sale_id, sale_day, max(sales_amount) as sales_amount, sum(revenue) as revenue,
+               sum(units) as units, sum(cost) as cost
+        from sales_rollup_rows(v_ids, null, null)
+        group by sale_id, sale_day
+    ) per_sale
+    group by sale_day
+    on conflict (sale_day) do update set
+        sales_count = sales_daily_totals.sales_count + excluded.sales_count,
+        sales_amount = sales_daily_totals.sales_amount + excluded.sales_amount,
+        revenue = sales_daily_totals.revenue + excluded.revenue,
+        units = sales_daily_totals.units + excluded.units,
+        cost = sales_daily_totals.cost + excluded.cost;
+
+    return array_length(v_ids, 1);
+end;
+$$;
+
+-- rebuild_sales_rollups(p_start, p_end)
+-- Recomputes every day from p_start to p_end (inclusive; null = unbounded)
+-- from sale_items, and the months those days fall in from sales_daily.
+-- Returns the number of days with sales.
+create or replace function rebuild_sales_rollups(p_start date default null, p_end date default null)
+returns integer
+language plpgsql
+as $$
+declare
+    v_days integer;
+begin
+    perform pg_advisory_xact_lock(hashtext('rebuild_sales_rollups'));
+
+    delete from sales_daily
+    where (p_start is null or sale_day >= p_start) and (p_end is null or sale_day <= p_end);
+    delete from sales_daily_totals
+    where (p_start is null or sale_day >= p_start) and (p_end is null or sale_day <= p_end);
+
+    insert into sales_daily (sale_day, product_id, revenue, units, cost, sales_count)
+    select sale_day, product_id, sum(revenue), sum(units), sum(cost), count(*)
+    from sales_rollup_rows(null, p_start, p_end)
+    group by sale_day, product_id;
+
+    insert into sales_daily_totals (sale_day, sales_count, sales_amount, revenue, units, cost)
+    select sale_day, count(*), sum(sales_amount), sum(revenue), sum(units), sum(cost)
+    from (
+        select sale_id, sale_day, max(sales_amount) as sales_amount, sum(revenue) as revenue,
+               sum(units) as units, sum(cost) as cost
+        from sales_rollup_rows(null, p_start, p_end)
+        group by sale_id, sale_day
+    ) per_sale
+    group by sale_day;
+    get diagnostics v_days = row_count;
+
+    delete from sales_monthly
+    where (p_start is null or sale_month >= date_trunc('month', p_start)::date)
+      and (p_end is null or sale_month <= date_trunc('month', p_end)::date);
+
+    insert into sales_monthly (sale_month, product_id, revenue, units, cost, sales_count)
+    select date_trunc('month', sale_day)::date, product_id, sum(revenue), sum(units), sum(cost), sum(sales_count)
+    from sales_daily
+    where (p_start is null or sale_day >= date_trunc('month', p_start)::date)
+      and (p_end is null or sale_day < (date_trunc('month', p_end) + interval '1 month')::date)
+    group by 1, product_id;
+
+    return v_days;
+end;
+$$;
+
+-- sales_series(p_start, p_end, p_bucket)
+-- Store totals per day, week (starting Monday) or month from p_start to p_end
+-- (inclusive). Periods without sales are omitted.
+-- Returns [{"period", "sales_count", "sales_amount", "revenue", "units", "cost"}, ...].
+create or replace function sales_series(p_start date, p_end date, p_bucket text default 'day')
+returns jsonb
+language plpgsql
+stable
+as $$
+begin
+    if p_bucket not in ('day', 'week', 'month') then
+        raise exception 'Unknown bucket: %', p_bucket;
+    end if;
+
+    return coalesce((
+        select jsonb_agg(jsonb_build_object(
+            'period', period, 'sales_count', sales_count, 'sales_amount', sales_amount,
+            'revenue', revenue, 'units', units, 'cost', cost
+        ) order by period)
+        from (
+            select date_trunc(p_bucket, sale_day)::date as period, sum(sales_count) as sales_count,
+                   sum(sales_amount) as sales_amount, sum(revenue) as revenue, sum(units) as units,
+                   sum(cost) as cost
+            from sales_daily_totals
+            where sale_day >= p_start and sale_day <= p_end
+            group by 1
+        ) t
+    ), '[]'::jsonb);
+end;
+$$;
+
+-- sales_by_product(p_start, p_end, p_limit, p_order)
+-- Per product totals from p_start to p_end (inclusive), best first by
+-- revenue, units or margin, optionally only the top p_limit. Whole months
+-- in the range are read from sales_monthly, the partial months at either end
+-- from sales_daily.
+-- Returns [{"product_id", "revenue", "units", "cost", "sales_count"}, ...].
+create or replace function sales_by_product(p_start date, p_end date, p_limit integer default null,
+                                            p_order text default 'revenue')
+returns jsonb
+language plpgsql
+stable
+as $$
+declare
+    -- Months wholly inside the range are [v_first_month, v_after_month)
+    v_first_month date := (date_trunc('month', p_start - 1) + interval '1 month')::date;
+    v_after_month date := date_trunc('month', p_end + 1)::date;
+begin
+    if p_order not in ('revenue', 'units', 'margin') then
+        raise exception 'Unknown order: %', p_order;
+    end if;
+
+    return coalesce((
+        select jsonb_agg(jsonb_build_object(
+            'product_id', product_id, 'revenue', revenue, 'units', units, 'cost', cost,
+            'sales_count', sales_count
+        ) order by rank)
+        from (
+            select t.*, row_number() over (
+                order by case p_order when 'units' then units when 'margin' then revenue - cost else revenue end desc,
+                         product_id
+            ) as rank
+            from (
+                select product_id, sum(revenue) as revenue, sum(units) as units, sum(cost) as cost,
+                       sum(sales_count) as sales_count
+                from (
+                    select product_id, revenue, units, cost, sales_count
+                    from sales_monthly
+                    where v_first_month < v_after_month
+                      and sale_month >= v_first_month and sale_month < v_after_month
+                    union all
+                    select product_id, revenue, units, cost, sales_count
+                    from sales_daily
+                    where sale_day >= p_start and sale_day <= p_end
+                      and (sale_day < v_first_month or sale_day >= v_after_month)
+                ) parts
+                group by product_id
+            ) t
+        ) ranked
+        where p_limit is null or rank <= p_limit
+    ), '[]'::jsonb);
+end;
+$$;
+
+-- The header metrics now come from the daily totals instead of scanning sales
+create or replace function sales_summary(p_today date default current_date)
+returns jsonb
+language sql
+stable
+as $$
+    select jsonb_build_object(
+        'sales_count', coalesce(sum(sales_count), 0),
+        'sales_total', coalesce(sum(sales_amount), 0),
+        'sales_average', coalesce(sum(sales_amount) / nullif(sum(sales_count), 0), 0),
+        'sales_today', coalesce(sum(sales_amount) filter (where sale_day = p_today), 0)
+    )
+    from sales_daily_totals;
+$$;
+
+-- Existing sales
+select rebuild_sales_rollups();
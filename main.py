@@ -8,28 +8,26 @@ if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
 try:
-    # Fix the import - your file is called connection.py, not connection_nocache.py
-    from database.connection import get_connection
-    
+    from utils.page_registry import PAGES, load_page
+    from utils.query_debug import start_rerun, show_query_debug_panel
+
 except ImportError as e:
     st.error(f"❌ Import error: {e}")
     st.stop()
 
-st.set_page_config(page_title="Debug App", layout="wide")
+st.set_page_config(page_title="OnlyPlants ERP", page_icon="🌱", layout="wide")
+start_rerun()
 
-st.title("🔍 Debug Mode - Fixed Imports")
+st.sidebar.title("🌱 OnlyPlants ERP")
+page = st.sidebar.radio("Navigate", list(PAGES), key="page")
 
-# Test connection directly
+# Only the selected page's module (and its dependencies) is imported
 try:
-    supabase = get_connection()
-    st.success("✅ Connection successful!")
-except Exception as e:
-    st.error(f"❌ Connection failed: {e}")
+    show_page = load_page(page)
+except ImportError as e:
+    st.error(f"❌ Could not load {page}: {e}")
     st.stop()
 
-# Test basic query
-try:
-    response = supabase.table('suppliers').select('id').limit(1).execute()
-    st.success(f"✅ Query successful! Response: {response}")
-except Exception as e:
-    st.error(f"❌ Query failed: {e}")
\ No newline at end of file
+show_page()
+
+show_query_debug_panel()
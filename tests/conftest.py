@@ -0,0 +1,177 @@
+"""Fixtures for the database tests.
+
+`client` is an empty in-memory LocalClient. `db` runs a test twice: against
+the SQLite ports in database/local_backend.py and against the functions in
+database/sql applied to a Postgres database. The Postgres run needs
+TEST_DATABASE_URL (a DSN the tests may create schemas in) and psycopg2, and
+is skipped without them. Both go through database/procedures.call_procedure,
+so the same assertions check both implementations.
+"""
+import os
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from database.cache import query_cache
+from database.local_backend import LocalBackendError, LocalClient
+from database.procedures import post_receipt, post_sale
+from database.schema import apply_sql_files
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture(autouse=True)
+def clear_query_cache():
+    """The query cache is process-wide; start and end every test with it empty"""
+    query_cache.clear()
+    yield
+    query_cache.clear()
+
+
+@pytest.fixture
+def client():
+    """Empty in-memory LocalClient"""
+    local = LocalClient()
+    yield local
+    local.close()
+
+
+@pytest.fixture
+def pg_connection():
+    """psycopg2 connection to a fresh schema with database/sql applied, dropped afterwards"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    psycopg2 = pytest.importorskip("psycopg2")
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    schema = f"erp_test_{uuid.uuid4().hex[:12]}"
+    with conn.cursor() as cur:
+        cur.execute(f"create schema {schema}")
+        cur.execute(f"set search_path to {schema}")
+        # Day boundaries in UTC, like the local backend and the default LEDGER_TIMEZONE
+        cur.execute("set timezone to 'UTC'")
+    conn.commit()
+    try:
+        apply_sql_files(conn)
+        yield conn
+    finally:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute(f"drop schema {schema} cascade")
+        conn.commit()
+        conn.close()
+
+
+class Database:
+    """Table access plus the postings the tests repeat; subclasses implement insert, update and rows"""
+
+    def add_product(self, name, product_type='raw', quantity=0, price_paid=0, price_selling=0):
+        """Insert a product directly (nonzero stock becomes an opening movement) and return its id"""
+        return self.insert('products', {
+            'name': name, 'sku': name.upper(), 'product_type': product_type, 'quantity_in_stock': quantity,
+            'price_paid': price_paid, 'price_selling': price_selling,
+        })
+
+    def receive(self, product_id, quantity, unit_cost, batch_number=None, expiry_date=None):
+        batch = {'batch_number': batch_number, 'expiry_date': expiry_date} if batch_number else None
+        return post_receipt(self.client, {'product_id': product_id, 'quantity_received': quantity,
+                                          'unit_cost': unit_cost}, batch)
+
+    def sell(self, product_id, quantity, unit_price, sale_date='2026-03-10T10:00:00'):
+        items = [{'product_id': product_id, 'quantity': quantity, 'unit_price': unit_price,
+                  'total_price': quantity * unit_price}]
+        sale = {'customer_name': 'Test', 'payment_method': 'Cash', 'sale_date': sale_date,
+                'total_amount': quantity * unit_price}
+        return post_sale(self.client, sale, items)
+
+    def stock(self, product_id):
+        return self.rows('products', id=product_id)[0]['quantity_in_stock']
+
+    def balance(self, product_id):
+        rows = self.rows('inventory_balances', order='product_id', product_id=product_id)
+        return rows[0] if rows else None
+
+    def batch_quantities(self, product_id):
+        return {row['batch_number']: row['quantity'] for row in self.rows('batches', product_id=product_id)}
+
+
+class LocalDatabase(Database):
+    """Table access on a LocalClient, in the shape PostgresDatabase returns"""
+
+    error = LocalBackendError
+
+    def __init__(self, client):
+        self.client = client
+
+    def insert(self, table, row):
+        return self.client.table(table).insert(row).execute().data[0]['id']
+
+    def update(self, table, values, **filters):
+        query = self.client.table(table).update(values)
+        for column, value in filters.items():
+            query = query.eq(column, value)
+        query.execute()
+
+    def rows(self, table, order='id', **filters):
+        query = self.client.table(table).select('*')
+        for column, value in filters.items():
+            query = query.eq(column, value)
+        return [_plain(row) for row in query.order(order).execute().data]
+
+
+class PostgresDatabase(Database):
+    """Table access on a psycopg2 connection; numerics come back as floats and dates as ISO strings"""
+
+    def __init__(self, conn):
+        import psycopg2
+        self.client = conn
+        self.error = psycopg2.Error
+
+    def insert(self, table, row):
+        columns = ', '.join(row)
+        placeholders = ', '.join(['%s'] * len(row))
+        return self._execute(f"insert into {table} ({columns}) values ({placeholders}) returning id",
+                             list(row.values()))[0]['id']
+
+    def update(self, table, values, **filters):
+        assignments = ', '.join(f"{column} = %s" for column in values)
+        where = ' and '.join(f"{column} = %s" for column in filters) or 'true'
+        self._execute(f"update {table} set {assignments} where {where}",
+                      list(values.values()) + list(filters.values()))
+
+    def rows(self, table, order='id', **filters):
+        where = ' and '.join(f"{column} = %s" for column in filters) or 'true'
+        return [_plain(row) for row in
+                self._execute(f"select * from {table} where {where} order by {order}", list(filters.values()))]
+
+    def _execute(self, sql, params):
+        from psycopg2.extras import RealDictCursor
+        try:
+            with self.client.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(sql, params)
+                result = cur.fetchall() if cur.description else []
+            self.client.commit()
+            return result
+        except Exception:
+            self.client.rollback()
+            raise
+
+
+def _plain(row):
+    row = dict(row)
+    for key, value in row.items():
+        if isinstance(value, Decimal):
+            row[key] = float(value)
+        elif isinstance(value, (date, datetime)):
+            row[key] = value.isoformat()
+    return row
+
+
+@pytest.fixture(params=['local', 'postgres'])
+def db(request):
+    """The same database, once on LocalClient and once on Postgres"""
+    if request.param == 'local':
+        return LocalDatabase(request.getfixturevalue('client'))
+    return PostgresDatabase(request.getfixturevalue('pg_connection'))
+
@@ -0,0 +1,97 @@
+"""Multi-level BOM explosion and cost rollup (utils/bom_graph.py, utils/costing.py)"""
+import pytest
+
+from utils.bom_graph import BOMCycleError, BOMGraph
+from utils.costing import bom_cost_frame, calculate_product_costs, rollup_costs
+
+FLOUR, SUGAR, BUTTER, DOUGH, BREAD, CAKE = 1, 2, 3, 10, 20, 21
+
+
+def line(parent, child, quantity):
+    return {'finished_product_id': parent, 'raw_material_id': child, 'quantity_required': quantity}
+
+
+# Dough is a sub-assembly shared by bread and cake
+SHARED_DOUGH = [
+    line(DOUGH, FLOUR, 2), line(DOUGH, BUTTER, 0.5),
+    line(BREAD, DOUGH, 1), line(BREAD, SUGAR, 0.1),
+    line(CAKE, DOUGH, 2), line(CAKE, SUGAR, 1), line(CAKE, BUTTER, 1),
+]
+PRICES = {FLOUR: 1.0, SUGAR: 2.0, BUTTER: 4.0}
+
+
+def test_sub_assemblies_come_before_their_parents():
+    order = BOMGraph(SHARED_DOUGH).topological_order()
+
+    assert sorted(order) == [DOUGH, BREAD, CAKE]
+    assert order.index(DOUGH) < order.index(BREAD)
+    assert order.index(DOUGH) < order.index(CAKE)
+
+
+def test_explosion_reaches_the_leaves():
+    graph = BOMGraph(SHARED_DOUGH)
+
+    assert graph.unit_requirements(CAKE) == {FLOUR: 4, BUTTER: 2, SUGAR: 1}
+    assert graph.explode(BREAD, 3) == pytest.approx({FLOUR: 6, BUTTER: 1.5, SUGAR: 0.3})
+    # A raw material is its own requirement
+    assert graph.unit_requirements(FLOUR) == {FLOUR: 1.0}
+
+
+def test_explode_orders_adds_up_every_order():
+    graph = BOMGraph(SHARED_DOUGH)
+
+    totals = graph.explode_orders([(BREAD, 2), (CAKE, 1), (BREAD, 1), (SUGAR, 5)])
+
+    # Bread x3: flour 6, butter 1.5, sugar 0.3; cake x1: flour 4, butter 2, sugar 1; sugar 5 as ordered
+    assert totals == pytest.approx({FLOUR: 10, BUTTER: 3.5, SUGAR: 6.3})
+
+
+def test_repeated_lines_are_summed():
+    graph = BOMGraph([line(BREAD, FLOUR, 1), line(BREAD, FLOUR, 2)])
+
+    assert graph.unit_requirements(BREAD) == {FLOUR: 3}
+
+
+def test_costs_roll_up_through_the_shared_sub_assembly():
+    costs = BOMGraph(SHARED_DOUGH).rollup_costs(PRICES)
+
+    # Dough 2 * 1 + 0.5 * 4 = 4; bread 4 + 0.1 * 2; cake 2 * 4 + 2 + 4
+    assert costs == pytest.approx({DOUGH: 4, BREAD: 4.2, CAKE: 14})
+
+
+def test_cost_frame_rollup_uses_the_sub_assembly_bom_not_its_price():
+    rows = [dict(row, raw_material={'price_paid': PRICES.get(row['raw_material_id'], 99)}) for row in SHARED_DOUGH]
+
+    costs = rollup_costs(bom_cost_frame(rows))
+
+    assert costs == pytest.approx({DOUGH: 4, BREAD: 4.2, CAKE: 14})
+    assert all(type(pid) is int for pid in costs)
+
+
+def test_direct_cycle_reports_its_path():
+    with pytest.raises(BOMCycleError) as error:
+        BOMGraph([line(BREAD, BREAD, 1)])
+
+    assert error.value.cycle == [BREAD, BREAD]
+
+
+def test_indirect_cycle_reports_its_path():
+    with pytest.raises(BOMCycleError) as error:
+        BOMGraph([line(BREAD, DOUGH, 1), line(DOUGH, CAKE, 1), line(CAKE, BREAD, 1), line(BREAD, FLOUR, 1)])
+
+    assert error.value.cycle == [BREAD, DOUGH, CAKE, BREAD]
+    assert str(error.value) == f"BOM cycle detected: {BREAD} -> {DOUGH} -> {CAKE} -> {BREAD}"
+
+
+def test_calculate_product_costs_accepts_any_id_type(client):
+    ids = {}
+    for name, price in (('Flour', 1.0), ('Butter', 4.0), ('Dough', 0), ('Bread', 0)):
+        ids[name] = client.table('products').insert({'name': name, 'sku': name.upper(),
+                                                     'price_paid': price}).execute().data[0]['id']
+    client.table('bill_of_materials').insert([
+        line(ids['Dough'], ids['Flour'], 2), line(ids['Dough'], ids['Butter'], 0.5), line(ids['Bread'], ids['Dough'], 1),
+    ]).execute()
+
+    assert calculate_product_costs(client) == pytest.approx({ids['Dough']: 4, ids['Bread']: 4})
+    # Ids from a text input or a numpy column still match
+    assert calculate_product_costs(client, [str(ids['Bread'])]) == pytest.approx({ids['Bread']: 4})
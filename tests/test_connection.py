@@ -0,0 +1,86 @@
+"""Shared client health checks (database/connection.py)"""
+import threading
+
+import pytest
+
+from database.connection import ConnectionManager
+from database.instrumentation import InstrumentedClient
+
+
+class FakeClient:
+    """Answers the health probe (and any query) unless failing is set; gate holds the probe"""
+
+    def __init__(self, gate=None):
+        self.failing = False
+        self.gate = gate
+        self.probing = threading.Event()
+
+    def table(self, name):
+        return self
+
+    def select(self, *args):
+        return self
+
+    def limit(self, *args):
+        return self
+
+    def execute(self):
+        self.probing.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.failing:
+            raise ConnectionError("connection reset")
+        return None
+
+
+class FakeManager(ConnectionManager):
+    def __init__(self, clients, health_check_interval=3600):
+        super().__init__('http://db', 'key', health_check_interval)
+        self.clients = list(clients)
+
+    def _create_client(self):
+        return self.clients.pop(0)
+
+
+def test_connection_errors_mark_the_client_unhealthy_and_reconnect():
+    first, second = FakeClient(), FakeClient()
+    manager = FakeManager([first, second])
+    client = InstrumentedClient(manager.get_client(), on_error=manager.query_failed)
+
+    first.failing = True
+    with pytest.raises(ConnectionError):
+        client.table('products').select('id').execute()
+
+    assert manager.pool_stats()['healthy'] is False
+    assert manager.get_client() is second
+    stats = manager.pool_stats()
+    assert (stats['health_checks'], stats['failed_health_checks'], stats['reconnects']) == (1, 1, 1)
+    assert stats['healthy'] is True
+
+
+def test_server_errors_do_not_mark_the_client_unhealthy():
+    manager = FakeManager([FakeClient()])
+    manager.get_client()
+
+    manager.query_failed(ValueError("duplicate key value violates unique constraint"))
+
+    assert manager.pool_stats()['healthy'] is True
+
+
+def test_one_thread_probes_while_the_others_keep_the_current_client():
+    gate = threading.Event()
+    first = FakeClient(gate)
+    manager = FakeManager([first])
+    manager.get_client()
+    manager.mark_unhealthy()
+
+    prober = threading.Thread(target=manager.get_client)
+    prober.start()
+    assert first.probing.wait(5)
+
+    # The probe is blocked on the network; the lock is free and nobody else probes
+    assert manager.get_client() is first
+    gate.set()
+    prober.join(5)
+    stats = manager.pool_stats()
+    assert (stats['health_checks'], stats['reconnects'], stats['healthy']) == (1, 0, True)
@@ -0,0 +1,98 @@
+"""FEFO batch allocation inside post_sale and start_production, and consume_batches (06_fefo.sql)"""
+import pytest
+
+from database.procedures import consume_batches, post_sale, start_production
+
+
+def lots(result):
+    return [(allocation['batch_number'], allocation['quantity']) for allocation in result['allocations']]
+
+
+def test_sale_draws_the_earliest_expiry_first(db):
+    bread = db.add_product('Bread', 'finished')
+    db.receive(bread, 3, 2.0, 'UNDATED')
+    db.receive(bread, 4, 2.0, 'LATE', '2026-12-01')
+    db.receive(bread, 6, 2.0, 'EARLY', '2026-06-01')
+
+    result = db.sell(bread, 11, 5.0)
+
+    # Batches without an expiry date go last
+    assert lots(result) == [('EARLY', 6), ('LATE', 4), ('UNDATED', 1)]
+    assert result['allocations'][0]['expiry_date'] == '2026-06-01'
+    assert result['shortfalls'] == []
+    assert db.batch_quantities(bread) == {'UNDATED': 2, 'LATE': 0, 'EARLY': 0}
+    allocations = db.rows('batch_allocations')
+    assert {(row['source_type'], row['source_id']) for row in allocations} == {('sale', result['id'])}
+    assert sum(row['quantity'] for row in allocations) == 11
+
+
+def test_stock_outside_batches_is_reported_as_shortfall(db):
+    bread = db.add_product('Bread', 'finished', quantity=5, price_paid=2)
+    db.receive(bread, 2, 2.0, 'B1')
+
+    result = db.sell(bread, 4, 5.0)
+
+    assert lots(result) == [('B1', 2)]
+    assert result['shortfalls'] == [{'product_id': bread, 'quantity': 2}]
+    assert db.stock(bread) == 3
+
+
+def test_rejected_sale_leaves_batches_untouched(db):
+    bread = db.add_product('Bread', 'finished')
+    db.receive(bread, 3, 2.0, 'B1')
+
+    with pytest.raises(db.error, match='Insufficient stock'):
+        db.sell(bread, 5, 5.0)
+
+    assert db.batch_quantities(bread) == {'B1': 3}
+    assert db.rows('batch_allocations') == []
+
+
+def test_production_draws_material_batches(db):
+    flour = db.add_product('Flour')
+    bread = db.add_product('Bread', 'finished')
+    db.receive(flour, 5, 2.0, 'F-LATE', '2026-09-01')
+    db.receive(flour, 5, 2.0, 'F-EARLY', '2026-05-01')
+
+    order = start_production(db.client, {'product_id': bread, 'quantity_planned': 2},
+                             [{'raw_material_id': flour, 'total_needed': 7}])
+
+    assert lots(order) == [('F-EARLY', 5), ('F-LATE', 2)]
+    assert db.batch_quantities(flour) == {'F-LATE': 3, 'F-EARLY': 0}
+    assert {(row['source_type'], row['source_id']) for row in db.rows('batch_allocations')} == {
+        ('production_order', order['id'])}
+
+
+def test_consume_batches_is_all_or_nothing(db):
+    flour = db.add_product('Flour')
+    first = db.receive(flour, 5, 2.0, 'F1')['batch_id']
+    second = db.receive(flour, 5, 2.0, 'F2')['batch_id']
+
+    assert consume_batches(db.client, [{'batch_id': first, 'product_id': flour, 'quantity': 3}], 'adjustment') == 1
+    assert db.batch_quantities(flour) == {'F1': 2, 'F2': 5}
+
+    with pytest.raises(db.error, match='Batch quantities changed'):
+        consume_batches(db.client, [{'batch_id': second, 'product_id': flour, 'quantity': 1},
+                                    {'batch_id': first, 'product_id': flour, 'quantity': 3}], 'adjustment')
+
+    assert db.batch_quantities(flour) == {'F1': 2, 'F2': 5}
+    assert [row['quantity'] for row in db.rows('batch_allocations')] == [3]
+
+
+def test_large_sale_allocates_every_line(db):
+    products = [db.add_product(f'Item {i}', 'finished') for i in range(50)]
+    for product_id in products:
+        for lot, expiry in enumerate(('2026-07-01', '2026-05-01', None)):
+            db.receive(product_id, 30, 1.0, f'{product_id}-{lot}', expiry)
+    # 2,000 lines of one unit, 40 per product: the two dated batches cover them
+    items = [{'product_id': products[i % 50], 'quantity': 1, 'unit_price': 2, 'total_price': 2} for i in range(2000)]
+
+    result = post_sale(db.client, {'total_amount': 4000}, items)
+
+    assert result['shortfalls'] == []
+    assert len(result['allocations']) == 100
+    assert sum(allocation['quantity'] for allocation in result['allocations']) == 2000
+    for product_id in products:
+        assert db.batch_quantities(product_id) == {f'{product_id}-0': 20, f'{product_id}-1': 0, f'{product_id}-2': 30}
+        assert db.stock(product_id) == 50
+    assert len(db.rows('sale_items')) == 2000
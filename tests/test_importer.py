@@ -0,0 +1,116 @@
+"""Bulk template import (utils/importer.py) against the local backend"""
+import io
+
+import pandas as pd
+
+from utils.importer import TEMPLATE_COLUMNS, _prefetch_lookups, _validate_chunk, _write_batch, import_file
+
+
+def add(client, table, row):
+    return client.table(table).insert(row).execute().data[0]['id']
+
+
+def chunk(template_type, rows, first_row=2):
+    """Template rows as read_chunks yields them: every column text, indexed by spreadsheet row"""
+    columns = list(TEMPLATE_COLUMNS[template_type])
+    df = pd.DataFrame([{column: str(row.get(column, '')) for column in columns} for row in rows], columns=columns)
+    df.index = range(first_row, first_row + len(df))
+    return df
+
+
+def messages(errors):
+    return sorted((error['row'], error['column'], error['message']) for error in errors)
+
+
+def test_raw_materials_are_checked_row_by_row(client):
+    add(client, 'suppliers', {'name': 'Mill'})
+    add(client, 'products', {'name': 'Bread', 'sku': 'BR-1', 'product_type': 'finished'})
+    lookups = _prefetch_lookups(client, 'RawMaterials')
+    seen = set()
+
+    records, errors = _validate_chunk('RawMaterials', chunk('RawMaterials', [
+        {'Name': 'Flour', 'SKU': 'FL-1', 'Quantity': '10', 'PricePaid': '1.5', 'Supplier': 'mill'},
+        {'Name': 'Sugar', 'SKU': '', 'Quantity': '5'},
+        {'Name': 'Salt', 'SKU': 'SA-1', 'Quantity': 'lots'},
+        {'Name': 'Yeast', 'SKU': 'YE-1', 'PricePaid': '-2'},
+        {'Name': 'Flour again', 'SKU': 'fl-1'},
+        {'Name': 'Butter', 'SKU': 'BU-1', 'Supplier': 'Dairy'},
+        {'Name': 'Bread as raw', 'SKU': 'br-1'},
+        {},
+    ]), lookups, seen)
+
+    assert records.index.tolist() == [2]
+    flour = records.loc[2]
+    assert (flour['sku'], flour['quantity_in_stock'], flour['price_paid'], flour['product_type']) == (
+        'FL-1', 10, 1.5, 'raw')
+    assert flour['supplier_id'] == lookups['supplier_by_name']['mill']
+    # The blank last row is skipped without an error
+    assert messages(errors) == [
+        (3, 'sku', 'Required value is missing'),
+        (4, 'quantity_in_stock', 'Not a number'),
+        (5, 'price_paid', 'Must not be negative'),
+        (6, 'sku', 'Duplicate sku in file'),
+        (7, 'supplier', 'Unknown supplier'),
+        (8, 'sku', 'SKU belongs to an existing finished product'),
+    ]
+
+    # Keys carry over to later chunks of the same file
+    _, errors = _validate_chunk('RawMaterials', chunk('RawMaterials', [{'Name': 'Flour', 'SKU': 'FL-1'}], 10),
+                                lookups, seen)
+    assert messages(errors) == [(10, 'sku', 'Duplicate sku in file')]
+
+
+def test_bom_lines_resolve_products_by_id_sku_or_name(client):
+    flour = add(client, 'products', {'name': 'Flour', 'sku': 'FL-1'})
+    sugar = add(client, 'products', {'name': 'Sugar', 'sku': 'SU-1'})
+    bread = add(client, 'products', {'name': 'Bread', 'sku': 'BR-1', 'product_type': 'finished'})
+    lookups = _prefetch_lookups(client, 'BOM')
+
+    records, errors = _validate_chunk('BOM', chunk('BOM', [
+        {'ProductID': bread, 'RawMaterialID': flour, 'QuantityRequired': '2'},
+        {'ProductID': 'br-1', 'RawMaterialID': 'SU-1', 'QuantityRequired': '1'},
+        {'ProductName': 'bread', 'RawMaterialID': 'FL-1', 'QuantityRequired': '1'},
+        {'ProductID': 'CAKE', 'RawMaterialID': flour, 'QuantityRequired': '1'},
+        {'ProductID': bread, 'RawMaterialID': 'nope', 'QuantityRequired': '1'},
+    ]), lookups, set())
+
+    assert records[['finished_product_id', 'raw_material_id', 'quantity_required', 'product_name']].values.tolist() == [
+        [bread, flour, 2, 'Bread'], [bread, sugar, 1, 'Bread']]
+    assert messages(errors) == [
+        (4, 'raw_material', 'Duplicate BOM line in file'),
+        (5, 'product', 'Unknown finished product'),
+        (6, 'raw_material', 'Unknown raw material'),
+    ]
+
+
+def test_a_failing_batch_is_retried_row_by_row(client):
+    batch = pd.DataFrame([
+        {'name': 'Flour', 'sku': 'FL-1', 'product_type': 'raw'},
+        {'name': 'Bad', 'sku': 'BAD-1', 'product_type': 'gadget'},
+        {'name': 'Sugar', 'sku': 'SU-1', 'product_type': 'raw'},
+    ], index=[2, 3, 4])
+
+    written, errors = _write_batch(client, 'products', batch, 'sku')
+
+    assert written == 2
+    assert [(error['row'], error['column']) for error in errors] == [(3, '')]
+    assert 'CHECK constraint' in errors[0]['message']
+    assert [row['sku'] for row in client.table('products').select('sku').order('id').execute().data] == [
+        'FL-1', 'SU-1']
+
+
+def test_import_file_upserts_products_on_sku(client):
+    add(client, 'products', {'name': 'Old flour', 'sku': 'FL-1', 'quantity_in_stock': 3})
+    add(client, 'products', {'name': 'Bread', 'sku': 'BR-1', 'product_type': 'finished'})
+    upload = io.StringIO("Name,SKU,Category,CategoryCode,Quantity,PricePaid,Supplier\n"
+                         "Flour,FL-1,Baking,B,10,1.5,\n"
+                         "Sugar,SU-1,Baking,B,5,2,\n"
+                         "Bread,BR-1,Baking,B,1,1,\n")
+
+    report = import_file(client, 'RawMaterials', upload, 'raw.csv')
+
+    assert (report['rows'], report['written']) == (3, 2)
+    assert report['errors'][['row', 'column']].values.tolist() == [[4, 'sku']]
+    products = client.table('products').select('name, sku, product_type, quantity_in_stock').order('id').execute().data
+    assert [(row['name'], row['sku'], row['product_type'], row['quantity_in_stock']) for row in products] == [
+        ('Flour', 'FL-1', 'raw', 10), ('Bread', 'BR-1', 'finished', 0), ('Sugar', 'SU-1', 'raw', 5)]
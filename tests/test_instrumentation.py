@@ -0,0 +1,54 @@
+"""Query recording (database/instrumentation.py)"""
+import json
+
+from database.instrumentation import InstrumentedClient, begin_rerun
+
+
+class FakeBuilder:
+    """postgrest-py style builder where .not_ is a property returning a negated builder"""
+
+    def __init__(self, negated=False, filters=()):
+        self.negated = negated
+        self.filters = list(filters)
+
+    @property
+    def not_(self):
+        return FakeBuilder(True, self.filters)
+
+    def select(self, *columns):
+        return self
+
+    def eq(self, column, value):
+        return FakeBuilder(False, self.filters + [('not.eq' if self.negated else 'eq', column, value)])
+
+    def execute(self):
+        return type('Response', (), {'data': [{'filters': self.filters}]})()
+
+
+class FakeClient:
+    def table(self, name):
+        return FakeBuilder()
+
+
+def test_builder_properties_stay_instrumented():
+    log = begin_rerun('test')
+
+    data = InstrumentedClient(FakeClient()).table('products').select('name').not_.eq('sku', 'F').execute().data
+
+    assert data == [{'filters': [('not.eq', 'sku', 'F')]}]
+    assert [(record['target'], record['shape']) for record in log.records] == [('products', 'not_ eq(sku)')]
+
+
+def test_errors_are_recorded_and_reported(client):
+    log = begin_rerun('test')
+    failures = []
+    instrumented = InstrumentedClient(client, on_error=failures.append)
+
+    try:
+        instrumented.table('products').select('nope').execute()
+    except Exception:
+        pass
+
+    assert len(failures) == 1
+    assert log.records[0]['error'] == str(failures[0])
+    assert json.loads(log.to_json())['queries'] == 1
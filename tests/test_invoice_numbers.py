@@ -0,0 +1,36 @@
+"""Invoice number reservation (database/invoice_numbers.py, 07_invoice_numbers.sql)"""
+import pytest
+
+from database.invoice_numbers import InvoiceNumberAllocator, format_invoice_number
+from database.procedures import post_sale
+
+
+def test_allocators_sharing_a_client_never_repeat_a_number(db):
+    # Two processes' allocators, interleaving single numbers and bulk takes
+    first, second = InvoiceNumberAllocator(block_size=3), InvoiceNumberAllocator(block_size=3)
+    issued = []
+    for _ in range(10):
+        issued.append(first.next_number(db.client))
+        issued.extend(second.take(db.client, 2))
+        issued.append(second.next_number(db.client))
+        issued.extend(first.take(db.client, 4))
+
+    assert len(issued) == 80
+    assert len(set(issued)) == 80
+
+
+def test_a_repeated_invoice_number_is_rejected(db):
+    bread = db.add_product('Bread', 'finished', quantity=10, price_paid=2)
+    number = format_invoice_number(InvoiceNumberAllocator().next_number(db.client))
+    items = [{'product_id': bread, 'quantity': 1, 'unit_price': 5, 'total_price': 5}]
+    post_sale(db.client, {'invoice_number': number, 'total_amount': 5}, items)
+
+    with pytest.raises(db.error, match='(?i)unique'):
+        post_sale(db.client, {'invoice_number': number, 'total_amount': 5}, items)
+
+    assert [sale['invoice_number'] for sale in db.rows('sales')] == [number]
+    assert db.stock(bread) == 9
+    # Sales without a number are not affected
+    post_sale(db.client, {'total_amount': 5}, items)
+    post_sale(db.client, {'total_amount': 5}, items)
+    assert len(db.rows('sales')) == 3
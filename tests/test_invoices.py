@@ -0,0 +1,56 @@
+"""Bulk invoice regeneration (utils/pdf_generator.py)"""
+import io
+import zipfile
+
+import pytest
+
+from utils.pdf_generator import bulk_invoices, write_zip
+
+pytest.importorskip("reportlab")
+
+
+def add_sales(client, invoice_numbers):
+    product = client.table('products').insert({'name': 'Bread', 'sku': 'BR'}).execute().data[0]['id']
+    for number, invoice_number in enumerate(invoice_numbers):
+        sale = client.table('sales').insert({
+            'invoice_number': invoice_number, 'customer_name': f'Customer {number}', 'total_amount': 5,
+            'sale_date': f'2026-03-{1 + number % 28:02d}T10:00:00',
+        }).execute().data[0]
+        client.table('sale_items').insert({'sale_id': sale['id'], 'product_id': product, 'product_name': 'Bread',
+                                           'quantity': 1, 'unit_price': 5, 'total_price': 5}).execute()
+
+
+def test_zip_has_one_entry_per_sale(client):
+    add_sales(client, ['INV-1', None, 'INV/2026/3', None])
+    buffer = io.BytesIO()
+
+    stats = bulk_invoices(client, '2026-03-01', '2026-03-31', buffer, 'zip', workers=1)
+
+    assert stats['invoices'] == 4
+    names = zipfile.ZipFile(buffer).namelist()
+    assert sorted(names) == ['invoice_INV-1.pdf', 'invoice_INV-2026-3.pdf', 'invoice_sale_2.pdf',
+                             'invoice_sale_4.pdf']
+
+
+def test_repeated_labels_get_distinct_entries():
+    buffer = io.BytesIO()
+
+    write_zip([('INV-1', b'%PDF-a'), ('INV-1', b'%PDF-b'), ('INV-1', b'%PDF-c')], buffer)
+
+    archive = zipfile.ZipFile(buffer)
+    assert archive.namelist() == ['invoice_INV-1.pdf', 'invoice_INV-1-2.pdf', 'invoice_INV-1-3.pdf']
+    assert archive.read('invoice_INV-1-3.pdf') == b'%PDF-c'
+
+
+def test_merged_pdf_has_every_invoice(client):
+    pypdf = pytest.importorskip("pypdf")
+    # More than one render task (50 invoices each), so the task PDFs are merged
+    add_sales(client, [f'INV-{number}' for number in range(60)])
+    buffer = io.BytesIO()
+
+    stats = bulk_invoices(client, '2026-03-01', '2026-03-31', buffer, 'pdf', workers=1)
+
+    assert stats['invoices'] == 60
+    text = ''.join(page.extract_text() for page in pypdf.PdfReader(io.BytesIO(buffer.getvalue())).pages)
+    assert text.count('Invoice Number:') == 60
+    assert all(f'INV-{number}\n' in text for number in range(60))
@@ -0,0 +1,114 @@
+"""Inventory movement ledger (database/sql/09_inventory_ledger.sql and its SQLite port)"""
+from datetime import date, timedelta
+
+import pytest
+
+from database.ledger import get_cost_of_goods_sold, record_movement
+from database.procedures import finish_production, start_production
+
+
+def movements(db, product_id):
+    return [(row['movement_type'], row['quantity'], row['balance_quantity'], pytest.approx(row['balance_value']))
+            for row in db.rows('inventory_movements', product_id=product_id)]
+
+
+def test_receipts_move_the_average_cost(db):
+    flour = db.add_product('Flour')
+
+    db.receive(flour, 10, 2.0)
+    result = db.receive(flour, 30, 4.0)
+
+    assert result['average_cost'] == pytest.approx(3.5)
+    assert db.stock(flour) == 40
+    assert db.rows('products', id=flour)[0]['price_paid'] == pytest.approx(3.5)
+    assert movements(db, flour) == [('receipt', 10, 10, 20), ('receipt', 30, 40, 140)]
+    balance = db.balance(flour)
+    assert (balance['quantity'], balance['value'], balance['average_cost']) == (40, pytest.approx(140), 3.5)
+
+
+def test_sales_move_out_at_the_current_average(db):
+    bread = db.add_product('Bread', 'finished')
+    db.receive(bread, 10, 2.0)
+    db.receive(bread, 10, 4.0)
+
+    db.sell(bread, 5, 9.0)
+
+    assert movements(db, bread)[-1] == ('sale', -5, 15, 45)
+    sale_movement = db.rows('inventory_movements', product_id=bread)[-1]
+    assert (sale_movement['unit_cost'], sale_movement['source_type']) == (3, 'sale')
+    assert db.balance(bread)['quantity'] == db.stock(bread) == 15
+
+    today = date.today()
+    cogs = get_cost_of_goods_sold(db.client, today - timedelta(days=1), today + timedelta(days=1))
+    assert (cogs['cogs'], cogs['units']) == (15, 5)
+    assert [(row['product_id'], row['cogs']) for row in cogs['by_product']] == [(bread, 15)]
+
+
+def test_direct_stock_edits_become_opening_and_adjustment_movements(db):
+    flour = db.add_product('Flour', quantity=10, price_paid=2)
+
+    db.update('products', {'quantity_in_stock': 7}, id=flour)
+
+    assert movements(db, flour) == [('opening', 10, 10, 20), ('adjustment', -3, 7, 14)]
+    assert db.balance(flour)['quantity'] == 7
+
+
+def test_record_movement_applies_a_signed_quantity(db):
+    flour = db.add_product('Flour', quantity=10, price_paid=2)
+
+    record_movement(db.client, flour, 'adjustment', -4)
+
+    assert db.stock(flour) == 6
+    assert movements(db, flour)[-1] == ('adjustment', -4, 6, 12)
+    with pytest.raises(ValueError):
+        record_movement(db.client, flour, 'theft', -1)
+
+
+def test_finished_output_is_costed_from_the_materials_consumed(db):
+    flour = db.add_product('Flour')
+    sugar = db.add_product('Sugar')
+    bread = db.add_product('Bread', 'finished')
+    db.receive(flour, 10, 2.0)
+    db.receive(sugar, 10, 1.0)
+    order = start_production(db.client, {'product_id': bread, 'quantity_planned': 2}, [
+        {'raw_material_id': flour, 'total_needed': 4},
+        {'raw_material_id': sugar, 'total_needed': 2},
+    ])
+
+    result = finish_production(db.client, order['id'], 2)
+
+    assert result['unit_cost'] == pytest.approx(5.0)
+    assert db.stock(bread) == 2
+    assert movements(db, bread) == [('output', 2, 2, 10)]
+    assert db.balance(flour)['value'] == pytest.approx(12)
+    assert db.rows('production_orders')[0]['status'] == 'completed'
+    with pytest.raises(db.error, match='not in progress'):
+        finish_production(db.client, order['id'], 2)
+
+
+def test_moved_at_is_stamped_at_insert_not_transaction_start(pg_connection):
+    with pg_connection.cursor() as cur:
+        cur.execute("insert into products (name, sku, quantity_in_stock, price_paid) values ('Flour', 'F', 0, 2) "
+                    "returning id")
+        flour = cur.fetchone()[0]
+        pg_connection.commit()
+        # Two movements in one transaction, as when a posting waits for a lock between them
+        cur.execute("select (record_movement(%s, 'adjustment', 1))->>'moved_at'", (flour,))
+        first = cur.fetchone()[0]
+        cur.execute("select pg_sleep(0.01)")
+        cur.execute("select (record_movement(%s, 'adjustment', 1))->>'moved_at'", (flour,))
+        second = cur.fetchone()[0]
+        cur.execute("select %s::timestamptz < %s::timestamptz", (first, second))
+        assert cur.fetchone()[0]
+    pg_connection.rollback()
+
+
+def test_upserted_stock_becomes_an_adjustment(client):
+    client.table('products').insert({'name': 'Flour', 'sku': 'F', 'quantity_in_stock': 3, 'price_paid': 2}).execute()
+
+    client.table('products').upsert({'name': 'Flour', 'sku': 'F', 'quantity_in_stock': 10}, on_conflict='sku').execute()
+
+    movements = client.table('inventory_movements').select('movement_type, quantity, balance_quantity').order(
+        'id').execute().data
+    assert [(row['movement_type'], row['quantity'], row['balance_quantity']) for row in movements] == [
+        ('opening', 3, 3), ('adjustment', 7, 10)]
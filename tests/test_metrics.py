@@ -0,0 +1,75 @@
+"""Header metrics and their fallback without database/sql/03_metrics.sql (database/metrics.py)"""
+import pytest
+
+from database import metrics
+from database.local_backend import LocalBackendError, LocalClient
+from database.metrics import get_dashboard_metrics, get_product_filter_options, get_sales_summary
+
+
+class WithoutFunctions(LocalClient):
+    """A LocalClient whose database functions are missing until enabled"""
+
+    def __init__(self):
+        super().__init__()
+        self.enabled = False
+        self.calls = []
+
+    def rpc(self, name, params=None):
+        self.calls.append(name)
+        if not self.enabled:
+            raise LocalBackendError(f"Could not find the function {name}")
+        return super().rpc(name, params)
+
+
+@pytest.fixture
+def missing():
+    client = WithoutFunctions()
+    client.table('products').insert([
+        {'name': 'Flour', 'sku': 'F', 'product_type': 'raw', 'category': 'Baking', 'quantity_in_stock': 0},
+        {'name': 'Bread', 'sku': 'B', 'product_type': 'finished', 'quantity_in_stock': 20, 'price_paid': 2},
+    ]).execute()
+    yield client
+    client.close()
+
+
+@pytest.fixture(autouse=True)
+def forget_failures():
+    metrics._failed_rpcs.clear()
+    yield
+    metrics._failed_rpcs.clear()
+
+
+def test_fallback_counts_rows_and_leaves_sums_unavailable(missing):
+    result = get_dashboard_metrics(missing)
+
+    assert (result['raw_count'], result['raw_out_of_stock'], result['finished_count']) == (1, 1, 1)
+    assert result['sales_count'] == 0
+    assert result['raw_inventory_value'] is None and result['sales_total'] is None
+
+
+def test_a_missing_function_is_reported_once_and_not_retried(missing, capsys):
+    for _ in range(3):
+        get_dashboard_metrics(missing)
+        get_sales_summary(missing)
+
+    assert missing.calls == ['dashboard_metrics', 'sales_summary']
+    printed = capsys.readouterr().out.splitlines()
+    assert [line.split(' RPC unavailable')[0] for line in printed] == ['dashboard_metrics', 'sales_summary']
+
+
+def test_the_function_is_retried_after_the_retry_window(missing, capsys, monkeypatch):
+    get_sales_summary(missing)
+    monkeypatch.setattr(metrics, 'RPC_RETRY_SECONDS', 0)
+
+    get_sales_summary(missing)
+    missing.enabled = True
+    summary = get_sales_summary(missing)
+
+    assert missing.calls == ['sales_summary'] * 3
+    assert summary['sales_total'] == 0.0
+    assert len(capsys.readouterr().out.splitlines()) == 1
+    assert metrics._failed_rpcs == {}
+
+
+def test_filter_options_fall_back_to_a_column_read(missing):
+    assert get_product_filter_options(missing) == (['finished', 'raw'], ['Baking'])
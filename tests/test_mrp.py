@@ -0,0 +1,147 @@
+"""Materials requirements planning over the BOM matrix (utils/mrp.py)"""
+import numpy as np
+import pytest
+
+from utils.bom_graph import BOMGraph
+from utils.mrp import RequirementsMatrix, plan_requirements
+
+FLOUR, SUGAR, BUTTER, DOUGH, BREAD, CAKE, SOUP = 1, 2, 3, 10, 20, 21, 50
+
+
+def line(parent, child, quantity):
+    return {'finished_product_id': parent, 'raw_material_id': child, 'quantity_required': quantity}
+
+
+# Bread needs 2 flour, 1 butter, 1 sugar; cake 4 flour, 2 butter, 3 sugar
+BOM = [line(DOUGH, FLOUR, 2), line(DOUGH, BUTTER, 1),
+       line(BREAD, DOUGH, 1), line(BREAD, SUGAR, 1),
+       line(CAKE, DOUGH, 2), line(CAKE, SUGAR, 3)]
+MATERIALS = [
+    {'id': FLOUR, 'name': 'Flour', 'sku': 'FL', 'quantity_in_stock': 3.5, 'price_paid': 2.0, 'supplier_id': 1,
+     'supplier': 'Mill'},
+    {'id': SUGAR, 'name': 'Sugar', 'sku': 'SU', 'quantity_in_stock': 2, 'price_paid': 1.0, 'supplier_id': None,
+     'supplier': None},
+    {'id': BUTTER, 'name': 'Butter', 'sku': 'BU', 'quantity_in_stock': 10, 'price_paid': 4.0, 'supplier_id': 2,
+     'supplier': 'Dairy'},
+]
+
+
+def matrix(use_scipy=False):
+    return RequirementsMatrix.from_graph(BOMGraph(BOM), use_scipy=use_scipy)
+
+
+def order(order_id, product_id, quantity, status='planned', consumed=()):
+    return {'id': order_id, 'product_id': product_id, 'quantity_planned': quantity, 'status': status,
+            'production_consumption': [{'raw_material_id': material, 'quantity_consumed': quantity}
+                                       for material, quantity in consumed]}
+
+
+def by_material(table, column):
+    return dict(zip(table['material_id'], table[column]))
+
+
+def test_explode_applies_unit_requirements_to_the_demand():
+    requirements = matrix()
+
+    demand = requirements.demand_vector([BREAD, CAKE, BREAD, SOUP], [2, 1, 3, 7])
+
+    assert list(requirements.assemblies) == [DOUGH, BREAD, CAKE]
+    assert list(requirements.materials) == [FLOUR, SUGAR, BUTTER]
+    # Soup has no BOM and adds nothing
+    assert list(demand) == [0, 5, 1]
+    assert list(requirements.explode(demand)) == [14, 8, 7]
+
+
+def test_scipy_and_numpy_give_the_same_totals():
+    pytest.importorskip('scipy')
+    with_scipy, without = matrix(use_scipy=True), matrix(use_scipy=False)
+    assert (with_scipy.engine, without.engine) == ('scipy', 'numpy')
+    demand = np.random.default_rng(0).uniform(0, 100, len(without.assemblies))
+
+    assert np.allclose(with_scipy.explode(demand), without.explode(demand))
+
+    orders = [order(1, BREAD, 5), order(2, CAKE, 2, 'in_progress', [(FLOUR, 8)])]
+    plan_scipy, _ = plan_requirements(with_scipy, orders, MATERIALS)
+    plan_numpy, _ = plan_requirements(without, orders, MATERIALS)
+    assert plan_scipy.equals(plan_numpy)
+
+
+def test_plan_nets_consumption_stock_and_receipts():
+    orders = [
+        order(1, BREAD, 5),
+        # Started: flour fully drawn, butter partly, sugar not yet; material 99 is not in any BOM
+        order(2, CAKE, 2, 'in_progress', [(FLOUR, 8), (BUTTER, 1), (99, 4)]),
+        order(3, SOUP, 4),
+    ]
+
+    table, missing_bom = plan_requirements(matrix(), orders, MATERIALS, on_order={SUGAR: 3})
+
+    assert missing_bom == [3]
+    assert by_material(table, 'gross_required') == {FLOUR: 18, SUGAR: 11, BUTTER: 9}
+    assert by_material(table, 'consumed') == {FLOUR: 8, SUGAR: 0, BUTTER: 1}
+    assert by_material(table, 'net_required') == {FLOUR: 10, SUGAR: 11, BUTTER: 8}
+    assert by_material(table, 'on_order') == {FLOUR: 0, SUGAR: 3, BUTTER: 0}
+    assert by_material(table, 'projected') == {FLOUR: -6.5, SUGAR: -6, BUTTER: 2}
+    # Shortages first; whole units are suggested
+    assert list(table['material_id']) == [FLOUR, SUGAR, BUTTER]
+    assert by_material(table, 'suggested_purchase') == {FLOUR: 7, SUGAR: 6, BUTTER: 0}
+    assert by_material(table, 'purchase_cost') == {FLOUR: 14, SUGAR: 6, BUTTER: 0}
+    assert by_material(table, 'supplier') == {FLOUR: 'Mill', SUGAR: '', BUTTER: 'Dairy'}
+
+
+def test_consumption_beyond_the_order_does_not_offset_other_orders():
+    orders = [order(1, BREAD, 1), order(2, BREAD, 1, 'in_progress', [(FLOUR, 10), (BUTTER, 1), (SUGAR, 1)])]
+
+    table, _ = plan_requirements(matrix(), orders, MATERIALS)
+
+    assert by_material(table, 'consumed') == {FLOUR: 2, SUGAR: 1, BUTTER: 1}
+    assert by_material(table, 'net_required') == {FLOUR: 2, SUGAR: 1, BUTTER: 1}
+
+
+def test_orders_without_a_bom_plan_nothing():
+    table, missing_bom = plan_requirements(matrix(), [order(7, SOUP, 3), order(8, FLOUR, 2)], MATERIALS)
+
+    assert missing_bom == [7, 8]
+    assert table.empty
+
+
+def test_max_buildable_is_the_scarcest_material():
+    requirements = matrix()
+
+    # Stock aligned with materials: flour 9, sugar 2, butter 10
+    units, limiting = requirements.max_buildable([9, 2, 10])
+
+    # Dough min(9 // 2, 10 // 1); bread also needs 1 sugar; cake needs 3 sugar
+    assert list(units) == [4, 2, 0]
+    assert list(limiting) == [FLOUR, SUGAR, SUGAR]
+
+
+def test_max_buildable_tolerates_float_error():
+    # 0.3 / 0.1 is 2.9999999999999996 in floating point
+    requirements = RequirementsMatrix([BREAD], [FLOUR], [0], [0], [0.1])
+
+    units, _ = requirements.max_buildable([0.3])
+
+    assert list(units) == [3]
+
+
+def test_max_buildable_ties_and_negative_stock():
+    requirements = RequirementsMatrix([BREAD, CAKE], [FLOUR, SUGAR], [0, 0, 1, 1], [0, 1, 0, 1], [1, 2, 1, 1])
+
+    units, limiting = requirements.max_buildable([4, 8])
+    assert list(units) == [4, 4]
+    # Equal ratios: the lower material id is reported
+    assert list(limiting) == [FLOUR, FLOUR]
+
+    units, limiting = requirements.max_buildable([-5, 8])
+    assert list(units) == [0, 0]
+    assert list(limiting) == [FLOUR, FLOUR]
+
+
+def test_assemblies_with_only_zero_quantity_lines_report_minus_one():
+    requirements = RequirementsMatrix([BREAD, CAKE], [FLOUR, SUGAR], [0, 0, 1], [0, 1, 1], [0, 0, 2])
+
+    units, limiting = requirements.max_buildable([10, 10])
+
+    assert list(units) == [-1, 5]
+    assert list(limiting) == [-1, SUGAR]
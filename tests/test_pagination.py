@@ -0,0 +1,55 @@
+"""Keyset pagination (database/pagination.py) against the local backend"""
+import pytest
+
+from database.pagination import fetch_page, iter_pages
+
+CATEGORIES = ['b', None, 'a', 'b, "quoted"', None, 'a', 'c', None, 'b']
+
+
+@pytest.fixture
+def products(client):
+    """Product ids by category, including NULLs, repeats and characters the or= syntax needs quoted"""
+    rows = [{'name': f'P{number}', 'sku': f'P{number}', 'category': category}
+            for number, category in enumerate(CATEGORIES)]
+    return [(row['id'], row['category']) for row in client.table('products').insert(rows).execute().data]
+
+
+def expected_order(products, desc):
+    # NULLs last ascending and first descending, ties by id in the same direction
+    present = sorted((category, pid) for pid, category in products if category is not None)
+    nulls = sorted((None, pid) for pid, category in products if category is None)
+    ordered = present + nulls
+    return [pid for _, pid in (ordered[::-1] if desc else ordered)]
+
+
+@pytest.mark.parametrize('desc', [False, True])
+@pytest.mark.parametrize('page_size', [1, 2, 4, 20])
+def test_pages_cover_every_row_once_in_order(client, products, desc, page_size):
+    ids = [row['id'] for page in iter_pages(client, 'products', 'name', page_size=page_size,
+                                            order_column='category', desc=desc) for row in page]
+
+    assert ids == expected_order(products, desc)
+
+
+def test_fetch_page_returns_a_cursor_until_the_last_page(client, products):
+    rows, cursor = fetch_page(client, 'products', 'name', page_size=4, order_column='category')
+    assert [row['category'] for row in rows] == ['a', 'a', 'b', 'b']
+    assert cursor == ('b', rows[-1]['id'])
+    # The cursor columns are added to the selected ones
+    assert set(rows[0]) == {'name', 'id', 'category'}
+
+    rows, cursor = fetch_page(client, 'products', 'name', cursor=cursor, page_size=4, order_column='category')
+    assert [row['category'] for row in rows] == ['b, "quoted"', 'c', None, None]
+    assert cursor == (None, rows[-1]['id'])
+
+    rows, cursor = fetch_page(client, 'products', 'name', cursor=cursor, page_size=4, order_column='category')
+    assert [row['category'] for row in rows] == [None]
+    assert cursor is None
+
+
+def test_pages_by_id_with_filters(client, products):
+    pages = list(iter_pages(client, 'products', 'id, category', [('eq', 'category', 'b')], page_size=1))
+
+    assert [[row['id'] for row in page] for page in pages] == [
+        [pid] for pid, category in products if category == 'b']
+
@@ -0,0 +1,73 @@
+"""post_sale (database/sql/01_post_sale.sql and its SQLite port)"""
+import pytest
+
+from database.procedures import post_sale
+
+
+def test_post_sale_writes_the_sale_items_and_stock(db):
+    bread = db.add_product('Bread', 'finished', quantity=10, price_paid=2)
+    cake = db.add_product('Cake', 'finished', quantity=4, price_paid=3)
+
+    result = post_sale(db.client, {'invoice_number': 'INV-1', 'customer_name': 'Ann', 'payment_method': 'Cash',
+                                   'total_amount': 31, 'sale_date': '2026-03-10T10:00:00'}, [
+        {'product_id': bread, 'product_name': 'Bread', 'quantity': 3, 'unit_price': 5, 'total_price': 15},
+        {'product_id': cake, 'product_name': 'Cake', 'quantity': 2, 'unit_price': 8, 'total_price': 16},
+    ])
+
+    sales = db.rows('sales')
+    assert [(sale['id'], sale['invoice_number'], sale['total_amount']) for sale in sales] == [
+        (result['id'], 'INV-1', 31)]
+    assert result['invoice_number'] == 'INV-1'
+    assert [(item['product_id'], item['quantity'], item['total_price']) for item in db.rows('sale_items')] == [
+        (bread, 3, 15), (cake, 2, 16)]
+    assert db.stock(bread) == 7
+    assert db.stock(cake) == 2
+
+
+def test_post_sale_adds_up_repeated_lines(db):
+    bread = db.add_product('Bread', 'finished', quantity=5, price_paid=2)
+
+    post_sale(db.client, {'total_amount': 20}, [
+        {'product_id': bread, 'quantity': 2, 'unit_price': 5, 'total_price': 10},
+        {'product_id': bread, 'quantity': 2, 'unit_price': 5, 'total_price': 10},
+    ])
+
+    assert db.stock(bread) == 1
+    assert len(db.rows('sale_items')) == 2
+
+
+def test_post_sale_rejects_insufficient_stock(db):
+    bread = db.add_product('Bread', 'finished', quantity=5, price_paid=2)
+    cake = db.add_product('Cake', 'finished', quantity=3, price_paid=3)
+
+    # The whole sale fails, including the line that had enough stock
+    with pytest.raises(db.error, match='Insufficient stock'):
+        post_sale(db.client, {'total_amount': 50}, [
+            {'product_id': bread, 'quantity': 2, 'unit_price': 5, 'total_price': 10},
+            {'product_id': cake, 'quantity': 5, 'unit_price': 8, 'total_price': 40},
+        ])
+
+    assert db.stock(bread) == 5
+    assert db.stock(cake) == 3
+    assert db.rows('sales') == []
+    assert db.rows('sale_items') == []
+
+
+def test_post_sale_rejects_repeated_lines_over_stock(db):
+    bread = db.add_product('Bread', 'finished', quantity=3, price_paid=2)
+
+    with pytest.raises(db.error, match='Insufficient stock'):
+        post_sale(db.client, {'total_amount': 20}, [
+            {'product_id': bread, 'quantity': 2, 'unit_price': 5, 'total_price': 10},
+            {'product_id': bread, 'quantity': 2, 'unit_price': 5, 'total_price': 10},
+        ])
+
+    assert db.stock(bread) == 3
+    assert db.rows('sales') == []
+
+
+def test_post_sale_rejects_an_empty_sale(db):
+    with pytest.raises(db.error, match='Sale has no items'):
+        post_sale(db.client, {'total_amount': 0}, [])
+
+    assert db.rows('sales') == []
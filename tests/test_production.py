@@ -0,0 +1,56 @@
+"""start_production (database/sql/02_start_production.sql and its SQLite port)"""
+import pytest
+
+from database.procedures import start_production
+
+
+def test_start_production_opens_the_order_and_consumes_materials(db):
+    flour = db.add_product('Flour', quantity=10, price_paid=2)
+    sugar = db.add_product('Sugar', quantity=5, price_paid=1)
+    bread = db.add_product('Bread', 'finished')
+
+    order = start_production(db.client, {'product_id': bread, 'product_name': 'Bread', 'quantity_planned': 2}, [
+        {'raw_material_id': flour, 'total_needed': 4},
+        {'raw_material_id': sugar, 'total_needed': 1},
+    ])
+
+    orders = db.rows('production_orders')
+    assert [(row['id'], row['product_id'], row['quantity_planned'], row['status']) for row in orders] == [
+        (order['id'], bread, 2, 'in_progress')]
+    consumption = db.rows('production_consumption', order='raw_material_id')
+    assert [(row['production_order_id'], row['raw_material_id'], row['quantity_consumed'])
+            for row in consumption] == [(order['id'], flour, 4), (order['id'], sugar, 1)]
+    assert db.stock(flour) == 6
+    assert db.stock(sugar) == 4
+    assert db.stock(bread) == 0
+
+
+def test_start_production_adds_up_repeated_materials(db):
+    flour = db.add_product('Flour', quantity=10, price_paid=2)
+    bread = db.add_product('Bread', 'finished')
+
+    start_production(db.client, {'product_id': bread, 'quantity_planned': 1}, [
+        {'raw_material_id': flour, 'total_needed': 3},
+        {'raw_material_id': flour, 'total_needed': 4},
+    ])
+
+    assert db.stock(flour) == 3
+    assert [row['quantity_consumed'] for row in db.rows('production_consumption')] == [7]
+
+
+def test_start_production_rejects_insufficient_materials(db):
+    flour = db.add_product('Flour', quantity=10, price_paid=2)
+    sugar = db.add_product('Sugar', quantity=1, price_paid=1)
+    bread = db.add_product('Bread', 'finished')
+
+    # Nothing is consumed, including the material that was available
+    with pytest.raises(db.error, match='Insufficient materials'):
+        start_production(db.client, {'product_id': bread, 'quantity_planned': 1}, [
+            {'raw_material_id': flour, 'total_needed': 4},
+            {'raw_material_id': sugar, 'total_needed': 2},
+        ])
+
+    assert db.stock(flour) == 10
+    assert db.stock(sugar) == 1
+    assert db.rows('production_orders') == []
+    assert db.rows('production_consumption') == []
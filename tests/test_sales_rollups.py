@@ -0,0 +1,102 @@
+"""Sales rollups kept by post_sale and rebuilt by rebuild_sales_rollups (11_sales_rollups.sql)"""
+from datetime import date
+
+import pytest
+
+from database.metrics import get_sales_summary
+from utils.sales_analytics import get_product_sales, get_sales_series, rebuild_rollups
+
+ROLLUPS = {'sales_daily': ('sale_day', 'product_id'), 'sales_monthly': ('sale_month', 'product_id'),
+           'sales_daily_totals': ('sale_day',)}
+
+
+def rollup_rows(db):
+    return {table: sorted(db.rows(table, order=key[0]), key=lambda row: [row[column] for column in key])
+            for table, key in ROLLUPS.items()}
+
+
+def three_sales(db):
+    """Bread costs 2 and sells at 5, cake costs 3 and sells at 8, across a month end"""
+    bread = db.add_product('Bread', 'finished')
+    cake = db.add_product('Cake', 'finished')
+    db.receive(bread, 20, 2.0)
+    db.receive(cake, 20, 3.0)
+    db.sell(bread, 2, 5.0, sale_date='2026-02-27T10:00:00')
+    db.sell(cake, 3, 8.0, sale_date='2026-03-02T10:00:00')
+    db.sell(bread, 1, 5.0, sale_date='2026-03-02T15:00:00')
+    return bread, cake
+
+
+def test_post_sale_adds_to_every_rollup(db):
+    bread = db.add_product('Bread', 'finished')
+    db.receive(bread, 10, 2.0)
+
+    db.sell(bread, 7, 5.0)
+
+    daily = db.rows('sales_daily', order='sale_day')
+    assert [(row['sale_day'], row['product_id']) for row in daily] == [('2026-03-10', bread)]
+    assert (daily[0]['revenue'], daily[0]['units'], daily[0]['cost'], daily[0]['sales_count']) == (35, 7, 14, 1)
+    assert [(row['sale_month'], row['revenue']) for row in db.rows('sales_monthly', order='sale_month')] == [
+        ('2026-03-01', 35)]
+    totals = db.rows('sales_daily_totals', order='sale_day')
+    assert [(row['sale_day'], row['sales_count'], row['sales_amount']) for row in totals] == [('2026-03-10', 1, 35)]
+
+
+def test_series_has_a_row_for_every_period(db):
+    three_sales(db)
+
+    daily = get_sales_series(db.client, date(2026, 2, 27), date(2026, 3, 3))
+    assert daily['revenue'].tolist() == [10, 0, 0, 29, 0]
+    assert daily['sales_count'].tolist() == [1, 0, 0, 2, 0]
+    assert daily['margin'].tolist() == [6, 0, 0, 18, 0]
+
+    monthly = get_sales_series(db.client, date(2026, 2, 15), date(2026, 3, 31), bucket='month')
+    assert [period.strftime('%Y-%m') for period in monthly['period']] == ['2026-02', '2026-03']
+    assert monthly['revenue'].tolist() == [10, 29]
+    # 2026-02-27 is a Friday, 2026-03-02 a Monday
+    weekly = get_sales_series(db.client, date(2026, 2, 27), date(2026, 3, 3), bucket='week')
+    assert [period.strftime('%m-%d') for period in weekly['period']] == ['02-23', '03-02']
+    with pytest.raises(ValueError):
+        get_sales_series(db.client, date(2026, 3, 1), date(2026, 3, 2), bucket='year')
+
+
+def test_product_ranking_spans_whole_and_partial_months(db):
+    bread, cake = three_sales(db)
+
+    top = get_product_sales(db.client, date(2026, 2, 1), date(2026, 3, 31))
+    assert list(zip(top['product_id'], top['revenue'], top['units'])) == [(cake, 24, 3), (bread, 15, 3)]
+    assert top['margin'].tolist() == [15, 9]
+    # Only the tail of February and the start of March, read from sales_daily
+    partial = get_product_sales(db.client, date(2026, 2, 28), date(2026, 3, 2), order='units')
+    assert list(zip(partial['product_id'], partial['units'])) == [(cake, 3), (bread, 1)]
+    first = get_product_sales(db.client, date(2026, 2, 1), date(2026, 3, 31), limit=1, order='margin')
+    assert first['product_id'].tolist() == [cake]
+    assert pytest.approx(first['margin_pct'].tolist()) == [15 / 24 * 100]
+
+
+def test_rebuild_matches_the_incremental_rollups(db):
+    three_sales(db)
+    incremental = rollup_rows(db)
+
+    assert rebuild_rollups(db.client) == 2
+
+    assert rollup_rows(db) == incremental
+
+
+def test_rebuild_recomputes_only_the_range(db):
+    bread, cake = three_sales(db)
+    db.update('sales_daily', {'revenue': 999}, sale_day='2026-02-27')
+    db.update('sales_daily', {'revenue': 999}, sale_day='2026-03-02')
+
+    assert rebuild_rollups(db.client, date(2026, 3, 1), date(2026, 3, 31)) == 1
+
+    daily = {(row['sale_day'], row['product_id']): row['revenue'] for row in db.rows('sales_daily', order='sale_day')}
+    assert daily == {('2026-02-27', bread): 999, ('2026-03-02', bread): 5, ('2026-03-02', cake): 24}
+
+
+def test_sales_summary_reads_the_daily_totals(db):
+    three_sales(db)
+
+    summary = get_sales_summary(db.client, date(2026, 3, 2))
+
+    assert summary == {'sales_count': 3, 'sales_total': 39.0, 'sales_average': 13.0, 'sales_today': 29.0}
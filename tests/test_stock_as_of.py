@@ -0,0 +1,98 @@
+"""Point-in-time stock from daily checkpoints plus movement replay (10_inventory_snapshots.sql)"""
+from datetime import date, datetime, timedelta, timezone
+
+from database.ledger import _end_of_day, get_stock_as_of, get_stock_at, record_movement, take_snapshots
+from database.procedures import call_procedure
+
+
+def backdate(db, source_type, source_id, moved_at):
+    db.update('inventory_movements', {'moved_at': moved_at}, source_type=source_type, source_id=source_id)
+
+
+def history(db):
+    """Flour: 10 received on Jan 1, 4 sold on Jan 3; Sugar: 5 received on Jan 2"""
+    flour = db.add_product('Flour')
+    sugar = db.add_product('Sugar')
+    backdate(db, 'inventory_receipt', db.receive(flour, 10, 2.0)['id'], '2024-01-01T09:00:00')
+    backdate(db, 'inventory_receipt', db.receive(sugar, 5, 1.0)['id'], '2024-01-02T09:00:00')
+    backdate(db, 'sale', db.sell(flour, 4, 5.0, sale_date='2024-01-03T09:00:00')['id'], '2024-01-03T09:00:00')
+    return flour, sugar
+
+
+def stock(result):
+    return {row['product_id']: row['quantity'] for row in result['stock']}
+
+
+def test_without_checkpoints_the_whole_history_is_replayed(db):
+    flour, sugar = history(db)
+
+    result = call_procedure(db.client, 'stock_as_of', {'p_at': '2024-01-02T23:59:59'})
+
+    assert result['checkpoint'] is None
+    assert result['movements'] == 2
+    assert stock(result) == {flour: 10, sugar: 5}
+    assert call_procedure(db.client, 'stock_as_of', {'p_at': '2023-12-31T23:59:59'})['stock'] == []
+
+
+def test_checkpoints_carry_balances_forward(db):
+    flour, sugar = history(db)
+
+    assert take_snapshots(db.client, date(2024, 1, 2)) == 2
+    assert take_snapshots(db.client, date(2024, 1, 2)) == 0
+
+    snapshots = db.rows('inventory_snapshots', order='snapshot_date')
+    assert sorted((row['snapshot_date'], row['product_id'], row['quantity']) for row in snapshots) == [
+        ('2024-01-01', flour, 10), ('2024-01-02', flour, 10), ('2024-01-02', sugar, 5)]
+
+    result = call_procedure(db.client, 'stock_as_of', {'p_at': '2024-01-03T23:59:59'})
+    assert result['checkpoint'] == '2024-01-02'
+    assert result['movements'] == 1
+    assert stock(result) == {flour: 6, sugar: 5}
+    assert [row['value'] for row in result['stock']] == [12, 5]
+
+
+def test_as_of_is_the_same_with_or_without_checkpoints(db):
+    flour, sugar = history(db)
+    days = [date(2024, 1, 1) + timedelta(days=i) for i in range(4)]
+    before = [get_stock_as_of(db.client, day)['stock'] for day in days]
+
+    take_snapshots(db.client, date(2024, 1, 3))
+
+    assert [get_stock_as_of(db.client, day)['stock'] for day in days] == before
+    assert before[2] == {flour: {'quantity': 6.0, 'value': 12.0, 'average_cost': 2.0},
+                         sugar: {'quantity': 5.0, 'value': 5.0, 'average_cost': 1.0}}
+
+
+def test_product_filter(db):
+    flour, sugar = history(db)
+    take_snapshots(db.client, date(2024, 1, 1))
+
+    assert list(get_stock_as_of(db.client, date(2024, 1, 3), [sugar])['stock']) == [sugar]
+
+
+def test_as_of_datetimes_are_utc_unless_zoned(client):
+    assert _end_of_day(date(2024, 1, 3)) == datetime(2024, 1, 3, 23, 59, 59, 999999, tzinfo=timezone.utc)
+    assert _end_of_day(datetime(2024, 1, 3, 12)) == datetime(2024, 1, 3, 12, tzinfo=timezone.utc)
+    # 09:00 in New York is 14:00 UTC
+    ny = timezone(timedelta(hours=-5))
+    assert _end_of_day(datetime(2024, 1, 3, 9, tzinfo=ny)) == datetime(2024, 1, 3, 14, tzinfo=timezone.utc)
+
+
+def test_stock_as_of_writes_no_checkpoints(db):
+    history(db)
+
+    get_stock_as_of(db.client, date(2024, 1, 3))
+
+    assert db.rows('inventory_snapshots', order='snapshot_date') == []
+
+
+def test_stock_at_reads_the_last_movement_before_the_time(client):
+    flour = client.table('products').insert({'name': 'Flour', 'sku': 'F'}).execute().data[0]['id']
+    for moved_at, quantity in (('2024-01-01T09:00:00', 10), ('2024-01-03T09:00:00', -4)):
+        movement = record_movement(client, flour, 'adjustment', quantity, 2)
+        client.table('inventory_movements').update({'moved_at': moved_at}).eq('id', movement['id']).execute()
+
+    assert get_stock_at(client, flour, date(2023, 12, 31))['movement_id'] is None
+    assert get_stock_at(client, flour, date(2024, 1, 2))['quantity'] == 10
+    assert get_stock_at(client, flour, datetime(2024, 1, 3, 8, 59))['quantity'] == 10
+    assert get_stock_at(client, flour, date(2024, 1, 3))['quantity'] == 6
@@ -0,0 +1,123 @@
+from collections import defaultdict
+from database.cache import cached_select
+
+
+class BOMCycleError(ValueError):
+    """Raised when bill_of_materials contains a circular reference"""
+
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__("BOM cycle detected: " + " -> ".join(str(pid) for pid in cycle))
+
+
+class BOMGraph:
+    """In-memory adjacency index over bill_of_materials for multi-level explosion.
+
+    Any product that appears as a finished_product_id is an assembly; everything
+    else is a leaf raw material. Per-unit leaf requirements are computed once per
+    assembly in topological order and reused for every explosion.
+    """
+
+    def __init__(self, bom_rows):
+        self.children = defaultdict(dict)
+        for row in bom_rows:
+            parent = row.get('finished_product_id')
+            child = row.get('raw_material_id')
+            if parent is None or child is None:
+                continue
+            quantity = float(row.get('quantity_required') or 0)
+            self.children[parent][child] = self.children[parent].get(child, 0.0) + quantity
+        self.children = dict(self.children)
+        self._order = self._topological_order()
+        self._requirements = None
+
+    @classmethod
+    def from_supabase(cls, supabase):
+        """Build the graph from one bulk bill_of_materials read"""
+        rows = cached_select(
+            supabase, 'bill_of_materials', 'finished_product_id, raw_material_id, quantity_required'
+        )
+        return cls(rows)
+
+    def is_assembly(self, product_id):
+        return product_id in self.children
+
+    def topological_order(self):
+        """Assemblies ordered so every sub-assembly comes before its parents"""
+        return list(self._order)
+
+    def unit_requirements(self, product_id):
+        """Leaf raw material quantities needed for one unit of product_id"""
+        if not self.is_assembly(product_id):
+            return {product_id: 1.0}
+        return dict(self._all_requirements()[product_id])
+
+    def explode(self, product_id, quantity):
+        """Leaf raw material quantities needed to build quantity units"""
+        return {leaf: qty * quantity for leaf, qty in self.unit_requirements(product_id).items()}
+
+    def explode_orders(self, orders):
+        """Total leaf requirements for an iterable of (product_id, quantity) pairs"""
+        demand = defaultdict(float)
+        for product_id, quantity in orders:
+            demand[product_id] += quantity
+
+        totals = defaultdict(float)
+        requirements = self._all_requirements()
+        for product_id, quantity in demand.items():
+            for leaf, qty in requirements.get(product_id, {product_id: 1.0}).items():
+                totals[leaf] += qty * quantity
+        return dict(totals)
+
+    def rollup_costs(self, leaf_prices):
+        """Cost per unit of every assembly given a leaf product_id -> price mapping"""
+        costs = {}
+        for product_id in self._order:
+            total = 0.0
+            for child, qty in self.children[product_id].items():
+                child_cost = costs[child] if child in costs else leaf_prices.get(child, 0.0)
+                total += qty * (child_cost or 0.0)
+            costs[product_id] = total
+        return costs
+
+    def _all_requirements(self):
+        if self._requirements is None:
+            requirements = {}
+            for product_id in self._order:
+                vector = defaultdict(float)
+                for child, qty in self.children[product_id].items():
+                    if child in requirements:
+                        for leaf, leaf_qty in requirements[child].items():
+                            vector[leaf] += qty * leaf_qty
+                    else:
+                        vector[child] += qty
+                requirements[product_id] = dict(vector)
+            self._requirements = requirements
+        return self._requirements
+
+    def _topological_order(self):
+        # Iterative DFS post-order; a grey node reached again means a cycle
+        order = []
+        state = {}
+        for root in self.children:
+            if root in state:
+                continue
+            state[root] = 'visiting'
+            stack = [(root, iter(self.children[root]))]
+            while stack:
+                node, pending = stack[-1]
+                for child in pending:
+                    if child not in self.children:
+                        continue
+                    if state.get(child) == 'visiting':
+                        path = [n for n, _ in stack]
+                        raise BOMCycleError(path[path.index(child):] + [child])
+                    if child not in state:
+                        state[child] = 'visiting'
+                        stack.append((child, iter(self.children[child])))
+                        break
+                else:
+                    stack.pop()
+                    state[node] = 'done'
+                    order.append(node)
+        return order
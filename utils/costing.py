@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from database.cache import cached_select
+from utils.bom_graph import BOMGraph
+
+BOM_COST_COLUMNS = 'finished_product_id, raw_material_id, quantity_required, raw_material:raw_material_id(price_paid)'
+PRODUCT_ID_CHUNK = 200
+
+
+def fetch_bom_costs(supabase, product_ids=None):
+    """Fetch BOM lines with their raw material prices.
+
+    All lines in a single request, or with product_ids only the lines under
+    those products: one request per BOM level (per chunk of assemblies).
+    """
+    if product_ids is None:
+        rows = cached_select(supabase, 'bill_of_materials', BOM_COST_COLUMNS, depends_on=['products'])
+        return bom_cost_frame(rows)
+
+    rows, seen = [], set()
+    frontier = sorted({int(pid) for pid in product_ids})
+    while frontier:
+        seen.update(frontier)
+        children = set()
+        for start in range(0, len(frontier), PRODUCT_ID_CHUNK):
+            chunk = frontier[start:start + PRODUCT_ID_CHUNK]
+            level = cached_select(supabase, 'bill_of_materials', BOM_COST_COLUMNS,
+                                  filters=[('in_', 'finished_product_id', chunk)], depends_on=['products'])
+            rows.extend(level)
+            children.update(row['raw_material_id'] for row in level)
+        # A child already seen closes a cycle; BOMGraph reports it
+        frontier = sorted(children - seen)
+    return bom_cost_frame(rows)
+
+
+def bom_cost_frame(rows):
+    """Flatten BOM rows into finished_product_id / raw_material_id / quantity_required / price_paid"""
+    columns = ['finished_product_id', 'raw_material_id', 'quantity_required', 'price_paid']
+    if not rows:
+        return pd.DataFrame(columns=columns)
+
+    df = pd.json_normalize(rows)
+    if 'raw_material.price_paid' in df.columns:
+        df = df.rename(columns={'raw_material.price_paid': 'price_paid'})
+    for column in columns:
+        if column not in df.columns:
+            df[column] = np.nan
+    df['quantity_required'] = pd.to_numeric(df['quantity_required'], errors='coerce').fillna(0.0)
+    df['price_paid'] = pd.to_numeric(df['price_paid'], errors='coerce').fillna(0.0)
+    return df[columns]
+
+
+def rollup_costs(bom_df):
+    """Sum quantity_required * price_paid per finished product, rolling up sub-assemblies"""
+    if bom_df.empty:
+        return {}
+    line_cost = bom_df['quantity_required'].to_numpy(dtype=float) * bom_df['price_paid'].to_numpy(dtype=float)
+    costs = pd.Series(line_cost).groupby(bom_df['finished_product_id'].to_numpy()).sum()
+
+    # Sub-assemblies are costed from their own BOM rather than their price_paid
+    if bom_df['raw_material_id'].isin(costs.index).any():
+        graph = BOMGraph(bom_df.to_dict('records'))
+        leaf_prices = dict(zip(bom_df['raw_material_id'], bom_df['price_paid']))
+        return {int(pid): float(cost) for pid, cost in graph.rollup_costs(leaf_prices).items()}
+
+    return {int(pid): float(cost) for pid, cost in costs.items()}
+
+
+def calculate_product_costs(supabase, product_ids=None):
+    """Return a product_id -> cost mapping for every product with a BOM (or only product_ids).
+
+    Keys are ints whatever type product_ids holds. Raises BOMCycleError when
+    the BOM rows involved contain a cycle, rather than reporting every cost as zero.
+    """
+    costs = rollup_costs(fetch_bom_costs(supabase, product_ids))
+    if product_ids is not None:
+        wanted = {int(pid) for pid in product_ids}
+        costs = {pid: cost for pid, cost in costs.items() if pid in wanted}
+    return costs
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datetime import date, timedelta
+from database.cache import query_cache
+
+EXPIRY_WINDOW_DAYS = 30
+EXPIRY_CACHE_TTL = 300
+EXPIRING_BATCH_COLUMNS = ['batch_number', 'product_name', 'product_sku', 'quantity',
+                          'expiry_date', 'days_left', 'severity']
+
+
+def get_expiring_batches(supabase, days=EXPIRY_WINDOW_DAYS, today=None):
+    """Batches with stock expiring between today and today + days, soonest first.
+
+    Only the date window is read (served by the batches(expiry_date) index in
+    database/sql/05_batch_expiry.sql), and the result is cached until batches
+    or products change.
+    """
+    today = today or date.today()
+    window_end = today + timedelta(days=days)
+
+    def load():
+        response = supabase.table('batches').select(
+            'batch_number, quantity, expiry_date, product:product_id(name, sku)'
+        ).gte('expiry_date', today.isoformat()).lte(
+            'expiry_date', window_end.isoformat()
+        ).gt('quantity', 0).order('expiry_date').execute()
+        return expiring_batch_frame(response.data, today)
+
+    key = ('expiring_batches', today.isoformat(), days)
+    return query_cache.get_or_load(key, load, ('batches', 'products'), EXPIRY_CACHE_TTL)
+
+
+def expiring_batch_frame(rows, today):
+    """Flatten batch rows and add vectorized days_left / severity columns"""
+    if not rows:
+        return pd.DataFrame(columns=EXPIRING_BATCH_COLUMNS)
+
+    df = pd.json_normalize(rows).rename(columns={'product.name': 'product_name', 'product.sku': 'product_sku'})
+    for column in ('product_name', 'product_sku'):
+        df[column] = df[column].fillna('Unknown') if column in df.columns else 'Unknown'
+
+    df['expiry_date'] = pd.to_datetime(df['expiry_date'], errors='coerce')
+    df['days_left'] = (df['expiry_date'] - pd.Timestamp(today)).dt.days
+    df['severity'] = np.select(
+        [df['days_left'] <= 7, df['days_left'] <= 14],
+        ['🔴 Critical', '🟡 Warning'],
+        default='🟠 Notice'
+    )
+    return df.sort_values('expiry_date', kind='stable')[EXPIRING_BATCH_COLUMNS].reset_index(drop=True)
+
+
+def show_lot_assignments(result, names=None):
+    """Render the batches a sale or production order was drawn from (post_sale / start_production result)"""
+    allocations = (result or {}).get('allocations') or []
+    shortfalls = (result or {}).get('shortfalls') or []
+    names = names or {}
+    if allocations:
+        df = pd.DataFrame(allocations)
+        df['product'] = df['product_id'].map(lambda pid: names.get(pid, f"Product {pid}"))
+        display_columns = {
+            'product': 'Product',
+            'batch_number': 'Batch',
+            'expiry_date': 'Expiry',
+            'quantity': 'Quantity'
+        }
+        st.dataframe(df.rename(columns=display_columns)[list(display_columns.values())],
+                     use_container_width=True, hide_index=True)
+    for shortfall in shortfalls:
+        name = names.get(shortfall['product_id'], f"Product {shortfall['product_id']}")
+        st.caption(f"{shortfall['quantity']:g} of {name} came from stock not tracked in any batch")
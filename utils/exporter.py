@@ -0,0 +1,195 @@
+import argparse
+import csv
+import gzip
+import io
+import os
+import sys
+from datetime import date, datetime, timedelta
+from database.pagination import iter_pages
+
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+FORMATS = ("csv", "csv.gz", "parquet")
+
+# Export name -> table, select string, date column for --since/--until, and
+# the output fields with their types (kept fixed so every chunk shares a schema)
+EXPORTS = {
+    "products": {
+        "table": "products",
+        "columns": "id, name, sku, product_type, category, category_code, quantity_in_stock, "
+                   "price_paid, price_selling, supplier_id",
+        "date_column": None,
+        "fields": [("id", "int"), ("name", "str"), ("sku", "str"), ("product_type", "str"),
+                   ("category", "str"), ("category_code", "str"), ("quantity_in_stock", "float"),
+                   ("price_paid", "float"), ("price_selling", "float"), ("supplier_id", "int")],
+    },
+    "sales": {
+        "table": "sales",
+        "columns": "id, invoice_number, sale_date, customer_name, payment_method, total_amount, "
+                   "sale_items(product_id, product_name, quantity, unit_price, total_price)",
+        "date_column": "sale_date",
+        "fields": [("sale_id", "int"), ("invoice_number", "str"), ("sale_date", "str"),
+                   ("customer_name", "str"), ("payment_method", "str"), ("sale_total", "float"),
+                   ("product_id", "int"), ("product_name", "str"), ("quantity", "float"),
+                   ("unit_price", "float"), ("total_price", "float")],
+    },
+    "receipts": {
+        "table": "inventory_receipts",
+        "columns": "id, receipt_date, product_id, product_name, supplier_id, quantity_received, "
+                   "unit_cost, total_cost, reference_number",
+        "date_column": "receipt_date",
+        "fields": [("id", "int"), ("receipt_date", "str"), ("product_id", "int"), ("product_name", "str"),
+                   ("supplier_id", "int"), ("quantity_received", "float"), ("unit_cost", "float"),
+                   ("total_cost", "float"), ("reference_number", "str")],
+    },
+    "batches": {
+        "table": "batches",
+        "columns": "id, product_id, batch_number, quantity, receipt_id, expiry_date, location",
+        "date_column": "expiry_date",
+        "fields": [("id", "int"), ("product_id", "int"), ("batch_number", "str"), ("quantity", "float"),
+                   ("receipt_id", "int"), ("expiry_date", "str"), ("location", "str")],
+    },
+}
+
+
+def iter_export_rows(supabase, name, since=None, until=None, filters=(), page_size=EXPORT_PAGE_SIZE):
+    """Yield lists of flat, typed output rows for an export, one keyset page at a time"""
+    spec = EXPORTS[name]
+    filters = list(filters)
+    if spec["date_column"]:
+        if since:
+            filters.append(('gte', spec["date_column"], str(since)))
+        if until:
+            # Inclusive of the whole last day, also for timestamp columns
+            next_day = date.fromisoformat(str(until)[:10]) + timedelta(days=1)
+            filters.append(('lt', spec["date_column"], next_day.isoformat()))
+
+    fields = spec["fields"]
+    for page in iter_pages(supabase, spec["table"], spec["columns"], filters, page_size):
+        rows = _flatten_sales(page) if name == "sales" else page
+        yield [_typed_row(row, fields) for row in rows]
+
+
+def _flatten_sales(page):
+    """One output row per sale line, carrying the sale header fields"""
+    rows = []
+    for sale in page:
+        header = {
+            "sale_id": sale["id"],
+            "invoice_number": sale.get("invoice_number"),
+            "sale_date": sale.get("sale_date"),
+            "customer_name": sale.get("customer_name"),
+            "payment_method": sale.get("payment_method"),
+            "sale_total": sale.get("total_amount"),
+        }
+        for item in sale.get("sale_items") or [{}]:
+            rows.append({**header, **item})
+    return rows
+
+
+def _typed_row(row, fields):
+    typed = {}
+    for field, kind in fields:
+        value = row.get(field)
+        if value is not None and value != "":
+            value = int(value) if kind == "int" else float(value) if kind == "float" else str(value)
+        else:
+            value = None
+        typed[field] = value
+    return typed
+
+
+def write_export(pages, fields, fileobj, fmt="csv"):
+    """Stream pages of row dicts into fileobj as CSV, gzip'd CSV or Parquet.
+
+    Only one page is held at a time. fileobj must be opened in binary mode.
+    Returns the number of rows written.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == "parquet":
+        return _write_parquet(pages, fields, fileobj)
+
+    stream = gzip.GzipFile(fileobj=fileobj, mode="wb") if fmt == "csv.gz" else fileobj
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    try:
+        writer = csv.DictWriter(text, fieldnames=[field for field, _ in fields])
+        writer.writeheader()
+        count = 0
+        for rows in pages:
+            writer.writerows(rows)
+            count += len(rows)
+        text.flush()
+    finally:
+        # Detach so closing the wrapper does not close the caller's file
+        text.detach()
+        if stream is not fileobj:
+            stream.close()
+    return count
+
+
+def _write_parquet(pages, fields, fileobj):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    arrow_types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string()}
+    schema = pa.schema([(field, arrow_types[kind]) for field, kind in fields])
+    count = 0
+    with pq.ParquetWriter(fileobj, schema) as writer:
+        for rows in pages:
+            if rows:
+                # Each page becomes its own row group
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                count += len(rows)
+    return count
+
+
+def export_to_file(supabase, name, path, fmt="csv", since=None, until=None, page_size=EXPORT_PAGE_SIZE):
+    """Export one dataset to path; returns the number of rows written"""
+    pages = iter_export_rows(supabase, name, since, until, page_size=page_size)
+    with open(path, "wb") as fileobj:
+        return write_export(pages, EXPORTS[name]["fields"], fileobj, fmt)
+
+
+def export_filename(name, fmt, stamp=None):
+    stamp = stamp or datetime.now().strftime('%Y%m%d')
+    return f"{name}_{stamp}.{fmt}"
+
+
+def main(argv=None):
+    """CLI entry point: python -m utils.exporter sales receipts --format csv.gz --out exports"""
+    parser = argparse.ArgumentParser(description="Export ERP tables without loading them into memory")
+    # No choices=: argparse checks the empty default list against them and rejects it
+    parser.add_argument("datasets", nargs="*", metavar="dataset",
+                        help=f"datasets to export: {', '.join(EXPORTS)} (default: all)")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--out", default=".", help="output directory")
+    parser.add_argument("--since", help="first date to include (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last date to include (YYYY-MM-DD)")
+    parser.add_argument("--page-size", type=int, default=EXPORT_PAGE_SIZE)
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.datasets if name not in EXPORTS]
+    if unknown:
+        parser.error(f"unknown dataset(s): {', '.join(unknown)} (choose from {', '.join(EXPORTS)})")
+    datasets = args.datasets or list(EXPORTS)
+
+    # Use the manager directly; the cached wrapper reports errors through Streamlit
+    from database.connection import create_connection_manager
+    try:
+        supabase = create_connection_manager().get_client()
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    os.makedirs(args.out, exist_ok=True)
+    for name in datasets:
+        path = os.path.join(args.out, export_filename(name, args.format))
+        count = export_to_file(supabase, name, path, args.format, args.since, args.until, args.page_size)
+        print(f"{name}: {count} rows -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,36 +1,22 @@
 import pandas as pd
 import io
-from datetime import datetime
 from database.connection import get_connection
+from database.invoice_numbers import generate_invoice_number as next_invoice_number
+from utils.costing import calculate_product_costs
 
 def calculate_product_cost(product_id):
     """Calculate cost of finished product based on BOM"""
     supabase = get_connection()
     try:
-        # Get BOM data with raw material prices
-        bom_response = supabase.table('bill_of_materials').select(
-            'quantity_required, raw_material:raw_material_id(price_paid)'
-        ).eq('finished_product_id', product_id).execute()
-        
-        if not bom_response.data:
-            return 0
-            
-        total_cost = 0
-        for item in bom_response.data:
-            quantity = item.get('quantity_required', 0)
-            raw_material = item.get('raw_material', {})
-            price = raw_material.get('price_paid', 0) if raw_material else 0
-            total_cost += quantity * price
-            
-        return float(total_cost)
+        return calculate_product_costs(supabase, [product_id]).get(int(product_id), 0)
     except Exception as e:
+        # Includes BOMCycleError; callers expect a number
         print(f"Error calculating product cost: {e}")
         return 0
 
-def generate_invoice_number():
+def generate_invoice_number(client):
     """Generate unique invoice number"""
-    now = datetime.now()
-    return f"INV-{now.strftime('%Y%m%d')}-{now.strftime('%H%M%S')}"
+    return next_invoice_number(client)
 
 def download_template(template_type):
     """Generate Excel template for bulk uploads"""
@@ -0,0 +1,267 @@
+import io
+import os
+import pandas as pd
+from database.cache import cached_select, invalidate
+
+CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "2000"))
+WRITE_BATCH_SIZE = int(os.getenv("IMPORT_WRITE_BATCH_SIZE", "500"))
+
+# Template column -> database column, per template produced by helpers.download_template
+TEMPLATE_COLUMNS = {
+    "Suppliers": {"Name": "name", "Contact": "contact", "Phone": "phone", "Email": "email",
+                  "RawMaterials": "raw_materials", "CategoryCodes": "category_codes"},
+    "RawMaterials": {"Name": "name", "SKU": "sku", "Category": "category", "CategoryCode": "category_code",
+                     "Quantity": "quantity_in_stock", "PricePaid": "price_paid", "Supplier": "supplier"},
+    "Products": {"Name": "name", "SKU": "sku", "Category": "category", "PriceSelling": "price_selling",
+                 "Supplier": "supplier"},
+    "BOM": {"ProductID": "product", "ProductName": "product_name", "RawMaterialID": "raw_material",
+            "QuantityRequired": "quantity_required", "Volume": "product_volume"},
+}
+REQUIRED_COLUMNS = {
+    "Suppliers": ["name"],
+    "RawMaterials": ["name", "sku"],
+    "Products": ["name", "sku"],
+    "BOM": ["raw_material", "quantity_required"],
+}
+KEY_COLUMNS = {"Suppliers": "name", "RawMaterials": "sku", "Products": "sku"}
+# product_type each product template writes; the sku upsert must not flip an existing product's type
+PRODUCT_TYPES = {"RawMaterials": "raw", "Products": "finished"}
+NUMERIC_COLUMNS = ["quantity_in_stock", "price_paid", "price_selling", "quantity_required", "product_volume"]
+
+
+def read_chunks(uploaded_file, filename, chunk_size=CHUNK_SIZE):
+    """Yield DataFrame chunks from an uploaded .csv or .xlsx file without loading it whole"""
+    if filename.lower().endswith(".csv"):
+        yield from pd.read_csv(uploaded_file, chunksize=chunk_size, dtype=str, keep_default_na=False)
+        return
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else "" for value in next(rows, [])]
+        buffer = []
+        for row in rows:
+            buffer.append(["" if value is None else str(value) for value in row])
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+    finally:
+        workbook.close()
+
+
+def import_file(supabase, template_type, uploaded_file, filename, chunk_size=CHUNK_SIZE):
+    """Validate and bulk-write an uploaded template.
+
+    Name/SKU lookups are resolved from one prefetch per referenced table,
+    products are upserted on sku and suppliers/BOM lines are matched against
+    existing rows, all in batches of WRITE_BATCH_SIZE. Returns a report dict
+    with row counts and a per-row error DataFrame (row, column, message).
+    """
+    if template_type not in TEMPLATE_COLUMNS:
+        raise ValueError(f"Unknown template type: {template_type}")
+
+    lookups = _prefetch_lookups(supabase, template_type)
+    report = {"rows": 0, "written": 0, "errors": []}
+    seen_keys = set()
+    row_offset = 2  # header is spreadsheet row 1
+
+    for chunk in read_chunks(uploaded_file, filename, chunk_size):
+        chunk.index = range(row_offset, row_offset + len(chunk))
+        row_offset += len(chunk)
+        report["rows"] += len(chunk)
+
+        records, errors = _validate_chunk(template_type, chunk, lookups, seen_keys)
+        report["errors"].extend(errors)
+        if not records.empty:
+            written, write_errors = _write_records(supabase, template_type, records, lookups)
+            report["written"] += written
+            report["errors"].extend(write_errors)
+
+    invalidate(_target_table(template_type))
+    report["errors"] = pd.DataFrame(report["errors"], columns=["row", "column", "message"]).sort_values(
+        "row", kind="stable").reset_index(drop=True)
+    return report
+
+
+def _target_table(template_type):
+    return {"Suppliers": "suppliers", "BOM": "bill_of_materials"}.get(template_type, "products")
+
+
+def _prefetch_lookups(supabase, template_type):
+    lookups = {}
+    if template_type in ("Suppliers", "RawMaterials", "Products"):
+        suppliers = cached_select(supabase, 'suppliers', 'id, name')
+        lookups["supplier_by_name"] = {row["name"].strip().lower(): row["id"]
+                                       for row in suppliers if row.get("name")}
+    if template_type in PRODUCT_TYPES:
+        products = cached_select(supabase, 'products', 'sku, product_type')
+        lookups["product_type_by_sku"] = {str(row["sku"]).strip().lower(): row["product_type"]
+                                          for row in products if row.get("sku")}
+    if template_type == "BOM":
+        products = cached_select(supabase, 'products', 'id, name, sku')
+        lookups["product_ids"] = {row["id"] for row in products}
+        lookups["product_by_sku"] = {str(row["sku"]).strip().lower(): row["id"] for row in products if row.get("sku")}
+        lookups["product_by_name"] = {row["name"].strip().lower(): row["id"] for row in products if row.get("name")}
+        lookups["name_by_product"] = {row["id"]: row.get("name") for row in products}
+        bom = cached_select(supabase, 'bill_of_materials', 'id, finished_product_id, raw_material_id')
+        lookups["bom_by_pair"] = {(row["finished_product_id"], row["raw_material_id"]): row["id"] for row in bom}
+    return lookups
+
+
+def _validate_chunk(template_type, chunk, lookups, seen_keys):
+    """Vectorized validation; returns (valid records, error dicts)"""
+    mapping = TEMPLATE_COLUMNS[template_type]
+    errors = []
+
+    missing = [column for column in mapping if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing template columns: {', '.join(missing)}")
+
+    df = chunk[list(mapping)].rename(columns=mapping)
+    df = df.apply(lambda column: column.astype(str).str.strip())
+    invalid = pd.Series(False, index=df.index)
+
+    def flag(mask, column, message):
+        nonlocal invalid
+        mask = mask & ~invalid
+        errors.extend({"row": row, "column": column, "message": message} for row in df.index[mask])
+        invalid |= mask
+
+    # Blank rows are skipped silently
+    blank = (df == "").all(axis=1)
+    invalid |= blank
+
+    for column in REQUIRED_COLUMNS[template_type]:
+        flag(df[column] == "", column, "Required value is missing")
+
+    for column in NUMERIC_COLUMNS:
+        if column in df.columns:
+            values = pd.to_numeric(df[column].replace("", "0"), errors="coerce")
+            flag(values.isna(), column, "Not a number")
+            flag(values < 0, column, "Must not be negative")
+            df[column] = values.fillna(0.0)
+
+    key_column = KEY_COLUMNS.get(template_type)
+    if key_column:
+        keys = df[key_column].str.lower()
+        flag(keys.duplicated() | keys.isin(seen_keys), key_column, f"Duplicate {key_column} in file")
+        seen_keys.update(keys[~invalid])
+
+    if template_type in PRODUCT_TYPES:
+        existing_types = df["sku"].str.lower().map(lookups["product_type_by_sku"])
+        for product_type in sorted(set(PRODUCT_TYPES.values()) - {PRODUCT_TYPES[template_type]}):
+            flag(existing_types == product_type, "sku", f"SKU belongs to an existing {product_type} product")
+
+    if "supplier" in df.columns:
+        supplier_ids = df["supplier"].str.lower().map(lookups["supplier_by_name"])
+        flag((df["supplier"] != "") & supplier_ids.isna(), "supplier", "Unknown supplier")
+        df["supplier_id"] = _nullable_ids(supplier_ids)
+        df = df.drop(columns=["supplier"])
+
+    if template_type == "BOM":
+        df["finished_product_id"] = _resolve_products(df["product"], lookups).fillna(
+            df["product_name"].str.lower().map(lookups["product_by_name"]))
+        df["raw_material_id"] = _resolve_products(df["raw_material"], lookups)
+        flag(df["finished_product_id"].isna(), "product", "Unknown finished product")
+        flag(df["raw_material_id"].isna(), "raw_material", "Unknown raw material")
+        resolved_names = df["finished_product_id"].map(lookups["name_by_product"])
+        df["product_name"] = df["product_name"].where(df["product_name"] != "", resolved_names)
+        pairs = (df["finished_product_id"].astype("string").fillna("") + "-"
+                 + df["raw_material_id"].astype("string").fillna(""))
+        flag(pairs.duplicated() | pairs.isin(seen_keys), "raw_material", "Duplicate BOM line in file")
+        seen_keys.update(pairs[~invalid])
+        df = df.drop(columns=["product", "raw_material"])
+
+    if template_type in PRODUCT_TYPES:
+        df["product_type"] = PRODUCT_TYPES[template_type]
+    if template_type == "RawMaterials":
+        df["price_selling"] = 0.0
+
+    return df[~invalid], errors
+
+
+def _nullable_ids(ids):
+    """Float ids with NaN (from a dict .map) as Python ints / None for JSON"""
+    return ids.astype("Int64").astype(object).where(ids.notna(), None)
+
+
+def _resolve_products(values, lookups):
+    """Resolve product references given as an id or a SKU"""
+    as_id = pd.to_numeric(values, errors="coerce")
+    by_id = as_id.where(as_id.isin(lookups["product_ids"]))
+    by_sku = values.str.lower().map(lookups["product_by_sku"])
+    return by_id.fillna(by_sku)
+
+
+def _write_records(supabase, template_type, records, lookups):
+    """Write validated records in batches; returns (rows written, error dicts)"""
+    table = _target_table(template_type)
+    records = records.copy()
+
+    if template_type == "BOM":
+        for column in ("finished_product_id", "raw_material_id"):
+            records[column] = records[column].astype(int)
+        pair_ids = [lookups["bom_by_pair"].get(pair) for pair in
+                    zip(records["finished_product_id"], records["raw_material_id"])]
+        records["id"] = pd.Series(pair_ids, index=records.index, dtype=object)
+    elif template_type == "Suppliers":
+        records["id"] = _nullable_ids(records["name"].str.lower().map(lookups["supplier_by_name"]))
+
+    written = 0
+    errors = []
+    if "id" in records.columns:
+        # Existing rows are upserted on the primary key, new rows inserted
+        groups = [(records[records["id"].notna()], "id"),
+                  (records[records["id"].isna()].drop(columns=["id"]), None)]
+    else:
+        groups = [(records, "sku")]
+
+    for group, conflict_column in groups:
+        for start in range(0, len(group), WRITE_BATCH_SIZE):
+            batch = group.iloc[start:start + WRITE_BATCH_SIZE]
+            batch_written, batch_errors = _write_batch(supabase, table, batch, conflict_column)
+            written += batch_written
+            errors.extend(batch_errors)
+    return written, errors
+
+
+def _write_batch(supabase, table, batch, conflict_column):
+    payload = _json_rows(batch)
+    try:
+        _send(supabase, table, payload, conflict_column)
+        return len(payload), []
+    except Exception:
+        # Retry row by row so the report pinpoints the failing rows
+        written, errors = 0, []
+        for row_number, row in zip(batch.index, payload):
+            try:
+                _send(supabase, table, [row], conflict_column)
+                written += 1
+            except Exception as e:
+                errors.append({"row": row_number, "column": "", "message": str(e)})
+        return written, errors
+
+
+def _send(supabase, table, rows, conflict_column):
+    if conflict_column is None:
+        supabase.table(table).insert(rows).execute()
+    else:
+        supabase.table(table).upsert(rows, on_conflict=conflict_column).execute()
+
+
+def _json_rows(df):
+    """DataFrame rows as JSON-safe dicts (numpy scalars become Python types)"""
+    rows = []
+    for record in df.to_dict("records"):
+        rows.append({key: (value.item() if hasattr(value, "item") else value) for key, value in record.items()})
+    return rows
+
+
+def error_report_csv(report):
+    """Per-row error report as CSV bytes for download"""
+    buffer = io.StringIO()
+    report["errors"].to_csv(buffer, index=False)
+    return buffer.getvalue().encode("utf-8")
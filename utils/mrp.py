@@ -0,0 +1,252 @@
+"""Materials requirements planning across all open production orders.
+
+Every planned and in-progress order is exploded to leaf raw materials in one
+pass: per-unit leaf requirements from BOMGraph form a sparse assembly x
+material matrix, and total demand is that matrix applied to the vector of
+quantities ordered per assembly. Gross requirements are netted against stock
+on hand, open (not yet received) inventory receipts and the materials
+in-progress orders have already consumed.
+"""
+import importlib.util
+import numpy as np
+import pandas as pd
+from database.batch import QueryBatch
+from database.cache import query_cache
+from database.pagination import iter_pages
+from utils.bom_graph import BOMGraph
+
+OPEN_ORDER_STATUSES = ('planned', 'in_progress')
+ORDER_COLUMNS = 'id, product_id, quantity_planned, status, production_consumption(raw_material_id, quantity_consumed)'
+MATERIAL_COLUMNS = 'id, name, sku, quantity_in_stock, price_paid, supplier_id'
+MRP_COLUMNS = ['material_id', 'name', 'sku', 'gross_required', 'consumed', 'net_required', 'on_hand',
+               'on_order', 'projected', 'shortage', 'suggested_purchase', 'unit_cost', 'purchase_cost',
+               'supplier']
+MATERIAL_ID_CHUNK = 200
+SCIPY_AVAILABLE = importlib.util.find_spec("scipy") is not None
+
+
+class RequirementsMatrix:
+    """Leaf material requirements per unit of every assembly, as a sparse matrix.
+
+    Rows are assemblies, columns leaf materials. Uses scipy.sparse when it is
+    installed and a COO triple with np.bincount otherwise; both give the same
+    totals.
+    """
+
+    def __init__(self, assemblies, materials, rows, cols, values, use_scipy=SCIPY_AVAILABLE):
+        self.assemblies = np.asarray(assemblies, dtype=np.int64)
+        self.materials = np.asarray(materials, dtype=np.int64)
+        self._rows = np.asarray(rows, dtype=np.int64)
+        self._cols = np.asarray(cols, dtype=np.int64)
+        self._values = np.asarray(values, dtype=float)
+        self._matrix = None
+        if use_scipy:
+            from scipy import sparse
+            self._matrix = sparse.csr_matrix(
+                (self._values, (self._rows, self._cols)), shape=(len(self.assemblies), len(self.materials))
+            )
+
+    @classmethod
+    def from_graph(cls, graph, use_scipy=SCIPY_AVAILABLE):
+        assemblies = np.array(sorted(graph.children), dtype=np.int64)
+        requirements = [graph.unit_requirements(int(pid)) for pid in assemblies]
+        materials = np.array(sorted({leaf for unit in requirements for leaf in unit}), dtype=np.int64)
+        rows, cols, values = [], [], []
+        for row, unit in enumerate(requirements):
+            rows.extend([row] * len(unit))
+            cols.extend(unit.keys())
+            values.extend(unit.values())
+        cols = np.searchsorted(materials, np.asarray(cols, dtype=np.int64))
+        return cls(assemblies, materials, rows, cols, values, use_scipy)
+
+    @property
+    def engine(self):
+        return 'scipy' if self._matrix is not None else 'numpy'
+
+    def assembly_index(self, product_ids):
+        """Row index of each product id, -1 for products without a BOM"""
+        return _positions(self.assemblies, product_ids)
+
+    def demand_vector(self, product_ids, quantities):
+        """Total quantity ordered per assembly row"""
+        index = self.assembly_index(product_ids)
+        known = index >= 0
+        return np.bincount(index[known], weights=np.asarray(quantities, dtype=float)[known],
+                           minlength=len(self.assemblies))
+
+    def explode(self, demand):
+        """Leaf material totals (one per column) for a demand vector over assemblies"""
+        if self._matrix is not None:
+            return self._matrix.T @ demand
+        return np.bincount(self._cols, weights=self._values * demand[self._rows], minlength=len(self.materials))
+
+    def max_buildable(self, stock):
+        """Whole units of every assembly buildable from stock (aligned with materials).
+
+        min over each assembly's materials of floor(stock / quantity per unit),
+        in one pass over the non-zero entries. Returns (units, limiting material
+        id); assemblies whose lines all have zero quantity get units -1 and no
+        limiting material.
+        """
+        stock = np.clip(np.asarray(stock, dtype=float), 0.0, None)
+        units = np.full(len(self.assemblies), np.inf)
+        limiting = np.full(len(self.assemblies), -1, dtype=np.int64)
+        used = self._values > 0
+        if used.any():
+            rows, cols = self._rows[used], self._cols[used]
+            ratios = np.floor(stock[cols] / self._values[used] + 1e-9)
+            np.minimum.at(units, rows, ratios)
+            # First entry per row (rows ascending, ratio ascending) is the binding material
+            order = np.lexsort((ratios, rows))
+            first = order[np.r_[True, rows[order][1:] != rows[order][:-1]]]
+            limiting[rows[first]] = self.materials[cols[first]]
+        return np.where(np.isinf(units), -1, units).astype(np.int64), limiting
+
+
+def requirements_matrix(supabase):
+    """RequirementsMatrix for the current BOMs, cached until bill_of_materials changes"""
+    return query_cache.get_or_load(
+        ('mrp_matrix',), lambda: RequirementsMatrix.from_graph(BOMGraph.from_supabase(supabase)),
+        ('bill_of_materials',)
+    )
+
+
+def buildable_quantities(supabase):
+    """What can be built right now: max whole units of every product with a BOM.
+
+    Returns a DataFrame of product_id, max_buildable and limiting_material_id
+    (the material that runs out first), cached until products or BOMs change.
+    """
+    def load():
+        matrix = requirements_matrix(supabase)
+        rows = fetch_materials(supabase, [int(pid) for pid in matrix.materials], 'id, quantity_in_stock')
+        stock = np.zeros(len(matrix.materials))
+        index = _positions(matrix.materials, [row['id'] for row in rows])
+        stock[index[index >= 0]] = [float(row['quantity_in_stock'] or 0)
+                                    for row, position in zip(rows, index) if position >= 0]
+        units, limiting = matrix.max_buildable(stock)
+        return pd.DataFrame({'product_id': matrix.assemblies, 'max_buildable': units,
+                             'limiting_material_id': limiting})
+
+    return query_cache.get_or_load(('max_buildable',), load, ('products', 'bill_of_materials'))
+
+
+def fetch_open_orders(supabase):
+    """Planned and in-progress production orders with the materials they have consumed"""
+    orders = []
+    for rows in iter_pages(supabase, 'production_orders', ORDER_COLUMNS,
+                           (('in_', 'status', list(OPEN_ORDER_STATUSES)),)):
+        orders.extend(rows)
+    return orders
+
+
+def fetch_on_order(supabase):
+    """product_id -> quantity on open inventory receipts"""
+    on_order = {}
+    for rows in iter_pages(supabase, 'inventory_receipts', 'product_id, quantity_received',
+                           (('eq', 'status', 'open'),)):
+        for row in rows:
+            on_order[row['product_id']] = on_order.get(row['product_id'], 0.0) + float(row['quantity_received'] or 0)
+    return on_order
+
+
+def fetch_materials(supabase, material_ids, columns=MATERIAL_COLUMNS + ', supplier:supplier_id(name)'):
+    """Product rows for the leaf materials (with supplier name by default)"""
+    materials = []
+    for offset in range(0, len(material_ids), MATERIAL_ID_CHUNK):
+        chunk = material_ids[offset:offset + MATERIAL_ID_CHUNK]
+        for rows in iter_pages(supabase, 'products', columns, [('in_', 'id', chunk)]):
+            materials.extend({**row, 'supplier': (row.get('supplier') or {}).get('name')} if 'supplier' in row
+                             else row for row in rows)
+    return materials
+
+
+def plan_requirements(matrix, orders, materials, on_order=None):
+    """Net shortage and suggested-purchase table for open orders.
+
+    orders are production_orders rows (with their production_consumption);
+    materials are product rows for the leaf materials. In-progress orders have
+    already consumed stock through start_production, so only what they still
+    need beyond their recorded consumption is planned. Returns the table
+    (shortages first) and the ids of orders for products without a BOM.
+    """
+    on_order = on_order or {}
+    product_ids = np.array([order['product_id'] for order in orders], dtype=np.int64)
+    quantities = np.array([float(order.get('quantity_planned') or 0) for order in orders], dtype=float)
+    in_progress = np.array([order.get('status') == 'in_progress' for order in orders], dtype=bool)
+    missing_bom = [order['id'] for order, index in zip(orders, matrix.assembly_index(product_ids)) if index < 0]
+
+    planned_gross = matrix.explode(matrix.demand_vector(product_ids[~in_progress], quantities[~in_progress]))
+    started_gross = matrix.explode(matrix.demand_vector(product_ids[in_progress], quantities[in_progress]))
+
+    consumed_ids, consumed_qty = [], []
+    for order in orders:
+        if order.get('status') != 'in_progress':
+            continue
+        for line in order.get('production_consumption') or []:
+            consumed_ids.append(line['raw_material_id'])
+            consumed_qty.append(float(line['quantity_consumed'] or 0))
+    consumed = _per_material(matrix.materials, consumed_ids, consumed_qty)
+
+    df = pd.DataFrame({'material_id': matrix.materials,
+                       'gross_required': planned_gross + started_gross,
+                       'consumed': np.minimum(consumed, started_gross)})
+    df['net_required'] = planned_gross + np.maximum(started_gross - consumed, 0.0)
+    df = df[df['gross_required'] > 0].copy()
+
+    details = pd.DataFrame(materials, columns=MATERIAL_COLUMNS.split(', ') + ['supplier'])
+    details = details.drop_duplicates('id').set_index('id')
+    df['name'] = df['material_id'].map(details['name']).fillna('Unknown')
+    df['sku'] = df['material_id'].map(details['sku']).fillna('')
+    df['on_hand'] = pd.to_numeric(df['material_id'].map(details['quantity_in_stock']), errors='coerce').fillna(0.0)
+    df['on_order'] = df['material_id'].map(on_order).fillna(0.0)
+    df['projected'] = df['on_hand'] + df['on_order'] - df['net_required']
+    df['shortage'] = (-df['projected']).clip(lower=0.0)
+    df['suggested_purchase'] = np.ceil(df['shortage'])
+    df['unit_cost'] = pd.to_numeric(df['material_id'].map(details['price_paid']), errors='coerce').fillna(0.0)
+    df['purchase_cost'] = df['suggested_purchase'] * df['unit_cost']
+    df['supplier'] = df['material_id'].map(details['supplier']).fillna('')
+
+    df = df.sort_values(['shortage', 'net_required'], ascending=False, kind='stable')
+    return df[MRP_COLUMNS].reset_index(drop=True), missing_bom
+
+
+def run_mrp(supabase):
+    """Plan every open production order.
+
+    Returns {'orders', 'materials' (DataFrame), 'shortages', 'purchase_cost',
+    'missing_bom', 'engine'}.
+    """
+    matrix = requirements_matrix(supabase)
+    batch = QueryBatch()
+    batch.add('orders', fetch_open_orders, supabase)
+    batch.add('on_order', fetch_on_order, supabase)
+    batch.add('materials', fetch_materials, supabase, [int(pid) for pid in matrix.materials])
+    batch.run()
+    orders = batch.result('orders')
+    table, missing_bom = plan_requirements(matrix, orders, batch.result('materials'), batch.result('on_order'))
+    short = table[table['shortage'] > 0]
+    return {
+        'orders': len(orders),
+        'materials': table,
+        'shortages': len(short),
+        'purchase_cost': float(short['purchase_cost'].sum()),
+        'missing_bom': missing_bom,
+        'engine': matrix.engine,
+    }
+
+
+def _positions(keys, product_ids):
+    # Index of each id in the sorted keys array, -1 where it is absent
+    product_ids = np.asarray(product_ids, dtype=np.int64)
+    if not len(keys):
+        return np.full(len(product_ids), -1, dtype=np.int64)
+    index = np.searchsorted(keys, product_ids).clip(max=len(keys) - 1)
+    return np.where(keys[index] == product_ids, index, -1)
+
+
+def _per_material(materials, product_ids, quantities):
+    # Sum quantities onto the matrix columns, dropping ids that are not leaf materials
+    index = _positions(materials, product_ids)
+    known = index >= 0
+    return np.bincount(index[known], weights=np.asarray(quantities, dtype=float)[known], minlength=len(materials))
@@ -0,0 +1,23 @@
+import importlib
+
+# Sidebar label -> (module, page function). Modules are imported the first
+# time their page is opened, so startup only pays for the router. They live in
+# app_pages/ because Streamlit turns every script in a pages/ directory next to
+# main.py into its own multipage entry, which would bypass this router.
+PAGES = {
+    "📊 Dashboard": ("app_pages._dashboard", "show_dashboard"),
+    "🏭 Products": ("app_pages._products", "show_products"),
+    "🧺 Raw Materials": ("app_pages._raw_materials", "show_raw_materials"),
+    "🚚 Suppliers": ("app_pages._suppliers", "show_suppliers"),
+    "🧾 Bill of Materials": ("app_pages._bom", "show_bom"),
+    "📦 Receiving": ("app_pages._receiving", "show_receiving"),
+    "🏭 Manufacturing": ("app_pages._manufacturing", "show_manufacturing"),
+    "💰 Sales": ("app_pages._sales", "show_sales"),
+    "📤 Bulk Import": ("app_pages._import", "show_import"),
+}
+
+
+def load_page(label):
+    """Import a page module on first use and return its page function"""
+    module_name, function_name = PAGES[label]
+    return getattr(importlib.import_module(module_name), function_name)
@@ -1,104 +1,311 @@
+import importlib.util
 import io
+import os
+import sys
+import time
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from multiprocessing import get_context
+from types import SimpleNamespace
+from database.pagination import iter_pages
 
-# ReportLab imports for PDF generation (with error handling)
-REPORTLAB_AVAILABLE = False
-try:
+# ReportLab is only imported when an invoice is rendered (see _reportlab)
+REPORTLAB_AVAILABLE = importlib.util.find_spec("reportlab") is not None
+
+COMPANY_DETAILS = "<b>Your Company Name</b><br/>123 Business Street<br/>City, State 12345<br/>Phone: (555) 123-4567"
+SALE_COLUMNS = 'id, invoice_number, sale_date, customer_name, customer_email, customer_phone, ' \
+               'payment_method, total_amount, notes'
+ITEM_COLUMNS = 'id, sale_id, product_name, quantity, unit_price, total_price, products(sku)'
+SALE_ID_CHUNK = 200
+INVOICE_WORKERS = int(os.getenv("INVOICE_WORKERS", str(os.cpu_count() or 2)))
+# The Streamlit server shares the host with every session; the CLI can use all cores
+APP_INVOICE_WORKERS = min(INVOICE_WORKERS, int(os.getenv("APP_INVOICE_WORKERS", "2")))
+INVOICES_PER_TASK = 50
+# Below this many invoices a process pool costs more than it saves
+MIN_PARALLEL_INVOICES = 100
+
+
+@lru_cache(maxsize=1)
+def _reportlab():
+    """Import ReportLab on first use"""
+    if not REPORTLAB_AVAILABLE:
+        raise ImportError("ReportLab is required for PDF generation")
     from reportlab.lib.pagesizes import letter
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.units import inch
     from reportlab.lib import colors
+    return SimpleNamespace(letter=letter, SimpleDocTemplate=SimpleDocTemplate, Paragraph=Paragraph,
+                           Spacer=Spacer, Table=Table, TableStyle=TableStyle, PageBreak=PageBreak,
+                           getSampleStyleSheet=getSampleStyleSheet, ParagraphStyle=ParagraphStyle,
+                           inch=inch, colors=colors)
 
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    pass
 
+@lru_cache(maxsize=1)
+def invoice_styles():
+    """Paragraph and table styles, built once per process and reused for every invoice"""
+    rl = _reportlab()
+    colors, inch, ParagraphStyle, TableStyle = rl.colors, rl.inch, rl.ParagraphStyle, rl.TableStyle
+    styles = rl.getSampleStyleSheet()
+    return {
+        'normal': styles['Normal'],
+        'title': ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24,
+                                spaceAfter=30, textColor=colors.darkblue),
+        'company': ParagraphStyle('Company', parent=styles['Normal'], fontSize=12,
+                                  textColor=colors.darkblue),
+        'details_table': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ]),
+        'items_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]),
+        'details_widths': [1.5 * inch, 3 * inch],
+        'items_widths': [2.5 * inch, 1 * inch, 1 * inch, 1 * inch, 1 * inch],
+    }
 
-def create_pdf_invoice(sale_data, items_data, buffer):
-    """Generate PDF invoice"""
-    if not REPORTLAB_AVAILABLE:
-        raise ImportError("ReportLab is required for PDF generation")
 
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
+def _format_date(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return value.strftime('%Y-%m-%d %H:%M') if value else ''
 
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30,
-        textColor=colors.darkblue
-    )
-    story.append(Paragraph("INVOICE", title_style))
-    story.append(Spacer(1, 12))
-
-    # Company Info
-    company_style = ParagraphStyle(
-        'Company',
-        parent=styles['Normal'],
-        fontSize=12,
-        textColor=colors.darkblue
-    )
-    story.append(
-        Paragraph("<b>Your Company Name</b><br/>123 Business Street<br/>City, State 12345<br/>Phone: (555) 123-4567",
-                  company_style))
-    story.append(Spacer(1, 20))
+
+def invoice_story(sale_data, items_data):
+    """Flowables for one invoice"""
+    rl = _reportlab()
+    Paragraph, Spacer, Table = rl.Paragraph, rl.Spacer, rl.Table
+    styles = invoice_styles()
+    story = [
+        Paragraph("INVOICE", styles['title']),
+        Spacer(1, 12),
+        Paragraph(COMPANY_DETAILS, styles['company']),
+        Spacer(1, 20),
+    ]
 
     # Invoice details
     invoice_data = [
         ['Invoice Number:', sale_data['invoice_number']],
-        ['Date:', sale_data['sale_date'].strftime('%Y-%m-%d %H:%M')],
+        ['Date:', _format_date(sale_data['sale_date'])],
         ['Customer:', sale_data['customer_name']],
-        ['Email:', sale_data.get('customer_email', 'N/A')],
-        ['Phone:', sale_data.get('customer_phone', 'N/A')],
+        ['Email:', sale_data.get('customer_email') or 'N/A'],
+        ['Phone:', sale_data.get('customer_phone') or 'N/A'],
+        ['Payment Method:', sale_data.get('payment_method') or 'N/A'],
     ]
-
-    invoice_table = Table(invoice_data, colWidths=[1.5 * inch, 3 * inch])
-    invoice_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-    ]))
-    story.append(invoice_table)
-    story.append(Spacer(1, 20))
+    invoice_table = Table(invoice_data, colWidths=styles['details_widths'])
+    invoice_table.setStyle(styles['details_table'])
+    story.extend([invoice_table, Spacer(1, 20)])
 
     # Items table
     items_table_data = [['Product', 'SKU', 'Quantity', 'Unit Price', 'Total']]
-
     for item in items_data:
         items_table_data.append([
             item['product_name'],
-            item['product_sku'],
-            str(int(item['quantity'])),
-            f"${item['unit_price']:.2f}",
-            f"${item['total_price']:.2f}"
+            item.get('product_sku') or item.get('sku') or '',
+            f"{float(item['quantity']):g}",
+            f"${float(item['unit_price']):.2f}",
+            f"${float(item['total_price']):.2f}"
         ])
 
     # Add total row
-    items_table_data.append(['', '', '', 'TOTAL:', f"${sale_data['total_amount']:.2f}"])
-
-    items_table = Table(items_table_data, colWidths=[2.5 * inch, 1 * inch, 1 * inch, 1 * inch, 1 * inch])
-    items_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    items_table_data.append(['', '', '', 'TOTAL:', f"${float(sale_data['total_amount']):.2f}"])
+
+    items_table = Table(items_table_data, colWidths=styles['items_widths'])
+    items_table.setStyle(styles['items_table'])
     story.append(items_table)
 
     if sale_data.get('notes'):
         story.append(Spacer(1, 20))
-        story.append(Paragraph(f"<b>Notes:</b> {sale_data['notes']}", styles['Normal']))
+        story.append(Paragraph(f"<b>Notes:</b> {sale_data['notes']}", styles['normal']))
+    return story
+
+
+def render_invoice(sale_data, items_data):
+    """Render one invoice and return the PDF bytes"""
+    rl = _reportlab()
+    buffer = io.BytesIO()
+    rl.SimpleDocTemplate(buffer, pagesize=rl.letter).build(invoice_story(sale_data, items_data))
+    return buffer.getvalue()
+
+
+def create_pdf_invoice(sale_data, items_data, buffer):
+    """Generate PDF invoice"""
+    buffer.write(render_invoice(sale_data, items_data))
+    return buffer
+
+
+def render_merged(invoices):
+    """Render several (sale, items) invoices into one PDF, one invoice per page run"""
+    rl = _reportlab()
+    story = []
+    for sale_data, items_data in invoices:
+        if story:
+            story.append(rl.PageBreak())
+        story.extend(invoice_story(sale_data, items_data))
+    buffer = io.BytesIO()
+    rl.SimpleDocTemplate(buffer, pagesize=rl.letter).build(story)
+    return buffer.getvalue()
+
+
+def _render_task(invoices, merged):
+    # Runs in a worker process; styles are cached per worker
+    if merged:
+        return [(None, render_merged(invoices))]
+    return [(invoice_label(sale), render_invoice(sale, items)) for sale, items in invoices]
+
+
+def invoice_label(sale):
+    """Invoice number, or sale_<id> for a sale without one"""
+    return str(sale.get('invoice_number') or f"sale_{sale['id']}")
+
+
+def fetch_invoice_data(supabase, start, end):
+    """Sales in [start, end] with their items, as a list of (sale, items).
+
+    One keyset-paged query for the sales and one for their items (by sale id,
+    in chunks), instead of a query per invoice.
+    """
+    next_day = date.fromisoformat(str(end)[:10]) + timedelta(days=1)
+    filters = [('gte', 'sale_date', str(start)), ('lt', 'sale_date', next_day.isoformat())]
+    sales = [sale for page in iter_pages(supabase, 'sales', SALE_COLUMNS, filters) for sale in page]
+
+    items_by_sale = defaultdict(list)
+    sale_ids = [sale['id'] for sale in sales]
+    for offset in range(0, len(sale_ids), SALE_ID_CHUNK):
+        chunk = sale_ids[offset:offset + SALE_ID_CHUNK]
+        for page in iter_pages(supabase, 'sale_items', ITEM_COLUMNS, [('in_', 'sale_id', chunk)]):
+            for item in page:
+                item['product_sku'] = (item.pop('products', None) or {}).get('sku')
+                items_by_sale[item['sale_id']].append(item)
+
+    return [(sale, items_by_sale[sale['id']]) for sale in sales]
+
+
+def render_invoices(invoices, merged=False, workers=INVOICE_WORKERS):
+    """Render invoices across a process pool.
+
+    Returns a list of (invoice_label, pdf_bytes); with merged=True each entry
+    is a multi-invoice PDF for one task, in order.
+    """
+    tasks = [invoices[start:start + INVOICES_PER_TASK] for start in range(0, len(invoices), INVOICES_PER_TASK)]
+    if workers <= 1 or len(invoices) < MIN_PARALLEL_INVOICES:
+        return [result for task in tasks for result in _render_task(task, merged)]
+
+    # spawn keeps workers independent of the server's threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        results = pool.map(_render_task, tasks, [merged] * len(tasks))
+        return [result for task_results in results for result in task_results]
+
+
+def _pypdf_available():
+    try:
+        import pypdf  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def write_zip(rendered, fileobj):
+    """One invoice_<label>.pdf entry per invoice; repeated labels get a -2, -3... suffix"""
+    used = set()
+    with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED) as archive:
+        for label, pdf in rendered:
+            # A "/" in an invoice number would otherwise become a folder
+            base = f"invoice_{label}".replace("/", "-").replace("\\", "-")
+            name, copy = f"{base}.pdf", 1
+            while name in used:
+                copy += 1
+                name = f"{base}-{copy}.pdf"
+            used.add(name)
+            archive.writestr(name, pdf)
+
+
+def write_merged(rendered, fileobj):
+    if len(rendered) == 1:
+        fileobj.write(rendered[0][1])
+        return
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        raise ImportError("Merging more than one task's invoices requires pypdf (pip install pypdf)")
+    writer = PdfWriter()
+    for _, pdf in rendered:
+        writer.append(io.BytesIO(pdf))
+    writer.write(fileobj)
+
+
+def bulk_invoices(supabase, start, end, fileobj, output="zip", workers=INVOICE_WORKERS):
+    """Regenerate every invoice in a date range into a zip or one merged PDF.
+
+    Returns stats with the invoice count, elapsed seconds and invoices per
+    second (fetch plus render plus write).
+    """
+    if output not in ("zip", "pdf"):
+        raise ValueError(f"Unknown invoice output: {output}")
+    started = time.perf_counter()
+    invoices = fetch_invoice_data(supabase, start, end)
+    fetched = time.perf_counter()
+
+    merged = output == "pdf"
+    if not invoices:
+        rendered = []
+    elif merged and not _pypdf_available():
+        # Without a PDF merger, render the single document in one pass
+        rendered = [(None, render_merged(invoices))]
+    else:
+        rendered = render_invoices(invoices, merged, workers)
+
+    if rendered:
+        (write_merged if merged else write_zip)(rendered, fileobj)
+    elapsed = time.perf_counter() - started
+    return {
+        'invoices': len(invoices),
+        'fetch_seconds': fetched - started,
+        'seconds': elapsed,
+        'invoices_per_second': len(invoices) / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    """CLI entry point: python -m utils.pdf_generator 2026-09-01 2026-09-30 --out invoices.zip"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Regenerate invoices for a date range")
+    parser.add_argument("start", help="first sale date (YYYY-MM-DD)")
+    parser.add_argument("end", help="last sale date (YYYY-MM-DD)")
+    parser.add_argument("--out", required=True, help="output .zip or .pdf path")
+    parser.add_argument("--workers", type=int, default=INVOICE_WORKERS)
+    args = parser.parse_args(argv)
+
+    # Use the manager directly; the cached wrapper reports errors through Streamlit
+    from database.connection import create_connection_manager
+    try:
+        supabase = create_connection_manager().get_client()
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    output = "pdf" if args.out.lower().endswith(".pdf") else "zip"
+    with open(args.out, "wb") as fileobj:
+        stats = bulk_invoices(supabase, args.start, args.end, fileobj, output, args.workers)
+    print(f"{stats['invoices']} invoices in {stats['seconds']:.1f}s "
+          f"({stats['invoices_per_second']:.1f} invoices/s) -> {args.out}")
+    return 0
+
 
-    doc.build(story)
-    return buffer
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import os
+import streamlit as st
+import pandas as pd
+from database.instrumentation import INSTRUMENTATION_ENABLED, MEASURE_BYTES, begin_rerun, current_rerun, openmetrics
+
+QUERY_DEBUG_PANEL = os.getenv("QUERY_DEBUG_PANEL", "0") == "1"
+RERUN_HISTORY = 20
+
+
+def start_rerun(label=None):
+    """Open the query log for this rerun; call once at the top of the app script"""
+    log = begin_rerun(label)
+    history = st.session_state.setdefault('query_reruns', [])
+    history.append(log)
+    del history[:-RERUN_HISTORY]
+    return log
+
+
+def show_query_debug_panel():
+    """Sidebar panel with this rerun's queries; call at the end of the app script"""
+    if not INSTRUMENTATION_ENABLED:
+        return
+    if not QUERY_DEBUG_PANEL and not st.sidebar.checkbox("🔍 Query debug", key="query_debug_panel"):
+        return
+
+    log = current_rerun()
+    if log is None:
+        st.sidebar.info("Query log starts on the next rerun.")
+        return
+
+    summary = log.summary()
+    with st.sidebar.expander("🔍 Queries this rerun", expanded=True):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Queries", summary['queries'])
+        with col2:
+            st.metric("Time", f"{summary['duration_ms']:.0f} ms")
+        with col3:
+            st.metric("Payload", f"{summary['bytes'] / 1024:.1f} KB" if MEASURE_BYTES else "n/a",
+                      help=None if MEASURE_BYTES else "Set QUERY_MEASURE_BYTES=1 to measure response sizes")
+
+        if summary['n_plus_one']:
+            for pattern in summary['n_plus_one']:
+                st.warning(f"⚠️ Possible N+1: {pattern['count']}× {pattern['action']} {pattern['target']} "
+                           f"{pattern['shape']} in {pattern['page'] or 'app'}")
+
+        if summary['pages']:
+            st.markdown("**By page**")
+            st.dataframe(pd.DataFrame.from_dict(summary['pages'], orient='index').round(1),
+                         use_container_width=True)
+
+        if log.records:
+            st.markdown("**Queries**")
+            records = pd.DataFrame(log.records)[['page', 'target', 'action', 'shape', 'duration_ms', 'rows', 'bytes']]
+            st.dataframe(records.round({'duration_ms': 1}), use_container_width=True, hide_index=True)
+
+        history = st.session_state.get('query_reruns', [])
+        if len(history) > 1:
+            st.markdown("**Recent reruns**")
+            st.dataframe(pd.DataFrame([
+                {key: run.summary()[key] for key in ('rerun', 'queries', 'duration_ms', 'bytes')}
+                for run in reversed(history)
+            ]).round(1), use_container_width=True, hide_index=True)
+
+        st.download_button("⬇️ Rerun log (JSON)", log.to_json(), file_name=f"queries_rerun_{log.id}.json",
+                           mime="application/json", key="query_log_json")
+        st.download_button("⬇️ Metrics (OpenMetrics)", openmetrics(), file_name="query_metrics.txt",
+                           mime="application/openmetrics-text", key="query_log_metrics")
@@ -0,0 +1,87 @@
+"""Sales breakdowns served from the rollups in database/sql/11_sales_rollups.sql.
+
+post_sale adds every sale to daily per-product, monthly per-product and daily
+store-total rollups, so a time series reads one row per day of the range and
+a top-N ranking reads one row per product and month. Neither reads sale_items,
+however long the history.
+"""
+import pandas as pd
+from datetime import timedelta
+from database.cache import query_cache
+from database.procedures import call_procedure
+
+# Bucket name -> pandas frequency of the period start dates sales_series returns
+BUCKETS = {'day': 'D', 'week': 'W-MON', 'month': 'MS'}
+RANK_ORDERS = ('revenue', 'units', 'margin')
+SERIES_COLUMNS = ['period', 'sales_count', 'sales_amount', 'revenue', 'units', 'cost', 'margin', 'margin_pct']
+PRODUCT_COLUMNS = ['product_id', 'revenue', 'units', 'cost', 'margin', 'margin_pct', 'sales_count']
+
+
+def rebuild_rollups(client, start=None, end=None):
+    """Recompute the rollups for start..end (dates, inclusive; None = all history); returns days with sales"""
+    params = {}
+    if start is not None:
+        params['p_start'] = start.isoformat()
+    if end is not None:
+        params['p_end'] = end.isoformat()
+    return int(call_procedure(client, 'rebuild_sales_rollups', params) or 0)
+
+
+def get_sales_series(supabase, start, end, bucket='day'):
+    """Store totals per day, week (from Monday) or month from start to end, inclusive.
+
+    Every period in the range has a row, zero where nothing sold. Cached until
+    the rollups change; the frame is shared between sessions - treat it as read-only.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket: {bucket}")
+
+    def load():
+        rows = call_procedure(supabase, 'sales_series', {
+            'p_start': start.isoformat(), 'p_end': end.isoformat(), 'p_bucket': bucket,
+        }) or []
+        df = pd.DataFrame(rows, columns=SERIES_COLUMNS[:6])
+        df['period'] = pd.to_datetime(df['period'])
+        periods = pd.date_range(_period_start(start, bucket), end, freq=BUCKETS[bucket], name='period')
+        df = df.set_index('period').apply(pd.to_numeric).reindex(periods, fill_value=0).reset_index()
+        return _with_margin(df)[SERIES_COLUMNS]
+
+    key = ('sales_series', start.isoformat(), end.isoformat(), bucket)
+    return query_cache.get_or_load(key, load, ('sales_daily_totals',))
+
+
+def get_product_sales(supabase, start, end, limit=None, order='revenue'):
+    """Per product revenue, units and margin from start to end, best first by order.
+
+    limit keeps only the top N. Cached until the rollups change; the frame is
+    shared between sessions - treat it as read-only.
+    """
+    if order not in RANK_ORDERS:
+        raise ValueError(f"Unknown order: {order}")
+
+    def load():
+        params = {'p_start': start.isoformat(), 'p_end': end.isoformat(), 'p_order': order}
+        if limit is not None:
+            params['p_limit'] = int(limit)
+        rows = call_procedure(supabase, 'sales_by_product', params) or []
+        df = pd.DataFrame(rows, columns=['product_id', 'revenue', 'units', 'cost', 'sales_count'])
+        df[['revenue', 'units', 'cost', 'sales_count']] = df[['revenue', 'units', 'cost', 'sales_count']].apply(
+            pd.to_numeric)
+        return _with_margin(df)[PRODUCT_COLUMNS]
+
+    key = ('sales_by_product', start.isoformat(), end.isoformat(), limit, order)
+    return query_cache.get_or_load(key, load, ('sales_daily', 'sales_monthly'))
+
+
+def _with_margin(df):
+    df['margin'] = df['revenue'] - df['cost']
+    df['margin_pct'] = (df['margin'] / df['revenue'].where(df['revenue'] != 0) * 100).fillna(0.0)
+    return df
+
+
+def _period_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
@@ -0,0 +1,73 @@
+import streamlit as st
+import pandas as pd
+from database.batch import submit
+from database.cache import query_cache
+from database.metrics import count_rows
+from database.pagination import DEFAULT_PAGE_SIZE, PAGE_CACHE_TTL, fetch_page, split_columns
+
+PAGE_SIZE_OPTIONS = [25, 50, 100, 250]
+
+
+def show_paginated_table(supabase, table, columns, key, filters=(), order_column='id', desc=False,
+                         page_size=DEFAULT_PAGE_SIZE, depends_on=(), transform=None, show_count=True):
+    """Render a keyset-paginated table that fetches only the displayed columns.
+
+    The cursor stack lives in session_state under key, so Previous/Next only
+    ever read one page; the next page is prefetched into the query cache in the
+    background. transform(df) can add or reshape columns per page. Returns the
+    displayed DataFrame (empty when the table has no matching rows).
+    """
+    filters = tuple(filters)
+    size_options = sorted(set(PAGE_SIZE_OPTIONS + [page_size]))
+    size = st.selectbox("Rows per page", size_options, index=size_options.index(page_size),
+                        key=f"{key}_page_size")
+
+    state_key = f"{key}_pager"
+    signature = (table, columns, filters, order_column, desc, size)
+    pager = st.session_state.get(state_key)
+    if pager is None or pager['signature'] != signature:
+        pager = {'signature': signature, 'cursors': [None]}
+        st.session_state[state_key] = pager
+
+    rows, next_cursor = fetch_page(supabase, table, columns, filters, pager['cursors'][-1], size,
+                                   order_column, desc, depends_on)
+
+    # Warm the cache with the next page while this one is on screen
+    if next_cursor is not None:
+        submit(fetch_page, supabase, table, columns, filters, next_cursor, size,
+               order_column, desc, depends_on)
+
+    if not rows:
+        return pd.DataFrame()
+
+    df = pd.json_normalize(rows)
+    if transform is not None:
+        df = transform(df)
+    if columns.strip() != '*':
+        requested = split_columns(columns)
+        df = df.drop(columns=[c for c in ('id', order_column) if c not in requested and c in df.columns])
+
+    st.dataframe(df, use_container_width=True)
+
+    page_number = len(pager['cursors'])
+    first_row = (page_number - 1) * size + 1
+    caption = f"Page {page_number} · rows {first_row}-{first_row + len(rows) - 1}"
+    if show_count:
+        total = query_cache.get_or_load(('count', table, filters),
+                                        lambda: count_rows(supabase, table, filters),
+                                        (table,), PAGE_CACHE_TTL)
+        caption += f" of {total}"
+
+    col_prev, col_info, col_next = st.columns([1, 3, 1])
+    with col_prev:
+        if st.button("◀ Previous", key=f"{key}_prev", disabled=page_number == 1):
+            pager['cursors'].pop()
+            st.rerun()
+    with col_info:
+        st.caption(caption)
+    with col_next:
+        if st.button("Next ▶", key=f"{key}_next", disabled=next_cursor is None):
+            pager['cursors'].append(next_cursor)
+            st.rerun()
+
+    return df